@@ -81,6 +81,8 @@ CREATE TABLE prescriptions (
     FOREIGN KEY (appointment_id) REFERENCES appointments(id) ON DELETE SET NULL
 );
 
+-- Assessments recorded by the CDS demo: demo/assessment_schema.sql (run it after this file)
+
 -- Insert sample data for testing (optional)
 -- INSERT INTO patients (
 --     first_name, last_name, email, phone, date_of_birth, gender, 
@@ -0,0 +1,219 @@
+# admission.py -- Admission control and load shedding per route class
+# Each route class (triage JSON, PDF, batch) has a concurrency budget and a bounded
+# wait queue. A request that finds the queue full, or waits longer than max_wait,
+# is shed with Overloaded so the caller can answer 503 + Retry-After at once
+# instead of queueing indefinitely. AdmissionController serves threaded WSGI;
+# AsyncAdmissionController the ASGI event loop. Both report the same stats.
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+
+# Recent queue waits kept per route class for percentiles
+WAIT_SAMPLES = 1024
+# Smoothing of the service-time average used for Retry-After
+SERVICE_EWMA_ALPHA = 0.2
+
+
+class Overloaded(Exception):
+    """A request was shed; retry_after is the suggested wait in whole seconds"""
+
+    def __init__(self, route_class, reason, retry_after):
+        super().__init__(f"{route_class} over capacity ({reason})")
+        self.route_class = route_class
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+def limits_from_env(defaults, environ=os.environ):
+    """Copy of {route_class: {"concurrency", "queue", "max_wait"}} with
+    ADMISSION_<CLASS>_<KEY> environment overrides (e.g. ADMISSION_PDF_QUEUE=32)"""
+    limits = {}
+    for route_class, budget in defaults.items():
+        limits[route_class] = {}
+        for key, value in budget.items():
+            override = environ.get(f"ADMISSION_{route_class.upper()}_{key.upper()}")
+            limits[route_class][key] = type(value)(override) if override else value
+    return limits
+
+
+class RouteClass:
+    """Budget, queue and metrics of one route class (callers hold the lock)"""
+
+    def __init__(self, name, concurrency, queue, max_wait):
+        self.name = name
+        self.concurrency = concurrency
+        self.queue = queue
+        self.max_wait = max_wait
+        self.running = 0
+        self.waiters = deque()
+        self.admitted = 0
+        self.shed = {"queue_full": 0, "timeout": 0}
+        self.waits = deque(maxlen=WAIT_SAMPLES)
+        self.wait_max = 0.0
+        self.service_ewma = 0.0
+
+    def retry_after(self):
+        """Seconds until a slot is likely free, from the average service time"""
+        backlog = (len(self.waiters) + 1) / self.concurrency
+        return max(1, math.ceil(self.service_ewma * backlog))
+
+    def overloaded(self, reason):
+        self.shed[reason] = self.shed.get(reason, 0) + 1
+        return Overloaded(self.name, reason, self.retry_after())
+
+    def record_wait(self, seconds):
+        self.admitted += 1
+        self.waits.append(seconds)
+        self.wait_max = max(self.wait_max, seconds)
+
+    def record_service(self, seconds):
+        if self.service_ewma:
+            self.service_ewma += SERVICE_EWMA_ALPHA * (seconds - self.service_ewma)
+        else:
+            self.service_ewma = seconds
+
+    def stats(self):
+        waits = sorted(self.waits)
+
+        def pct(p):
+            return round(waits[min(int(len(waits) * p), len(waits) - 1)] * 1000, 2) if waits else 0.0
+
+        return {
+            "concurrency": self.concurrency,
+            "queue_limit": self.queue,
+            "max_wait_seconds": self.max_wait,
+            "running": self.running,
+            "waiting": len(self.waiters),
+            "admitted": self.admitted,
+            "shed": dict(self.shed, total=sum(self.shed.values())),
+            "queue_wait_ms": {"p50": pct(0.5), "p95": pct(0.95), "p99": pct(0.99),
+                              "max": round(self.wait_max * 1000, 2)},
+            "service_ms_avg": round(self.service_ewma * 1000, 2),
+        }
+
+
+class AdmissionController:
+    """Thread-based admission for WSGI workers.
+
+    Waiters queue FIFO; a finishing request hands its slot straight to the
+    oldest waiter, so a freed slot is never taken by a newcomer first.
+    """
+
+    def __init__(self, limits, clock=time.monotonic):
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.classes = {name: RouteClass(name, **budget) for name, budget in limits.items()}
+
+    def acquire(self, route_class):
+        """Take a slot, waiting in the queue if needed; raises Overloaded"""
+        rc = self.classes[route_class]
+        start = self.clock()
+        with self.lock:
+            if rc.running < rc.concurrency and not rc.waiters:
+                rc.running += 1
+                rc.record_wait(0.0)
+                return start
+            if len(rc.waiters) >= rc.queue:
+                raise rc.overloaded("queue_full")
+            handed = threading.Event()
+            rc.waiters.append(handed)
+
+        handed.wait(rc.max_wait)
+        with self.lock:
+            if not handed.is_set():
+                rc.waiters.remove(handed)
+                raise rc.overloaded("timeout")
+            now = self.clock()
+            rc.record_wait(now - start)
+        return now
+
+    def release(self, route_class, admitted_at):
+        rc = self.classes[route_class]
+        with self.lock:
+            rc.record_service(self.clock() - admitted_at)
+            if rc.waiters:
+                rc.waiters.popleft().set()
+            else:
+                rc.running -= 1
+
+    @contextmanager
+    def admit(self, route_class):
+        admitted_at = self.acquire(route_class)
+        try:
+            yield
+        finally:
+            self.release(route_class, admitted_at)
+
+    def shed(self, route_class, reason):
+        """Overloaded for a request refused for a reason outside the budget (counted in stats)"""
+        with self.lock:
+            return self.classes[route_class].overloaded(reason)
+
+    def stats(self):
+        with self.lock:
+            return {name: rc.stats() for name, rc in self.classes.items()}
+
+
+class AsyncAdmissionController:
+    """The same admission policy for coroutines on one event loop (no locking needed)"""
+
+    def __init__(self, limits, clock=time.monotonic):
+        self.clock = clock
+        self.classes = {name: RouteClass(name, **budget) for name, budget in limits.items()}
+
+    async def acquire(self, route_class):
+        rc = self.classes[route_class]
+        start = self.clock()
+        if rc.running < rc.concurrency and not rc.waiters:
+            rc.running += 1
+            rc.record_wait(0.0)
+            return start
+        if len(rc.waiters) >= rc.queue:
+            raise rc.overloaded("queue_full")
+        handed = asyncio.get_running_loop().create_future()
+        rc.waiters.append(handed)
+        try:
+            await asyncio.wait_for(asyncio.shield(handed), rc.max_wait)
+        except asyncio.TimeoutError:
+            if not handed.done():
+                rc.waiters.remove(handed)
+                raise rc.overloaded("timeout")
+        except asyncio.CancelledError:
+            # Client went away while queued: give up the place, or the slot if already handed over
+            if handed.done():
+                self._pass_on(rc)
+            else:
+                rc.waiters.remove(handed)
+            raise
+        now = self.clock()
+        rc.record_wait(now - start)
+        return now
+
+    def _pass_on(self, rc):
+        if rc.waiters:
+            rc.waiters.popleft().set_result(True)
+        else:
+            rc.running -= 1
+
+    def release(self, route_class, admitted_at):
+        rc = self.classes[route_class]
+        rc.record_service(self.clock() - admitted_at)
+        self._pass_on(rc)
+
+    @asynccontextmanager
+    async def admit(self, route_class):
+        admitted_at = await self.acquire(route_class)
+        try:
+            yield
+        finally:
+            self.release(route_class, admitted_at)
+
+    def shed(self, route_class, reason):
+        return self.classes[route_class].overloaded(reason)
+
+    def stats(self):
+        return {name: rc.stats() for name, rc in self.classes.items()}
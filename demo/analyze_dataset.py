@@ -3,6 +3,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 from collections import Counter
+from catalog import parse_strength_column
 import warnings
 warnings.filterwarnings('ignore')
 
@@ -106,8 +107,9 @@ if duplicates > 0:
 print("\n13. STRENGTH ANALYSIS")
 print("-" * 30)
 if 'Strength' in df.columns:
-    # Extract numeric values from strength
-    df['Strength_Numeric'] = df['Strength'].str.extract('(\d+)').astype(float)
+    # Numeric strength (normalized to mg) using the same parser as the app's catalog
+    df['Strength_Numeric'], df['Strength_Unit'] = parse_strength_column(df['Strength'])
+    df['Strength_Numeric'] = df['Strength_Numeric'].astype(float)
     print("Strength statistics (mg):")
     print(f"Mean: {df['Strength_Numeric'].mean():.2f} mg")
     print(f"Median: {df['Strength_Numeric'].median():.2f} mg")
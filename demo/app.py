@@ -2,461 +2,588 @@
 # app.py -- Demo Clinical Decision Support (CDS) prototype (NON-PRESCRIBING)
 # NOTE: This is a toy demo for development and testing only.
 # It MUST NOT be used clinically without validation, certification, and clinician workflows.
-from flask import Flask, request, jsonify, send_file
-import json, datetime, os, io, pandas as pd
+from flask import Flask, request, jsonify, send_file, g
+import json, datetime, os, io, time, atexit, logging, multiprocessing, numpy as np, pandas as pd
 from flask import send_from_directory
 from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image, PageTemplate, Frame
+from catalog import Catalog, CATEGORICAL_COLUMNS, build_medicines, format_strength
+from dispensing import build_dispensing_profiles, dose_text
+from pdf_cache import PDFCache, content_key
+import prescription_render
+from prescription_render import story_from_content
+from admission import AdmissionController, Overloaded, limits_from_env
+from assessment_store import AssessmentStore
+from cache_backend import LocalCache, TieredCache, shared_cache_from_url
+from assessment_db import AssessmentDatabase, date_bound, db_datetime, sqlite_connector
+from patient_history import PatientHistory, PatientHistoryCache
+from formulary import Formulary, FormularyRegistry, UnknownFormulary, formulary_sources
+from batch_export import ExportJobs, FORMATS as EXPORT_FORMATS
+from ranking import TopKIndex, DEFAULT_TOP_K
+from treatment_rules import TreatmentRule, TreatmentRules
+from interactions import InteractionChecker, InteractionRule
+from scoring import SymptomScorer
+from symptom_normalizer import SymptomNormalizer
+from structured_logging import configure_logging, get_logger, log_event, new_correlation_id, stop_logging
+from warmup import WarmUp
+from memory_report import memory_report
 
 app = Flask(__name__)
 
-# Load medicine dataset from CSV
-BASE_DIR = os.path.dirname(__file__)
-df = pd.read_csv(os.path.join(BASE_DIR, "main_data.csv"))
-
-# Convert CSV data to structured format for compatibility - ONLY OTC MEDICINES
-MEDS = []
-for _, row in df.iterrows():
-    # Only include Over-the-Counter medicines
-    if row['Classification'].lower() == 'over-the-counter':
-        med_data = {
-            "id": row['Name'].lower().replace(' ', '_'),
-            "name": row['Name'],
-            "category": row['Category'],
-            "dosage_form": row['Dosage Form'],
-            "strength": row['Strength'],
-            "manufacturer": row['Manufacturer'],
-            "indication": row['Indication'],
-            "classification": row['Classification'],
-            "contraindications": [],
-            "age_groups": {
-                "adult": {
-                    "dose": f"{row['Strength']} {row['Dosage Form'].lower()}",
-                    "min_age": 18,
-                    "max_age": 64
-                },
-                "elderly": {
-                    "dose": f"Reduced dose: {row['Strength']} {row['Dosage Form'].lower()}",
-                    "min_age": 65,
-                    "max_age": 999,
-                    "notes": "Consider dose adjustment for elderly patients"
-                }
-            }
-        }
-        MEDS.append(med_data)
+# JSON logs go through a queue to a listener thread; LOG_DEBUG_SAMPLE_RATE is the share of
+# requests whose debug events are kept
+LOG_LISTENER, LOG_HANDLER = configure_logging(
+    level=os.environ.get("LOG_LEVEL", "INFO").upper(),
+    debug_sample_rate=float(os.environ.get("LOG_DEBUG_SAMPLE_RATE", 0.01))
+)
+atexit.register(stop_logging, LOG_LISTENER)
+log = get_logger("app")
+# The "request" event below replaces the dev server's access log, which is written
+# synchronously and would include query strings (the legacy PDF URL carries patient data)
+logging.getLogger("werkzeug").setLevel(logging.WARNING)
+
+@app.before_request
+def start_request_log():
+    g.correlation_id = new_correlation_id(request.headers.get("X-Request-ID"))
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def finish_request_log(response):
+    response.headers["X-Request-ID"] = g.correlation_id
+    log_event(log, logging.INFO, "request", method=request.method, path=request.path,
+              endpoint=request.endpoint, status=response.status_code,
+              duration_ms=round((time.perf_counter() - g.request_started) * 1000, 2))
+    return response
+
+@app.teardown_request
+def log_request_error(exc):
+    if exc is not None:
+        log.error("request.failed", exc_info=exc, extra={"fields": {"path": request.path, "error": str(exc)}})
+
+# Start-up phases and their durations (GET /ready); loading the data below is timed as phases
+WARMUP = WarmUp()
+
+# Patient data this process writes is kept under a directory only its user can read
+# (CDS_DATA_DIR; by default in the user's data directory, never the shared temp directory)
+DATA_DIR = os.environ.get("CDS_DATA_DIR") or os.path.join(
+    os.environ.get("XDG_DATA_HOME") or os.path.join(os.path.expanduser("~"), ".local", "share"), "cds_demo")
+
+with WARMUP.phase("catalog"):
+    # Load medicine dataset from CSV (CATALOG_CSV points a worker at another formulary)
+    BASE_DIR = os.path.dirname(__file__)
+    df = pd.read_csv(os.environ.get("CATALOG_CSV") or os.path.join(BASE_DIR, "main_data.csv"))
+
+    # Bitmap-indexed view of the full dataset (OTC and prescription); strength is parsed here once
+    CATALOG = Catalog(df)
+
+    # Nothing reads the DataFrame once the catalog is built; RELEASE_SOURCE_DF=1 frees it
+    # (each ASGI PDF worker process loads a copy of its own)
+    if os.environ.get("RELEASE_SOURCE_DF", "0") != "0":
+        df = None
+
+# Instructions and age-group dosing, built once per distinct (category, dosage form) and
+# shared by the medicines of every formulary
+DISPENSING_PROFILES = {}
+
+# Manufacturers to favour when ranking otherwise equivalent medicines
+PREFERRED_MANUFACTURERS = []
+
+def load_medicines(catalog):
+    """(OTC Medicine records, first record per drug id, top-k index) for a catalog"""
+    build_dispensing_profiles(
+        ((category, dosage_form)
+         for category in catalog.dictionaries["category"]
+         for dosage_form in catalog.dictionaries["dosage_form"]),
+        DISPENSING_PROFILES
+    )
+
+    # Immutable Medicine records - ONLY OTC MEDICINES.
+    # Categorical fields reference the catalog's shared dictionary strings.
+    meds = build_medicines(catalog, DISPENSING_PROFILES, "over-the-counter")
+
+    # Drug ids are name-based and repeat across rows; an id resolves to its first OTC row
+    meds_by_id = {}
+    for med in meds:
+        meds_by_id.setdefault(med.id, med)
+
+    # Ranked top-k OTC medicines per (category, indication, age group)
+    top_k = TopKIndex(
+        meds,
+        catalog,
+        k=DEFAULT_TOP_K,
+        preferred_manufacturers=PREFERRED_MANUFACTURERS
+    )
+    return meds, meds_by_id, top_k
+
+with WARMUP.phase("medicines"):
+    MEDS, MEDS_BY_ID, MEDS_TOP_K = load_medicines(CATALOG)
 
 # Serve index.html at root
 @app.route("/")
 def index():
     return send_from_directory(BASE_DIR, "index.html")
 
-def classify_symptom_severity(symptoms_text):
-    """Classify symptoms into mild, possible risk, or severe cases"""
-    symptoms_list = [s.strip().lower() for s in symptoms_text.split(',')]
-    
-    # Define severity classifications
-    severe_symptoms = {
-        "difficulty breathing": 3, "shortness of breath": 3, "chest pain": 3,
-        "severe headache": 3, "persistent vomiting": 3, "high fever": 3,
-        "blood in urine": 3, "blood in stool": 3, "severe abdominal pain": 3,
-        "loss of consciousness": 3, "severe allergic reaction": 3,
-        "difficulty swallowing": 3, "severe dehydration": 3,
-        "rapid heart rate": 2, "dizziness": 2, "confusion": 2,
-        "severe fatigue": 2, "persistent fever": 2, "severe pain": 2
-    }
-    
-    moderate_symptoms = {
-        "fever": 2, "persistent cough": 2, "moderate pain": 2,
-        "nausea": 1, "vomiting": 2, "headache": 1,
-        "body aches": 1, "fatigue": 1, "sore throat": 1,
-        "congestion": 1, "runny nose": 1, "mild fever": 1,
-        "stomach pain": 1, "joint pain": 1, "muscle pain": 1
-    }
-    
-    mild_symptoms = {
-        "sneezing": 0.5, "itchy eyes": 0.5, "mild headache": 0.5,
-        "slight fever": 0.5, "minor aches": 0.5, "tiredness": 0.5,
-        "dry throat": 0.5, "light cough": 0.5, "minor congestion": 0.5
-    }
-    
-    severity_score = 0
-    matched_symptoms = []
-    
-    for symptom in symptoms_list:
-        for severe_symptom, score in severe_symptoms.items():
-            if severe_symptom in symptom:
-                severity_score += score
-                matched_symptoms.append((symptom, "severe", score))
-                break
-        else:
-            for moderate_symptom, score in moderate_symptoms.items():
-                if moderate_symptom in symptom:
-                    severity_score += score
-                    matched_symptoms.append((symptom, "moderate", score))
-                    break
-            else:
-                for mild_symptom, score in mild_symptoms.items():
-                    if mild_symptom in symptom:
-                        severity_score += score
-                        matched_symptoms.append((symptom, "mild", score))
-                        break
-                else:
-                    # Default classification for unmatched symptoms
-                    matched_symptoms.append((symptom, "mild", 0.5))
-                    severity_score += 0.5
-    
-    # Classify overall case severity
-    if severity_score >= 8:
-        case_severity = "severe"
-        urgency = "immediate_medical_attention"
-        recommendation = "Seek immediate medical attention or emergency care"
-    elif severity_score >= 4:
-        case_severity = "possible_risk"
-        urgency = "medical_consultation_recommended"
-        recommendation = "Consult with healthcare provider within 24-48 hours"
-    else:
-        case_severity = "mild"
-        urgency = "self_care_monitoring"
-        recommendation = "Monitor symptoms and consider over-the-counter treatments"
-    
-    return {
-        "severity_score": severity_score,
-        "case_severity": case_severity,
-        "urgency": urgency,
-        "recommendation": recommendation,
-        "symptom_breakdown": matched_symptoms,
-        "total_symptoms": len(symptoms_list)
-    }
+# Define severity classifications
+SEVERE_SYMPTOMS = {
+    "difficulty breathing": 3, "shortness of breath": 3, "chest pain": 3,
+    "severe headache": 3, "persistent vomiting": 3, "high fever": 3,
+    "blood in urine": 3, "blood in stool": 3, "severe abdominal pain": 3,
+    "loss of consciousness": 3, "severe allergic reaction": 3,
+    "difficulty swallowing": 3, "severe dehydration": 3,
+    "rapid heart rate": 2, "dizziness": 2, "confusion": 2,
+    "severe fatigue": 2, "persistent fever": 2, "severe pain": 2
+}
 
-def simple_symptom_to_options(symptoms_text):
-    symptoms_list = [s.strip().lower() for s in symptoms_text.split(',')]
-    opts = []
-    
-    # Get severity classification
-    severity_analysis = classify_symptom_severity(symptoms_text)
-    
-    # Track which categories and their scores
-    category_scores = {}
-    
-    # Define symptom clusters with weights (balanced thresholds for better coverage)
-    symptom_clusters = {
-        "viral_infection": {
-            "symptoms": {
-                "sore throat": 1, "fever": 1, "body ache": 1, "viral": 1,
-                "fatigue": 0.8, "headache": 0.8, "congestion": 0.7, "cough": 0.7
-            },
-            "threshold": 2.0  # Balanced threshold
+MODERATE_SYMPTOMS = {
+    "fever": 2, "persistent cough": 2, "moderate pain": 2,
+    "nausea": 1, "vomiting": 2, "headache": 1,
+    "body aches": 1, "fatigue": 1, "sore throat": 1,
+    "congestion": 1, "runny nose": 1, "mild fever": 1,
+    "stomach pain": 1, "joint pain": 1, "muscle pain": 1
+}
+
+MILD_SYMPTOMS = {
+    "sneezing": 0.5, "itchy eyes": 0.5, "mild headache": 0.5,
+    "slight fever": 0.5, "minor aches": 0.5, "tiredness": 0.5,
+    "dry throat": 0.5, "light cough": 0.5, "minor congestion": 0.5
+}
+
+# Define symptom clusters with weights (balanced thresholds for better coverage)
+SYMPTOM_CLUSTERS = {
+    "viral_infection": {
+        "symptoms": {
+            "sore throat": 1, "fever": 1, "body ache": 1, "viral": 1,
+            "fatigue": 0.8, "headache": 0.8, "congestion": 0.7, "cough": 0.7
         },
-        "bacterial_infection": {
-            "symptoms": {
-                "pus": 1.5, "tonsil": 0.8, "tonsillar": 1, "exudate": 1.5,
-                "persistent fever": 1.5, "severe": 0.7, "high fever": 1.2,
-                "white patches": 1, "swollen lymph nodes": 1, "infection": 1
-            },
-            "threshold": 2.0  # Balanced threshold
+        "threshold": 2.0  # Balanced threshold
+    },
+    "bacterial_infection": {
+        "symptoms": {
+            "pus": 1.5, "tonsil": 0.8, "tonsillar": 1, "exudate": 1.5,
+            "persistent fever": 1.5, "severe": 0.7, "high fever": 1.2,
+            "white patches": 1, "swollen lymph nodes": 1, "infection": 1
         },
-        "allergy": {
-            "symptoms": {
-                "sneezing": 1, "runny nose": 1, "itchy eyes": 1.2, "allergy": 1.5,
-                "nasal congestion": 0.8, "itchy throat": 0.7, "watery eyes": 1
-            },
-            "threshold": 1.8  # Lower threshold for allergy symptoms
+        "threshold": 2.0  # Balanced threshold
+    },
+    "allergy": {
+        "symptoms": {
+            "sneezing": 1, "runny nose": 1, "itchy eyes": 1.2, "allergy": 1.5,
+            "nasal congestion": 0.8, "itchy throat": 0.7, "watery eyes": 1
         },
-        "respiratory": {
-            "symptoms": {
-                "wheezing": 1.5, "shortness of breath": 1.5, "asthma": 2,
-                "difficulty breathing": 1.5, "chest tightness": 1, "coughing": 0.8
-            },
-            "threshold": 1.5  # Lower threshold for respiratory issues
+        "threshold": 1.8  # Lower threshold for allergy symptoms
+    },
+    "respiratory": {
+        "symptoms": {
+            "wheezing": 1.5, "shortness of breath": 1.5, "asthma": 2,
+            "difficulty breathing": 1.5, "chest tightness": 1, "coughing": 0.8
         },
-        "gi_symptoms": {
-            "symptoms": {
-                "nausea": 1.5, "vomiting": 2, "emesis": 2, "indigestion": 1,
-                "stomach pain": 1.2, "decreased appetite": 0.8, "bloating": 1,
-                "digestive": 1, "abdominal": 1
-            },
-            "threshold": 1.5  # Lower threshold for GI symptoms
+        "threshold": 1.5  # Lower threshold for respiratory issues
+    },
+    "gi_symptoms": {
+        "symptoms": {
+            "nausea": 1.5, "vomiting": 2, "emesis": 2, "indigestion": 1,
+            "stomach pain": 1.2, "decreased appetite": 0.8, "bloating": 1,
+            "digestive": 1, "abdominal": 1
         },
-        "skin_conditions": {
-            "symptoms": {
-                "rash": 1.5, "itching": 1.2, "skin irritation": 1.5, "dry skin": 1,
-                "eczema": 1.5, "dermatitis": 1.5, "skin": 0.8
-            },
-            "threshold": 1.2  # New category for skin issues
+        "threshold": 1.5  # Lower threshold for GI symptoms
+    },
+    "skin_conditions": {
+        "symptoms": {
+            "rash": 1.5, "itching": 1.2, "skin irritation": 1.5, "dry skin": 1,
+            "eczema": 1.5, "dermatitis": 1.5, "skin": 0.8
         },
-        "mental_health": {
-            "symptoms": {
-                "depression": 2, "anxiety": 1.5, "mood swings": 1, "irritability": 1,
-                "stress": 1, "mental": 0.8
-            },
-            "threshold": 1.5  # New category for mental health
+        "threshold": 1.2  # New category for skin issues
+    },
+    "mental_health": {
+        "symptoms": {
+            "depression": 2, "anxiety": 1.5, "mood swings": 1, "irritability": 1,
+            "stress": 1, "mental": 0.8
         },
-        "wound_care": {
-            "symptoms": {
-                "cut": 1.5, "wound": 2, "scrape": 1, "minor injury": 1.5,
-                "bleeding": 1, "injury": 1
-            },
-            "threshold": 1.0  # Lower threshold for wound care
+        "threshold": 1.5  # New category for mental health
+    },
+    "wound_care": {
+        "symptoms": {
+            "cut": 1.5, "wound": 2, "scrape": 1, "minor injury": 1.5,
+            "bleeding": 1, "injury": 1
         },
-        "diabetes": {
-            "symptoms": {
-                "high blood sugar": 1.5, "diabetes": 2, "hyperglycemia": 1.5,
-                "excessive thirst": 1, "frequent urination": 1, "blurred vision": 0.8
-            },
-            "threshold": 2.0  # Keep existing threshold
+        "threshold": 1.0  # Lower threshold for wound care
+    },
+    "diabetes": {
+        "symptoms": {
+            "high blood sugar": 1.5, "diabetes": 2, "hyperglycemia": 1.5,
+            "excessive thirst": 1, "frequent urination": 1, "blurred vision": 0.8
         },
-        "hypertension": {
-            "symptoms": {
-                "high blood pressure": 2, "hypertension": 2,
-                "headache": 0.5, "dizziness": 0.5
-            },
-            "threshold": 2.0  # Keep existing threshold
+        "threshold": 2.0  # Keep existing threshold
+    },
+    "hypertension": {
+        "symptoms": {
+            "high blood pressure": 2, "hypertension": 2,
+            "headache": 0.5, "dizziness": 0.5
         },
-        "high_cholesterol": {
-            "symptoms": {
-                "high cholesterol": 2, "hyperlipidemia": 2
-            },
-            "threshold": 2.0  # Keep existing threshold
-        }
+        "threshold": 2.0  # Keep existing threshold
+    },
+    "high_cholesterol": {
+        "symptoms": {
+            "high cholesterol": 2, "hyperlipidemia": 2
+        },
+        "threshold": 2.0  # Keep existing threshold
     }
-    
-    # Helper function to find medicines by category and indication (all are OTC)
-    def find_medicines_by_category_and_indication(category, indication=None):
-        matches = []
-        for med in MEDS:
-            if med['category'].lower() == category.lower():
-                if indication is None or med['indication'].lower() == indication.lower():
-                    matches.append(med['id'])
-        return matches[:1]  # Limit to 1 medicine per category for better accuracy
-    
-    # Calculate scores for each category based on symptoms
-    for symptom in symptoms_list:
-        for category, cluster in symptom_clusters.items():
-            score = 0
-            for keyword, weight in cluster["symptoms"].items():
-                if keyword in symptom:
-                    score += weight
-            if score > 0:
-                category_scores[category] = category_scores.get(category, 0) + score
-    
-    # Add treatment options based on category scores
-    if category_scores.get("viral_infection", 0) >= symptom_clusters["viral_infection"]["threshold"]:
-        antiviral_meds = find_medicines_by_category_and_indication("antiviral", "virus")
-        if not antiviral_meds:
-            antiviral_meds = find_medicines_by_category_and_indication("antiviral")
-        if antiviral_meds:
-            opts.append({
-                "id": "antiviral_1",
-                "type": "antiviral",
-                "title": "Antiviral medication for viral infection",
-                "drugs": antiviral_meds,
-                "rationale": "Viral illness pattern identified: antiviral treatment recommended."
-            })
-    
-    if category_scores.get("bacterial_infection", 0) >= symptom_clusters["bacterial_infection"]["threshold"]:
-        antibiotic_meds = find_medicines_by_category_and_indication("antibiotic", "infection")
-        if not antibiotic_meds:
-            antibiotic_meds = find_medicines_by_category_and_indication("antibiotic")
-        if antibiotic_meds:
-            opts.append({
-                "id": "antibiotic_1",
-                "type": "antibiotic",
-                "title": "Antibiotic for bacterial infection",
-                "drugs": antibiotic_meds,
-                "rationale": "Multiple bacterial infection indicators present; clinical confirmation required."
-            })
-    
-    if category_scores.get("allergy", 0) >= symptom_clusters["allergy"]["threshold"]:
-        # Look for antihistamine or related categories for allergies
-        allergy_meds = find_medicines_by_category_and_indication("antihistamine")
-        if not allergy_meds:
-            # If no direct antihistamine, look for other suitable categories
-            allergy_meds = find_medicines_by_category_and_indication("antiseptic")
-        if allergy_meds:
-            opts.append({
-                "id": "allergy_1",
-                "type": "antihistamine",
-                "title": "Medication for allergy symptoms",
-                "drugs": allergy_meds,
-                "rationale": "Allergy symptom pattern identified."
-            })
-    
-    if category_scores.get("diabetes", 0) >= symptom_clusters["diabetes"]["threshold"]:
-        diabetic_meds = find_medicines_by_category_and_indication("antidiabetic", "diabetes")
-        if not diabetic_meds:
-            diabetic_meds = find_medicines_by_category_and_indication("antidiabetic")
-        if diabetic_meds:
-            opts.append({
-                "id": "antidiabetic_1",
-                "type": "antidiabetic",
-                "title": "Antidiabetic medication",
-                "drugs": diabetic_meds,
-                "rationale": "Diabetes symptoms identified; clinical confirmation required."
-            })
-    
-    # Add GI symptom treatment
-    if category_scores.get("gi_symptoms", 0) >= symptom_clusters["gi_symptoms"]["threshold"]:
-        gi_meds = find_medicines_by_category_and_indication("antiseptic", "infection")  # Use antiseptic for digestive support
-        if not gi_meds:
-            gi_meds = find_medicines_by_category_and_indication("antiseptic")
-        if gi_meds:
-            opts.append({
-                "id": "gi_1",
-                "type": "digestive_support",
-                "title": "Digestive support medication",
-                "drugs": gi_meds,
-                "rationale": "Gastrointestinal symptoms identified."
-            })
-    
-    # Add skin condition treatment
-    if category_scores.get("skin_conditions", 0) >= symptom_clusters["skin_conditions"]["threshold"]:
-        skin_meds = find_medicines_by_category_and_indication("antifungal", "fungus")
-        if not skin_meds:
-            skin_meds = find_medicines_by_category_and_indication("antiseptic")
-        if skin_meds:
-            opts.append({
-                "id": "skin_1",
-                "type": "topical_treatment",
-                "title": "Topical treatment for skin conditions",
-                "drugs": skin_meds,
-                "rationale": "Skin condition symptoms identified."
-            })
-    
-    # Add mental health support
-    if category_scores.get("mental_health", 0) >= symptom_clusters["mental_health"]["threshold"]:
-        mental_meds = find_medicines_by_category_and_indication("antidepressant", "depression")
-        if not mental_meds:
-            mental_meds = find_medicines_by_category_and_indication("antidepressant")
-        if mental_meds:
-            opts.append({
-                "id": "mental_1",
-                "type": "mental_health_support",
-                "title": "Mental health support medication",
-                "drugs": mental_meds,
-                "rationale": "Mental health symptoms identified; consider professional counseling."
-            })
-    
-    # Add wound care treatment
-    if category_scores.get("wound_care", 0) >= symptom_clusters["wound_care"]["threshold"]:
-        wound_meds = find_medicines_by_category_and_indication("antiseptic", "wound")
-        if not wound_meds:
-            wound_meds = find_medicines_by_category_and_indication("antiseptic")
-        if wound_meds:
-            opts.append({
-                "id": "wound_1",
-                "type": "wound_care",
-                "title": "Wound care antiseptic",
-                "drugs": wound_meds,
-                "rationale": "Wound care symptoms identified."
-            })
-    
-    # Add respiratory treatment
-    if category_scores.get("respiratory", 0) >= symptom_clusters["respiratory"]["threshold"]:
-        resp_meds = find_medicines_by_category_and_indication("antipyretic")  # Use available categories for respiratory support
-        if resp_meds:
-            opts.append({
-                "id": "respiratory_1",
-                "type": "respiratory_support",
-                "title": "Respiratory symptom relief",
-                "drugs": resp_meds,
-                "rationale": "Respiratory symptoms identified; seek medical attention if breathing difficulties persist."
-            })
-    
-    # Add pain management option (more selective)
-    pain_symptoms = ["pain", "ache", "headache"]
-    pain_score = sum(1 for pain_symptom in pain_symptoms if pain_symptom in symptoms_text.lower())
-    
-    # Only recommend pain medication if multiple pain symptoms or strong pain indicators
-    if pain_score >= 2 or any(severe_pain in symptoms_text.lower() for severe_pain in ["severe pain", "intense pain", "chronic pain"]):
-        analgesic_meds = find_medicines_by_category_and_indication("analgesic", "pain")
-        if not analgesic_meds:
-            analgesic_meds = find_medicines_by_category_and_indication("analgesic")
-        if analgesic_meds:
-            opts.append({
-                "id": "analgesic_1",
-                "type": "analgesic",
-                "title": "Pain relief medication",
-                "drugs": analgesic_meds,
-                "rationale": f"Multiple pain symptoms identified (score: {pain_score})."
-            })
-    
-    # Add fever management option (more selective)
-    fever_indicators = ["fever", "high fever", "temperature"]
-    fever_score = sum(1 for indicator in fever_indicators if indicator in symptoms_text.lower())
-    
-    # Only recommend fever medication for clear fever symptoms
-    if fever_score >= 1 or "fever" in symptoms_text.lower():
-        antipyretic_meds = find_medicines_by_category_and_indication("antipyretic", "fever")
-        if not antipyretic_meds:
-            antipyretic_meds = find_medicines_by_category_and_indication("antipyretic")
-        if antipyretic_meds:
-            opts.append({
-                "id": "antipyretic_1",
-                "type": "antipyretic",
-                "title": "Fever reduction medication",
-                "drugs": antipyretic_meds,
-                "rationale": "Fever symptoms clearly identified."
-            })
-    
+}
+
+# Keyword lists for the pain and fever options
+PAIN_SYMPTOMS = ["pain", "ache", "headache"]
+FEVER_INDICATORS = ["fever", "high fever", "temperature"]
+
+# Organized symptom list by category for the frontend
+AVAILABLE_SYMPTOMS = {
+    "General": [
+        {"id": "fever", "text": "Fever", "keywords": ["fever", "high temperature"]},
+        {"id": "fatigue", "text": "Fatigue", "keywords": ["fatigue", "tiredness"]},
+        {"id": "body_ache", "text": "Body Aches", "keywords": ["body ache", "muscle pain"]},
+        {"id": "headache", "text": "Headache", "keywords": ["headache"]}
+    ],
+    "Respiratory": [
+        {"id": "sore_throat", "text": "Sore Throat", "keywords": ["sore throat"]},
+        {"id": "cough", "text": "Cough", "keywords": ["cough", "coughing"]},
+        {"id": "wheezing", "text": "Wheezing", "keywords": ["wheezing"]},
+        {"id": "shortness_breath", "text": "Shortness of Breath", "keywords": ["shortness of breath", "difficulty breathing"]},
+        {"id": "chest_tightness", "text": "Chest Tightness", "keywords": ["chest tightness"]}
+    ],
+    "ENT & Allergy": [
+        {"id": "nasal_congestion", "text": "Nasal Congestion", "keywords": ["nasal congestion", "congestion"]},
+        {"id": "runny_nose", "text": "Runny Nose", "keywords": ["runny nose"]},
+        {"id": "sneezing", "text": "Sneezing", "keywords": ["sneezing"]},
+        {"id": "itchy_eyes", "text": "Itchy Eyes", "keywords": ["itchy eyes", "watery eyes"]},
+        {"id": "tonsillar_symptoms", "text": "Swollen/White Tonsils", "keywords": ["tonsil", "tonsillar", "white patches", "pus", "exudate"]}
+    ],
+    "Gastrointestinal": [
+        {"id": "nausea", "text": "Nausea", "keywords": ["nausea"]},
+        {"id": "vomiting", "text": "Vomiting", "keywords": ["vomiting", "emesis"]},
+        {"id": "stomach_pain", "text": "Stomach Pain", "keywords": ["stomach pain"]},
+        {"id": "decreased_appetite", "text": "Decreased Appetite", "keywords": ["decreased appetite"]}
+    ],
+    "Chronic Conditions": [
+        {"id": "diabetes_symptoms", "text": "Diabetes Symptoms", "keywords": ["high blood sugar", "diabetes", "hyperglycemia", "excessive thirst", "frequent urination"]},
+        {"id": "hypertension_symptoms", "text": "High Blood Pressure Symptoms", "keywords": ["high blood pressure", "hypertension"]},
+        {"id": "high_cholesterol", "text": "High Cholesterol", "keywords": ["high cholesterol", "hyperlipidemia"]}
+    ]
+}
+
+# Canonical vocabulary: every keyword the triage rules or the symptom picker know about
+SYMPTOM_VOCABULARY = (
+    list(SEVERE_SYMPTOMS) + list(MODERATE_SYMPTOMS) + list(MILD_SYMPTOMS)
+    + [keyword for cluster in SYMPTOM_CLUSTERS.values() for keyword in cluster["symptoms"]]
+    + PAIN_SYMPTOMS + FEVER_INDICATORS
+    + [keyword for group in AVAILABLE_SYMPTOMS.values() for item in group for keyword in item["keywords"]]
+)
+SYMPTOM_NORMALIZER = SymptomNormalizer(SYMPTOM_VOCABULARY)
+
+# Case severity by total severity score: (minimum score, case_severity, urgency, recommendation)
+SEVERITY_LEVELS = [
+    (0, "mild", "self_care_monitoring", "Monitor symptoms and consider over-the-counter treatments"),
+    (4, "possible_risk", "medical_consultation_recommended", "Consult with healthcare provider within 24-48 hours"),
+    (8, "severe", "immediate_medical_attention", "Seek immediate medical attention or emergency care"),
+]
+
+def score_symptoms(symptoms_texts, adjustments=None):
+    """Severity analyses and rule signals for many comma-separated symptom strings.
+
+    All inputs are scored by SYMPTOM_SCORER in one vectorized pass. adjustments
+    optionally gives per patient {cluster: amount} from their history (see
+    history_adjustments), added to each cluster score that is above zero.
+    Returns (analyses, signal names, patients x signals matrix).
+    """
+    raw = [[s.strip().lower() for s in text.split(',')] for text in symptoms_texts]
+    # Map misspelled / free-text symptoms onto the rule vocabulary before scoring
+    symptoms = [[SYMPTOM_NORMALIZER.normalize(s) for s in items] for items in raw]
+    scores = SYMPTOM_SCORER.score(symptoms)
+    unadjusted = scores.clusters
+    if adjustments and any(adjustments):
+        offsets = np.zeros_like(unadjusted)
+        for i, patient_adjustments in enumerate(adjustments):
+            for cluster, amount in (patient_adjustments or {}).items():
+                offsets[i, CLUSTER_COLUMNS[cluster]] = amount
+        scores = scores._replace(clusters=unadjusted + offsets * (unadjusted > 0))
+    levels = np.searchsorted([level[0] for level in SEVERITY_LEVELS], scores.severity, side="right") - 1
+
+    analyses = []
+    for i, (raw_symptoms, symptoms_list) in enumerate(zip(raw, symptoms)):
+        matched_symptoms = SYMPTOM_SCORER.breakdown(scores, i, raw_symptoms)
+        _, case_severity, urgency, recommendation = SEVERITY_LEVELS[levels[i]]
+        analyses.append({
+            # Summed from the breakdown so whole-number scores stay ints
+            "severity_score": sum(score for _, _, score in matched_symptoms),
+            "case_severity": case_severity,
+            "urgency": urgency,
+            "recommendation": recommendation,
+            "symptom_breakdown": matched_symptoms,
+            "normalized_symptoms": {r: n for r, n in zip(raw_symptoms, symptoms_list) if r != n},
+            "total_symptoms": len(symptoms_list)
+        })
+        if adjustments and adjustments[i]:
+            analyses[i]["history_adjustments"] = {
+                cluster: {
+                    "score": round(float(unadjusted[i, CLUSTER_COLUMNS[cluster]]), 2),
+                    "adjustment": amount,
+                    "threshold": SYMPTOM_CLUSTERS[cluster]["threshold"],
+                    "met": bool(scores.clusters[i, CLUSTER_COLUMNS[cluster]] >= SYMPTOM_CLUSTERS[cluster]["threshold"])
+                }
+                for cluster, amount in adjustments[i].items()
+            }
+    names, values = SYMPTOM_SCORER.signal_table(scores)
+    return analyses, names, values
+
+def classify_symptom_severity(symptoms_text):
+    """Classify symptoms into mild, possible risk, or severe cases"""
+    analyses, _, _ = score_symptoms([symptoms_text])
+    return analyses[0]
+
+def cluster_threshold(name):
+    """Rule condition: the cluster's score reaches its threshold"""
+    return ((name, SYMPTOM_CLUSTERS[name]["threshold"]),)
+
+# Keyword counts over the (normalized, lower-cased) symptom text, used as rule signals
+KEYWORD_SIGNALS = {
+    "pain": PAIN_SYMPTOMS,
+    "severe_pain": ["severe pain", "intense pain", "chronic pain"],
+    "fever": FEVER_INDICATORS,
+}
+# Keyword counts only the fallback rules use
+FALLBACK_SIGNALS = {
+    "discomfort": ["pain", "ache", "discomfort", "sore", "hurt"],
+    "infection_or_wound": ["infection", "wound", "cut", "rash", "skin", "irritation"],
+    "fungal": ["fungus", "fungal", "yeast", "athlete", "foot"],
+    "digestive": ["nausea", "stomach", "digestive", "bloating", "indigestion"],
+}
+
+# Treatment options by symptom pattern; all are OTC. An option recommends the top-ranked
+# medicine of the first lookup that finds any and lists the rest as alternatives.
+TREATMENT_RULES = [
+    TreatmentRule("antiviral_1", "antiviral", "Antiviral medication for viral infection",
+                  "Viral illness pattern identified: antiviral treatment recommended.",
+                  cluster_threshold("viral_infection"), (("antiviral", "virus"), ("antiviral", None))),
+    TreatmentRule("antibiotic_1", "antibiotic", "Antibiotic for bacterial infection",
+                  "Multiple bacterial infection indicators present; clinical confirmation required.",
+                  cluster_threshold("bacterial_infection"), (("antibiotic", "infection"), ("antibiotic", None))),
+    # No direct antihistamine in the catalog falls back to antiseptics
+    TreatmentRule("allergy_1", "antihistamine", "Medication for allergy symptoms",
+                  "Allergy symptom pattern identified.",
+                  cluster_threshold("allergy"), (("antihistamine", None), ("antiseptic", None))),
+    TreatmentRule("antidiabetic_1", "antidiabetic", "Antidiabetic medication",
+                  "Diabetes symptoms identified; clinical confirmation required.",
+                  cluster_threshold("diabetes"), (("antidiabetic", "diabetes"), ("antidiabetic", None))),
+    # Antiseptic used for digestive support
+    TreatmentRule("gi_1", "digestive_support", "Digestive support medication",
+                  "Gastrointestinal symptoms identified.",
+                  cluster_threshold("gi_symptoms"), (("antiseptic", "infection"), ("antiseptic", None))),
+    TreatmentRule("skin_1", "topical_treatment", "Topical treatment for skin conditions",
+                  "Skin condition symptoms identified.",
+                  cluster_threshold("skin_conditions"), (("antifungal", "fungus"), ("antiseptic", None))),
+    TreatmentRule("mental_1", "mental_health_support", "Mental health support medication",
+                  "Mental health symptoms identified; consider professional counseling.",
+                  cluster_threshold("mental_health"), (("antidepressant", "depression"), ("antidepressant", None))),
+    TreatmentRule("wound_1", "wound_care", "Wound care antiseptic",
+                  "Wound care symptoms identified.",
+                  cluster_threshold("wound_care"), (("antiseptic", "wound"), ("antiseptic", None))),
+    # Antipyretics are the available category for respiratory support
+    TreatmentRule("respiratory_1", "respiratory_support", "Respiratory symptom relief",
+                  "Respiratory symptoms identified; seek medical attention if breathing difficulties persist.",
+                  cluster_threshold("respiratory"), (("antipyretic", None),)),
+    # Pain medication only for multiple pain symptoms or strong pain indicators
+    TreatmentRule("analgesic_1", "analgesic", "Pain relief medication",
+                  "Multiple pain symptoms identified (score: {pain:.0f}).",
+                  (("pain", 2), ("severe_pain", 1)), (("analgesic", "pain"), ("analgesic", None))),
+    TreatmentRule("antipyretic_1", "antipyretic", "Fever reduction medication",
+                  "Fever symptoms clearly identified.",
+                  (("fever", 1),), (("antipyretic", "fever"), ("antipyretic", None))),
+]
+
+# Basic relief when no rule above produced an option; only the first matching one is considered
+FALLBACK_RULES = [
+    TreatmentRule("fallback_pain", "general_pain_relief", "General pain relief",
+                  "General discomfort symptoms identified.",
+                  (("discomfort", 1),), (("analgesic", None),)),
+    TreatmentRule("fallback_antiseptic", "general_antiseptic", "General antiseptic treatment",
+                  "General infection or wound care symptoms identified.",
+                  (("infection_or_wound", 1),), (("antiseptic", None),)),
+    TreatmentRule("fallback_antifungal", "antifungal_treatment", "Antifungal treatment",
+                  "Fungal infection symptoms identified.",
+                  (("fungal", 1),), (("antifungal", None),)),
+    TreatmentRule("fallback_digestive", "digestive_support", "Digestive support",
+                  "Digestive symptoms identified.",
+                  (("digestive", 1),), (("antiseptic", None),)),
+]
+
+# Name fragments that mark an active ingredient (the catalog has no ingredient column)
+INGREDIENT_STEMS = {
+    "ibupro": "ibuprofen", "profen": "ibuprofen", "aceto": "acetaminophen",
+    "amoxi": "amoxicillin", "cillin": "penicillin", "cef": "cephalosporin",
+    "mycin": "macrolide", "nazole": "azole antifungal", "statin": "statin",
+}
+
+# Checked between every two medicines recommended together (see interactions.py)
+INTERACTION_RULES = [
+    InteractionRule("ingredient", "*", "*", "duplication", "major",
+                    "Both medicines contain {a}; taking them together doubles the dose"),
+    InteractionRule("ingredient", "amoxicillin", "penicillin", "duplication", "major",
+                    "Both medicines are penicillins; use only one"),
+    InteractionRule("ingredient", "macrolide", "statin", "interaction", "major",
+                    "Macrolides raise statin levels (risk of muscle damage); avoid the combination"),
+    InteractionRule("ingredient", "azole antifungal", "statin", "interaction", "major",
+                    "Azole antifungals raise statin levels (risk of muscle damage); avoid the combination"),
+    InteractionRule("ingredient", "penicillin", "cephalosporin", "interaction", "moderate",
+                    "Possible cross-allergy between penicillins and cephalosporins; check allergy history"),
+    InteractionRule("category", "*", "*", "duplication", "moderate",
+                    "Two {a} medicines recommended; use only one"),
+    InteractionRule("category", "analgesic", "antipyretic", "duplication", "moderate",
+                    "Analgesics and antipyretics overlap (often the same ingredient); one product usually treats both pain and fever"),
+    InteractionRule("category", "antifungal", "antidiabetic", "interaction", "major",
+                    "Azole antifungals can raise antidiabetic drug levels (risk of hypoglycaemia); monitor blood glucose"),
+    InteractionRule("category", "antibiotic", "antidiabetic", "interaction", "moderate",
+                    "Some antibiotics disturb blood glucose control; monitor blood glucose"),
+    InteractionRule("category", "antidepressant", "analgesic", "interaction", "moderate",
+                    "Antidepressants with NSAID painkillers increase bleeding risk; prefer a non-NSAID for pain"),
+    InteractionRule("category", "antibiotic", "antifungal", "interaction", "minor",
+                    "Some antibiotics and azole antifungals both prolong the QT interval"),
+]
+INTERACTIONS = InteractionChecker(INTERACTION_RULES, INGREDIENT_STEMS)
+
+def medicine_summary(med):
+    """Fields of a MEDS entry shown to users for a ranked alternative"""
+    return {
+        "id": med.id,
+        "name": med.name,
+        "dosage_form": med.dosage_form,
+        "strength": med.strength,
+        "manufacturer": med.manufacturer
+    }
+
+def medicine_ranker(catalog, meds, top_k):
+    """ranked_medicines over one catalog's medicines and top-k index"""
+    def ranked_medicines(category, indication, age_group):
+        """Top-ranked OTC medicines of a catalog bucket as alternatives (summary, row, score)"""
+        return [
+            dict(medicine_summary(meds[row]), row=row, score=score)
+            for row, score in top_k.top(
+                catalog.code("category", category),
+                catalog.code("indication", indication) if indication else None,
+                age_group
+            )
+        ]
+    return ranked_medicines
+
+ranked_medicines = medicine_ranker(CATALOG, MEDS, MEDS_TOP_K)
+
+# Every rule's medicines per age group, looked up once against the loaded catalog
+with WARMUP.phase("treatment_rules"):
+    TREATMENTS = TreatmentRules(TREATMENT_RULES, FALLBACK_RULES, ranked_medicines)
+
+def build_formulary(name, source):
+    """Formulary from a CSV: catalog, OTC medicines and their indexes, resolved treatment rules"""
+    catalog = Catalog(pd.read_csv(source))
+    meds, meds_by_id, top_k = load_medicines(catalog)
+    treatments = TreatmentRules(TREATMENT_RULES, FALLBACK_RULES, medicine_ranker(catalog, meds, top_k))
+    return Formulary(name, catalog, meds, meds_by_id, top_k, treatments, 0, time.time())
+
+# Formularies by name: the catalog above (DEFAULT_FORMULARY) plus every FORMULARY_DIR/<name>.csv,
+# each loaded when first requested. FORMULARY_CACHE_MB bounds the loaded ones beyond the default.
+DEFAULT_FORMULARY = os.environ.get("DEFAULT_FORMULARY", "default")
+FORMULARIES = FormularyRegistry(
+    Formulary(DEFAULT_FORMULARY, CATALOG, MEDS, MEDS_BY_ID, MEDS_TOP_K, TREATMENTS, 0, time.time()),
+    formulary_sources(os.environ.get("FORMULARY_DIR") or os.path.join(BASE_DIR, "formularies")),
+    build_formulary,
+    max_bytes=float(os.environ.get("FORMULARY_CACHE_MB", 512)) * 1024 * 1024,
+    shared=DISPENSING_PROFILES
+)
+
+def select_formulary(params, tenant=None):
+    """Formulary of a request: params' "formulary" if given (UnknownFormulary if it doesn't
+    exist), else the tenant's, params' "tenant"'s or "region"'s where a formulary of that
+    name exists, else the default"""
+    explicit = params.get("formulary")
+    if explicit:
+        return FORMULARIES.get(str(explicit))
+    for name in (tenant, params.get("tenant"), params.get("region")):
+        if name and str(name) in FORMULARIES:
+            return FORMULARIES.get(str(name))
+    return FORMULARIES.default
+
+def formulary_of(patient):
+    """Formulary an assessed patient was triaged against"""
+    return FORMULARIES.get(patient.get("formulary"))
+
+# Cluster weights, severity tiers and rule keywords as matrices over one keyword vocabulary
+SYMPTOM_SCORER = SymptomScorer(
+    SYMPTOM_CLUSTERS,
+    [("severe", SEVERE_SYMPTOMS), ("moderate", MODERATE_SYMPTOMS), ("mild", MILD_SYMPTOMS)],
+    dict(KEYWORD_SIGNALS, **FALLBACK_SIGNALS),
+    unmatched=("mild", 0.5)  # Default classification for unmatched symptoms
+)
+CLUSTER_COLUMNS = {name: j for j, name in enumerate(SYMPTOM_SCORER.cluster_names)}
+
+# History-aware triage: a chronic condition (medical_history.is_chronic) whose name contains
+# one of the keywords lowers its cluster's effective threshold by the amount, once any of the
+# cluster's symptoms is present
+CHRONIC_CLUSTER_ADJUSTMENTS = {
+    "diabetes": (("diabetes", "diabetic", "high blood sugar", "hyperglycemia"), 1.0),
+    "hypertension": (("hypertension", "high blood pressure"), 1.0),
+}
+# A cluster whose rule fired in one of the patient's assessments of the last RECENT_DAYS is recurring
+RECURRENCE_ADJUSTMENT = 0.5
+RECENT_DAYS = 14
+# Cluster behind each treatment rule that has one
+RULE_CLUSTERS = {rule.id: signal for rule in TREATMENT_RULES for signal, _ in rule.when if signal in SYMPTOM_CLUSTERS}
+
+def history_adjustments(history):
+    """{cluster: threshold reduction} for a PatientHistory"""
+    adjustments = {}
+    conditions = [condition.lower() for condition in history.chronic_conditions]
+    for cluster, (keywords, amount) in CHRONIC_CLUSTER_ADJUSTMENTS.items():
+        if any(keyword in condition for condition in conditions for keyword in keywords):
+            adjustments[cluster] = amount
+    since = db_datetime(datetime.datetime.utcnow() - datetime.timedelta(days=RECENT_DAYS))
+    recurring = {RULE_CLUSTERS[option_id]
+                 for _, assessed_at, option_ids in history.recent if assessed_at >= since
+                 for option_id in option_ids if option_id in RULE_CLUSTERS}
+    for cluster in recurring:
+        adjustments[cluster] = adjustments.get(cluster, 0) + RECURRENCE_ADJUSTMENT
+    return adjustments
+
+def simple_symptom_to_options(symptoms_text, age=None, formulary=None):
+    return symptom_options_batch([symptoms_text], [age], formularies=[formulary])[0]
+
+def symptom_options_batch(symptoms_texts, ages, adjustments=None, formularies=None):
+    """simple_symptom_to_options for many patients; scoring and rule thresholds
+    are evaluated for the whole batch at once (adjustments: see score_symptoms).
+    formularies optionally gives each patient's Formulary (None: the default)."""
+    if not symptoms_texts:
+        return []
+    analyses, names, values = score_symptoms(symptoms_texts, adjustments)
+    formularies = [f or FORMULARIES.default for f in formularies or [None] * len(symptoms_texts)]
+    options = [None] * len(symptoms_texts)
+    # Rules are evaluated once per formulary over the rows of its patients
+    for formulary in {f.name: f for f in formularies}.values():
+        rows = [i for i, f in enumerate(formularies) if f.name == formulary.name]
+        rule_hits, fallback_hits = formulary.treatments.fired(
+            names, values if len(rows) == len(symptoms_texts) else values[rows])
+        for j, i in enumerate(rows):
+            options[i] = build_options(analyses[i], dict(zip(names, values[i].tolist())), rule_hits[j],
+                                       fallback_hits[j], get_age_group(ages[i]) if ages[i] is not None else "adult",
+                                       formulary.treatments)
+    return options
+
+def build_options(severity_analysis, signals, rule_hits, fallback_hits, age_group, treatments=None):
+    treatments = treatments or TREATMENTS
+    # Add treatment options whose thresholds are met (medicines resolved at load)
+    opts = treatments.options(rule_hits, signals, age_group)
+
     # Fallback mechanism - if no medicines found, provide basic symptom relief
-    if not opts or not any(opt.get("drugs") for opt in opts):
-        # Check for any general symptoms that could benefit from basic relief
-        general_symptoms = symptoms_text.lower()
-        
-        # Basic pain relief for any discomfort
-        if any(keyword in general_symptoms for keyword in ["pain", "ache", "discomfort", "sore", "hurt"]):
-            fallback_analgesic = find_medicines_by_category_and_indication("analgesic")
-            if fallback_analgesic:
-                opts.append({
-                    "id": "fallback_pain",
-                    "type": "general_pain_relief",
-                    "title": "General pain relief",
-                    "drugs": fallback_analgesic,
-                    "rationale": "General discomfort symptoms identified."
-                })
-        
-        # Basic antiseptic for infections, wounds, or skin issues
-        elif any(keyword in general_symptoms for keyword in ["infection", "wound", "cut", "rash", "skin", "irritation"]):
-            fallback_antiseptic = find_medicines_by_category_and_indication("antiseptic")
-            if fallback_antiseptic:
-                opts.append({
-                    "id": "fallback_antiseptic",
-                    "type": "general_antiseptic",
-                    "title": "General antiseptic treatment",
-                    "drugs": fallback_antiseptic,
-                    "rationale": "General infection or wound care symptoms identified."
-                })
-        
-        # Basic antifungal for fungal symptoms
-        elif any(keyword in general_symptoms for keyword in ["fungus", "fungal", "yeast", "athlete", "foot"]):
-            fallback_antifungal = find_medicines_by_category_and_indication("antifungal")
-            if fallback_antifungal:
-                opts.append({
-                    "id": "fallback_antifungal",
-                    "type": "antifungal_treatment",
-                    "title": "Antifungal treatment",
-                    "drugs": fallback_antifungal,
-                    "rationale": "Fungal infection symptoms identified."
-                })
-        
-        # Basic digestive support
-        elif any(keyword in general_symptoms for keyword in ["nausea", "stomach", "digestive", "bloating", "indigestion"]):
-            fallback_digestive = find_medicines_by_category_and_indication("antiseptic")  # Use antiseptic for digestive support
-            if fallback_digestive:
-                opts.append({
-                    "id": "fallback_digestive",
-                    "type": "digestive_support",
-                    "title": "Digestive support",
-                    "drugs": fallback_digestive,
-                    "rationale": "Digestive symptoms identified."
-                })
-        
+    if not opts:
+        matched, fallback = treatments.fallback(fallback_hits, signals, age_group)
+        if fallback is not None:
+            opts.append(fallback)
         # If still no options, provide general supportive care advice
-        elif not opts:
+        elif not matched:
             opts.append({
                 "id": "general_advice",
                 "type": "general_care",
@@ -522,12 +649,36 @@ def get_age_group(age):
     else:
         return "elderly"
 
+def resolve_drug(option, drug_id, formulary=None):
+    """Medicine behind a drug id in the option's formulary (default: MEDS), preferring
+    the exact row the option ranked"""
+    formulary = formulary or FORMULARIES.default
+    for alt in option.get("alternatives", []):
+        if alt["id"] == drug_id:
+            return formulary.meds[alt["row"]]
+    return formulary.meds_by_id.get(drug_id)
+
+# Strengths above this fraction of their category are flagged for non-adult patients
+HIGH_STRENGTH_PERCENTILE = 0.9
+
+def interaction_flags(options, formulary=None):
+    """Duplication / interaction flags between the drugs the options recommend"""
+    drugs = []
+    for opt in options:
+        for drug_id in opt.get("drugs", []):
+            med = resolve_drug(opt, drug_id, formulary)
+            if med is not None:
+                drugs.append((opt["id"], med))
+    return INTERACTIONS.check(drugs)
+
 def run_safety_checks(option, patient):
     flags = []
     age = patient.get("age")
+    formulary = formulary_of(patient)
+    catalog = formulary.catalog
     
     for drug_id in option.get("drugs", []):
-        drug = next((d for d in MEDS if d["id"] == drug_id), None)
+        drug = resolve_drug(option, drug_id, formulary)
         if not drug:
             flags.append(f"Unknown drug id: {drug_id}")
             continue
@@ -535,422 +686,403 @@ def run_safety_checks(option, patient):
         # Age-based checks
         if age is not None:
             age_group = get_age_group(age)
-            age_info = drug.get("age_groups", {}).get(age_group)
+            age_info = drug.dispensing.age_groups.get(age_group)
             
             if not age_info:
-                flags.append(f"{drug['name']} is not typically recommended for this age group")
+                flags.append(f"{drug.name} is not typically recommended for this age group")
             else:
                 min_age = age_info.get("min_age", 0)
                 max_age = age_info.get("max_age", 999)
                 if age < min_age or age > max_age:
-                    flags.append(f"{drug['name']}: Age {age} is outside recommended range")
-                option["dosing"] = age_info.get("dose", "Standard dosing")
+                    flags.append(f"{drug.name}: Age {age} is outside recommended range")
+                option["dosing"] = dose_text(format_strength(drug.strength_value, drug.strength_unit) or drug.strength, age_info)
                 if age_info.get("notes"):
-                    flags.append(f"{drug['name']} note: {age_info['notes']}")
+                    flags.append(f"{drug.name} note: {age_info['notes']}")
+
+            # Dose sanity check against the category's strength distribution (pre-parsed, no string work)
+            if age_group != "adult" and drug.strength_unit == "mg":
+                rank = catalog.strength_rank(catalog.codes["category"][drug.catalog_row], drug.strength_value)
+                if rank is not None and rank > HIGH_STRENGTH_PERCENTILE:
+                    flags.append(f"{drug.name}: {drug.strength} is among the highest {drug.category.lower()} strengths; confirm dose for {age_group} patient")
     
     return flags
 
 @app.route("/symptoms", methods=["GET"])
 def get_symptoms():
-    # Organized symptom list by category for the frontend
-    available_symptoms = {
-        "General": [
-            {"id": "fever", "text": "Fever", "keywords": ["fever", "high temperature"]},
-            {"id": "fatigue", "text": "Fatigue", "keywords": ["fatigue", "tiredness"]},
-            {"id": "body_ache", "text": "Body Aches", "keywords": ["body ache", "muscle pain"]},
-            {"id": "headache", "text": "Headache", "keywords": ["headache"]}
-        ],
-        "Respiratory": [
-            {"id": "sore_throat", "text": "Sore Throat", "keywords": ["sore throat"]},
-            {"id": "cough", "text": "Cough", "keywords": ["cough", "coughing"]},
-            {"id": "wheezing", "text": "Wheezing", "keywords": ["wheezing"]},
-            {"id": "shortness_breath", "text": "Shortness of Breath", "keywords": ["shortness of breath", "difficulty breathing"]},
-            {"id": "chest_tightness", "text": "Chest Tightness", "keywords": ["chest tightness"]}
-        ],
-        "ENT & Allergy": [
-            {"id": "nasal_congestion", "text": "Nasal Congestion", "keywords": ["nasal congestion", "congestion"]},
-            {"id": "runny_nose", "text": "Runny Nose", "keywords": ["runny nose"]},
-            {"id": "sneezing", "text": "Sneezing", "keywords": ["sneezing"]},
-            {"id": "itchy_eyes", "text": "Itchy Eyes", "keywords": ["itchy eyes", "watery eyes"]},
-            {"id": "tonsillar_symptoms", "text": "Swollen/White Tonsils", "keywords": ["tonsil", "tonsillar", "white patches", "pus", "exudate"]}
-        ],
-        "Gastrointestinal": [
-            {"id": "nausea", "text": "Nausea", "keywords": ["nausea"]},
-            {"id": "vomiting", "text": "Vomiting", "keywords": ["vomiting", "emesis"]},
-            {"id": "stomach_pain", "text": "Stomach Pain", "keywords": ["stomach pain"]},
-            {"id": "decreased_appetite", "text": "Decreased Appetite", "keywords": ["decreased appetite"]}
-        ],
-        "Chronic Conditions": [
-            {"id": "diabetes_symptoms", "text": "Diabetes Symptoms", "keywords": ["high blood sugar", "diabetes", "hyperglycemia", "excessive thirst", "frequent urination"]},
-            {"id": "hypertension_symptoms", "text": "High Blood Pressure Symptoms", "keywords": ["high blood pressure", "hypertension"]},
-            {"id": "high_cholesterol", "text": "High Cholesterol", "keywords": ["high cholesterol", "hyperlipidemia"]}
-        ]
+    return jsonify(AVAILABLE_SYMPTOMS)
+
+@app.route("/medicines", methods=["GET"])
+def filter_medicines():
+    """Multi-attribute catalog filter.
+
+    Each categorical column may be given several times (?dosage_form=tablet&dosage_form=syrup);
+    values of one column are OR'd, different columns are AND'd, and
+    min_strength/max_strength (mg) restrict the strength range.
+    """
+    criteria = {field: request.args.getlist(field) for field in CATEGORICAL_COLUMNS}
+    min_strength = request.args.get("min_strength", type=float)
+    max_strength = request.args.get("max_strength", type=float)
+    limit = max(min(request.args.get("limit", 50, type=int), 500), 0)
+    offset = max(request.args.get("offset", 0, type=int), 0)
+    catalog = select_formulary(request.args, request.headers.get("X-Tenant-ID")).catalog
+
+    matches = catalog.filter(criteria, min_strength=min_strength, max_strength=max_strength)
+    return jsonify({
+        "total": matches.bit_count(),
+        "offset": offset,
+        "limit": limit,
+        "results": catalog.records(matches, offset=offset, limit=limit)
+    })
+
+def catalog_summary(formulary):
+    """Catalog size, distinct values per column and memory saved by categorical codes,
+    for one formulary, with the loaded formularies"""
+    catalog = formulary.catalog
+    return {
+        "formulary": formulary.name,
+        "rows": catalog.size,
+        "otc_medicines": len(formulary.meds),
+        "distinct_values": {field: len(values) for field, values in catalog.dictionaries.items()},
+        "memory": catalog.memory,
+        "formularies": FORMULARIES.stats()
     }
-    return jsonify(available_symptoms)
 
-def generate_prescription_pdf(patient_data, options):
-    buffer = None
-    try:
-        buffer = io.BytesIO()
-        doc = SimpleDocTemplate(
-            buffer,
-            pagesize=letter,
-            rightMargin=72,
-            leftMargin=72,
-            topMargin=72,
-            bottomMargin=72
-        )
-        
-        # Get the default style sheet and define custom styles
-        styles = getSampleStyleSheet()
-        
-        # Custom styles
-        title_style = ParagraphStyle(
-            'CustomTitle',
-            parent=styles['Heading1'],
-            fontSize=16,
-            spaceAfter=30,
-            alignment=1  # Center alignment
-        )
-        
-        normal_style = ParagraphStyle(
-            'CustomNormal',
-            parent=styles['Normal'],
-            fontSize=12,
-            leading=14
-        )
-        
-        heading_style = ParagraphStyle(
-            'CustomHeading',
-            parent=styles['Heading2'],
-            fontSize=14,
-            spaceAfter=12,
-            spaceBefore=12
-        )
-        
-        elements = []
-        
-        # Add content to the PDF
-        elements.append(Paragraph("Medical Prescription", title_style))
-        elements.append(Spacer(1, 12))
-        
-        # Add current date
-        current_date = datetime.datetime.now().strftime("%B %d, %Y")
-        elements.append(Paragraph(f"Date: {current_date}", normal_style))
-        elements.append(Spacer(1, 12))
-        
-        # Calculate BMI if weight is available
-        weight = patient_data.get('weight', '')
-        height = patient_data.get('height', '')  # Height should be in meters
-        bmi = None
-        bmi_status = "Not available"
-        if weight and height and isinstance(weight, (int, float)) and isinstance(height, (int, float)):
-            bmi = weight / (height * height)  # height should be in meters
-            # Determine BMI status
-            if bmi < 18.5:
-                bmi_status = "Underweight"
-            elif bmi < 25:
-                bmi_status = "Normal weight"
-            elif bmi < 30:
-                bmi_status = "Overweight"
-            else:
-                bmi_status = "Obese"
-            
-        # Patient information table data
-        # Convert height from meters to centimeters for display
-        height_cm = patient_data.get('height', '') * 100 if patient_data.get('height', '') else ''
-        
-        patient_info = [
-            ["Patient Name:", str(patient_data.get("patientName", ""))],
-            ["Age:", f"{patient_data.get('age', '')} years"],
-            ["Gender:", str(patient_data.get('sex', ''))],
-            ["Weight:", f"{patient_data.get('weight', '')} kg"],
-            ["Height:", f"{height_cm:.0f} cm" if height_cm else ""],
-            ["BMI:", f"{bmi:.1f} ({bmi_status})" if bmi else "Not available"]
-        ]
-        
-        # Create patient info table
-        t = Table(patient_info, colWidths=[2*inch, 4*inch])
-        t.setStyle(TableStyle([
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('PADDING', (0, 0), (-1, -1), 6),
-        ]))
-        elements.append(t)
-        elements.append(Spacer(1, 20))
-        
-        # Add symptoms section with severity analysis
-        elements.append(Paragraph("Clinical Assessment", heading_style))
-        # Get symptoms from multiple possible sources
-        symptoms_text = patient_data.get('symptomTexts') or patient_data.get('symptoms') or patient_data.get('symptom_texts') or ''
+@app.route("/catalog/stats", methods=["GET"])
+def catalog_stats():
+    """catalog_summary of the requested formulary (?formulary=, ?region= or X-Tenant-ID)"""
+    return jsonify(catalog_summary(select_formulary(request.args, request.headers.get("X-Tenant-ID"))))
+
+@app.errorhandler(UnknownFormulary)
+def unknown_formulary(exc):
+    return jsonify({"error": str(exc), "formularies": FORMULARIES.names()}), 400
+
+def memory_usage_report():
+    """Process memory and deep size of each global structure (slow on very large catalogs)"""
+    return dict(memory_report(globals()), source_df_released=df is None)
+
+@app.route("/debug/memory", methods=["GET"])
+def memory_usage():
+    return jsonify(memory_usage_report())
+
+# Bump whenever generate_prescription_pdf's layout or wording changes so cached PDFs are not reused
+PDF_TEMPLATE_VERSION = "3"
+PDF_DATE_FORMAT = "%B %d, %Y"
+# "flowable" lays out platypus flowables; "canvas" draws at precomputed coordinates and
+# falls back to flowables when the content does not fit its fixed layout
+PDF_RENDERER = os.environ.get("PDF_RENDERER", "flowable")
+
+# Cache shared by every node behind a load balancer (CACHE_URL=redis://host:port/db);
+# unset, every cache stays in this process. A node rereads a shared assessment after
+# CACHE_NEAR_TTL seconds in its near cache (0: no near cache).
+SHARED_CACHE = shared_cache_from_url(os.environ.get("CACHE_URL", ""), prefix=os.environ.get("CACHE_PREFIX", "cds:"))
+CACHE_NEAR_TTL = float(os.environ.get("CACHE_NEAR_TTL", 30))
+
+# Rendered PDFs keyed by content hash: memory LRU in front of a size-capped disk LRU,
+# then the shared cache
+PDF_CACHE = PDFCache(
+    os.environ.get("PDF_CACHE_DIR", os.path.join(DATA_DIR, "pdf_cache")),
+    memory_items=64,
+    memory_bytes=16 * 1024 * 1024,
+    disk_bytes=256 * 1024 * 1024,
+    shared=SHARED_CACHE
+)
+
+def pdf_cache_key(patient_data, options):
+    """Hash of everything the PDF prints: patient fields, chosen drugs/dosing, template and date"""
+    symptoms_text = patient_data.get('symptomTexts') or patient_data.get('symptoms') or patient_data.get('symptom_texts') or ''
+    patient_fields = {
+        "patientName": str(patient_data.get("patientName", "")).strip(),
+        "age": patient_data.get("age"),
+        "sex": patient_data.get("sex"),
+        "weight": patient_data.get("weight"),
+        "height": patient_data.get("height"),
+        "symptoms": ", ".join(s.strip().lower() for s in symptoms_text.split(',') if s.strip()),
+        "formulary": patient_data.get("formulary")
+    }
+    option_fields = [
+        {
+            "drugs": opt.get("drugs", []),
+            "dosing": opt.get("dosing"),
+            "rows": [alt["row"] for alt in opt.get("alternatives", [])]
+        }
+        for opt in options
+    ]
+    current_date = datetime.datetime.now().strftime(PDF_DATE_FORMAT)
+    return content_key(PDF_TEMPLATE_VERSION, PDF_RENDERER, current_date, patient_fields, option_fields)
+
+def prescription_pdf(patient_data, options):
+    """PDF for an assessment as a BytesIO, served from PDF_CACHE when already rendered"""
+    key = pdf_cache_key(patient_data, options)
+    data = PDF_CACHE.get(key)
+    if data is None:
+        buffer = generate_prescription_pdf(patient_data, options)
+        data = buffer.getvalue()
+        buffer.close()
+        PDF_CACHE.put(key, data)
+    return io.BytesIO(data)
+
+def prescription_content(patient_data, options):
+    """Renderer-independent content of one patient's prescription.
+
+    A list of blocks: ("para", runs, style), ("space", points),
+    ("table", rows, col_widths) and ("image", path, height). runs are
+    (text, bold, color) tuples; style is a prescription_render.PRESCRIPTION_STYLES key.
+    """
+    def para(text, style="normal", bold=False, color=None):
+        return ("para", [(text, bold, color)], style)
+
+    blocks = []
+    
+    # Add content to the PDF
+    blocks.append(para("Medical Prescription", "title"))
+    blocks.append(("space", 12))
+    
+    # Add current date
+    current_date = datetime.datetime.now().strftime(PDF_DATE_FORMAT)
+    blocks.append(para(f"Date: {current_date}"))
+    blocks.append(("space", 12))
+    
+    # Calculate BMI if weight is available
+    weight = patient_data.get('weight', '')
+    height = patient_data.get('height', '')  # Height should be in meters
+    bmi = None
+    bmi_status = "Not available"
+    if weight and height and isinstance(weight, (int, float)) and isinstance(height, (int, float)):
+        bmi = weight / (height * height)  # height should be in meters
+        # Determine BMI status
+        if bmi < 18.5:
+            bmi_status = "Underweight"
+        elif bmi < 25:
+            bmi_status = "Normal weight"
+        elif bmi < 30:
+            bmi_status = "Overweight"
+        else:
+            bmi_status = "Obese"
         
-        # Debug: Print what we're getting for symptoms
-        print(f"Debug - symptoms_text: '{symptoms_text}'")
-        print(f"Debug - patient_data keys: {patient_data.keys()}")
+    # Patient information table data
+    # Convert height from meters to centimeters for display
+    height_cm = patient_data.get('height', '') * 100 if patient_data.get('height', '') else ''
+    
+    patient_info = [
+        ["Patient Name:", str(patient_data.get("patientName", ""))],
+        ["Age:", f"{patient_data.get('age', '')} years"],
+        ["Gender:", str(patient_data.get('sex', ''))],
+        ["Weight:", f"{patient_data.get('weight', '')} kg"],
+        ["Height:", f"{height_cm:.0f} cm" if height_cm else ""],
+        ["BMI:", f"{bmi:.1f} ({bmi_status})" if bmi else "Not available"]
+    ]
+    
+    # Patient info table
+    blocks.append(("table", patient_info, [2*inch, 4*inch]))
+    blocks.append(("space", 20))
+    
+    # Add symptoms section with severity analysis
+    blocks.append(para("Clinical Assessment", "heading"))
+    # Get symptoms from multiple possible sources
+    symptoms_text = patient_data.get('symptomTexts') or patient_data.get('symptoms') or patient_data.get('symptom_texts') or ''
+    
+    if symptoms_text and symptoms_text.strip():
+        # Get severity analysis
+        severity_analysis = classify_symptom_severity(symptoms_text)
         
-        # Add symptoms section with severity analysis
-        elements.append(Paragraph("Clinical Assessment", heading_style))
-        # Get symptoms from multiple possible sources
-        symptoms_text = patient_data.get('symptomTexts') or patient_data.get('symptoms') or patient_data.get('symptom_texts') or ''
+        # Add severity classification
+        blocks.append(para("Case Severity Classification:", bold=True))
+        severity_color = "red" if severity_analysis["case_severity"] == "severe" else \
+                       "orange" if severity_analysis["case_severity"] == "possible_risk" else "green"
         
-        # Debug: Print what we're getting for symptoms
-        print(f"Debug - symptoms_text: '{symptoms_text}'")
-        print(f"Debug - patient_data keys: {patient_data.keys()}")
+        blocks.append(para(severity_analysis["case_severity"].upper().replace("_", " "), bold=True, color=severity_color))
+        blocks.append(para(f"Severity Score: {severity_analysis['severity_score']:.1f}/10"))
+        blocks.append(("para", [("Recommendation:", True, None), (f" {severity_analysis['recommendation']}", False, None)], "normal"))
+        blocks.append(("space", 12))
         
-        if symptoms_text and symptoms_text.strip():
-            # Get severity analysis
-            severity_analysis = classify_symptom_severity(symptoms_text)
+        symptoms_list = [s.strip() for s in symptoms_text.split(',') if s.strip()]
+        if symptoms_list:
+            blocks.append(para("Presenting Symptoms:", bold=True))
+            blocks.append(("space", 6))
             
-            # Add severity classification
-            elements.append(Paragraph("<b>Case Severity Classification:</b>", normal_style))
-            severity_color = "red" if severity_analysis["case_severity"] == "severe" else \
-                           "orange" if severity_analysis["case_severity"] == "possible_risk" else "green"
+            # Group symptoms by severity for better presentation
+            severe_symptoms = []
+            moderate_symptoms = []
+            mild_symptoms = []
             
-            elements.append(Paragraph(f'<font color="{severity_color}"><b>{severity_analysis["case_severity"].upper().replace("_", " ")}</b></font>', normal_style))
-            elements.append(Paragraph(f"Severity Score: {severity_analysis['severity_score']:.1f}/10", normal_style))
-            elements.append(Paragraph(f"<b>Recommendation:</b> {severity_analysis['recommendation']}", normal_style))
-            elements.append(Spacer(1, 12))
+            for symptom_data in severity_analysis["symptom_breakdown"]:
+                symptom, severity, score = symptom_data
+                if severity == "severe":
+                    severe_symptoms.append((symptom, score))
+                elif severity == "moderate":
+                    moderate_symptoms.append((symptom, score))
+                else:
+                    mild_symptoms.append((symptom, score))
             
-            symptoms_list = [s.strip() for s in symptoms_text.split(',') if s.strip()]
-            if symptoms_list:
-                elements.append(Paragraph("<b>Presenting Symptoms:</b>", normal_style))
-                elements.append(Spacer(1, 6))
-                
-                # Group symptoms by severity for better presentation
-                severe_symptoms = []
-                moderate_symptoms = []
-                mild_symptoms = []
-                
-                for symptom_data in severity_analysis["symptom_breakdown"]:
-                    symptom, severity, score = symptom_data
-                    if severity == "severe":
-                        severe_symptoms.append((symptom, score))
-                    elif severity == "moderate":
-                        moderate_symptoms.append((symptom, score))
-                    else:
-                        mild_symptoms.append((symptom, score))
-                
-                if severe_symptoms:
-                    elements.append(Paragraph('<font color="red"><b>Severe Symptoms:</b></font>', normal_style))
-                    for symptom, score in severe_symptoms:
-                        elements.append(Paragraph(f'<font color="red">• {symptom.title()} (Score: {score})</font>', normal_style))
-                    elements.append(Spacer(1, 6))
-                
-                if moderate_symptoms:
-                    elements.append(Paragraph('<font color="orange"><b>Moderate Symptoms:</b></font>', normal_style))
-                    for symptom, score in moderate_symptoms:
-                        elements.append(Paragraph(f'<font color="orange">• {symptom.title()} (Score: {score})</font>', normal_style))
-                    elements.append(Spacer(1, 6))
-                
-                if mild_symptoms:
-                    elements.append(Paragraph('<b>Mild Symptoms:</b>', normal_style))
-                    for symptom, score in mild_symptoms:
-                        elements.append(Paragraph(f"• {symptom.title()} (Score: {score})", normal_style))
-                
-                elements.append(Spacer(1, 20))
-        else:
-            # If no symptoms are provided, show a note
-            elements.append(Paragraph("<b>Presenting Symptoms:</b>", normal_style))
-            elements.append(Paragraph("No specific symptoms provided in the assessment.", normal_style))
-            elements.append(Spacer(1, 20))
-        
-        # Add medications with timing
-        if options:
-            elements.append(Paragraph("Recommended Over-the-Counter Medications:", heading_style))
-            elements.append(Paragraph("<b>Note:</b> This system only recommends Over-the-Counter (OTC) medicines. For prescription medications, consult your healthcare provider.", normal_style))
-            elements.append(Spacer(1, 12))
+            if severe_symptoms:
+                blocks.append(para("Severe Symptoms:", bold=True, color="red"))
+                for symptom, score in severe_symptoms:
+                    blocks.append(para(f"• {symptom.title()} (Score: {score})", color="red"))
+                blocks.append(("space", 6))
             
-            all_meds = []
-            for opt in options:
-                if 'drugs' in opt:
-                    for drug_id in opt['drugs']:
-                        # Find the medicine in our dataset (all are OTC)
-                        med = next((m for m in MEDS if m['id'] == drug_id), None)
-                        if med:
-                            drug_name = med['name']
-                            category = med['category']
-                            dosage_form = med['dosage_form']
-                            strength = med['strength']
-                            
-                            # Get default timing based on category and dosage form
-                            timing = "Take as directed"
-                            if category.lower() == "analgesic":
-                                timing = "Take every 6-8 hours as needed for pain"
-                            elif category.lower() == "antipyretic":
-                                timing = "Take every 6-8 hours as needed for fever"
-                            elif category.lower() == "antibiotic":
-                                timing = "Take every 8 hours for 7-10 days"
-                            elif category.lower() == "antiviral":
-                                timing = "Take as directed for 5-7 days"
-                            elif category.lower() == "antidiabetic":
-                                timing = "Take once or twice daily with meals"
-                            elif category.lower() == "antifungal":
-                                timing = "Take once daily"
-                            elif category.lower() == "antidepressant":
-                                timing = "Take once daily"
-                            elif category.lower() == "antiseptic":
-                                if dosage_form.lower() in ["ointment", "cream"]:
-                                    timing = "Apply to affected area 2-3 times daily"
-                                else:
-                                    timing = "Use as directed"
-                            elif dosage_form.lower() == "inhaler":
-                                timing = "Use 2 puffs every 4-6 hours as needed"
-                            elif dosage_form.lower() in ["ointment", "cream"]:
-                                timing = "Apply to affected area 2-3 times daily"
-                            elif dosage_form.lower() == "drops":
-                                timing = "Use as directed"
-                            elif dosage_form.lower() == "injection":
-                                timing = "Administer as prescribed by healthcare provider"
-                            
-                            dosing = opt.get('dosing', f'{strength} {dosage_form}')
-                            all_meds.append((drug_name, timing, dosing, med['manufacturer']))
+            if moderate_symptoms:
+                blocks.append(para("Moderate Symptoms:", bold=True, color="orange"))
+                for symptom, score in moderate_symptoms:
+                    blocks.append(para(f"• {symptom.title()} (Score: {score})", color="orange"))
+                blocks.append(("space", 6))
             
-            if not all_meds:
-                elements.append(Paragraph("No Over-the-Counter medicines available for the current symptoms. Please consult a healthcare provider for prescription medications if needed.", normal_style))
-            else:
-                # Sort medications alphabetically
-                all_meds.sort(key=lambda x: x[0])
-                
-                # Add each medication with its timing and dosing
-                for idx, (drug_name, timing, dosing, manufacturer) in enumerate(all_meds, 1):
-                    elements.append(Paragraph(f"{idx}. <b>{drug_name}</b> (OTC)", normal_style))
-                    elements.append(Paragraph(f"   Dosing: {dosing}", normal_style))
-                    elements.append(Paragraph(f"   Instructions: {timing}", normal_style))
-                    elements.append(Paragraph(f"   Manufacturer: {manufacturer}", normal_style))
-                    elements.append(Spacer(1, 8))
-        
-        # Add signature section with proper spacing
-        elements.append(Spacer(1, 30))
-        
-        # Add line for signature
-        elements.append(Paragraph("_" * 45, normal_style))
-        
-        # Add signature image centered above the line
-        signature_img_path = os.path.join(BASE_DIR, "sign.png")
-        if os.path.exists(signature_img_path):
-            signature = Image(signature_img_path)
-            # Set signature height to 0.75 inches (54 points) and adjust width proportionally
-            desired_height = 54  # 0.75 inches in points
-            aspect_ratio = signature.imageWidth / signature.imageHeight
-            signature.drawHeight = desired_height
-            signature.drawWidth = desired_height * aspect_ratio
-            # Center the signature above the line
-            signature.hAlign = 'CENTER'
-            elements.append(signature)
+            if mild_symptoms:
+                blocks.append(para("Mild Symptoms:", bold=True))
+                for symptom, score in mild_symptoms:
+                    blocks.append(para(f"• {symptom.title()} (Score: {score})"))
             
-        # Add small space and then the text
-        elements.append(Spacer(1, 6))
-        elements.append(Paragraph("Doctor's Signature", normal_style))
+            blocks.append(("space", 20))
+    else:
+        # If no symptoms are provided, show a note
+        blocks.append(para("Presenting Symptoms:", bold=True))
+        blocks.append(para("No specific symptoms provided in the assessment."))
+        blocks.append(("space", 20))
+    
+    # Add medications with timing
+    if options:
+        blocks.append(para("Recommended Over-the-Counter Medications:", "heading"))
+        blocks.append(("para", [("Note:", True, None), (" This system only recommends Over-the-Counter (OTC) medicines. For prescription medications, consult your healthcare provider.", False, None)], "normal"))
+        blocks.append(("space", 12))
         
-        # Add footer
-        elements.append(Spacer(1, 20))
-        elements.append(Paragraph("This is a computer-generated recommendation for Over-the-Counter medicines only. For prescription medications or severe conditions, consult a licensed healthcare provider.", 
-                               ParagraphStyle('Footer', parent=styles['Italic'], fontSize=8)))
+        formulary = formulary_of(patient_data)
+        all_meds = []
+        for opt in options:
+            if 'drugs' in opt:
+                for drug_id in opt['drugs']:
+                    # Find the medicine in our dataset (all are OTC)
+                    med = resolve_drug(opt, drug_id, formulary)
+                    if med:
+                        drug_name = med.name
+                        dosage_form = med.dosage_form
+                        strength = med.strength
+                        
+                        # Default timing is shared per category and dosage form
+                        timing = med.dispensing.instructions
+                        
+                        dosing = opt.get('dosing', f'{strength} {dosage_form}')
+                        all_meds.append((drug_name, timing, dosing, med.manufacturer))
         
-        # Create a custom PageTemplate to add border
-        def add_border(canvas, doc):
-            canvas.saveState()
-            # Draw a rectangle border with rounded corners
-            canvas.setStrokeColorRGB(0.2, 0.2, 0.2)  # Dark gray color
-            canvas.setLineWidth(2)
-            # Leave 0.5 inch margin from edges
-            margin = 36  # 0.5 inch in points
-            width, height = letter
-            canvas.roundRect(margin, margin, width - 2*margin, height - 2*margin, radius=10)
-            canvas.restoreState()
+        if not all_meds:
+            blocks.append(para("No Over-the-Counter medicines available for the current symptoms. Please consult a healthcare provider for prescription medications if needed."))
+        else:
+            # Sort medications alphabetically
+            all_meds.sort(key=lambda x: x[0])
             
-        # Create a frame for the content
-        frame = Frame(
-            doc.leftMargin,
-            doc.bottomMargin,
-            doc.width,
-            doc.height,
-            id='normal'
-        )
-        
-        # Create PageTemplate with frame and onPage callback
-        template = PageTemplate(
-            'normal',
-            [frame],
-            onPage=add_border
-        )
-        doc.addPageTemplates([template])
+            # Add each medication with its timing and dosing
+            for idx, (drug_name, timing, dosing, manufacturer) in enumerate(all_meds, 1):
+                blocks.append(("para", [(f"{idx}. ", False, None), (drug_name, True, None), (" (OTC)", False, None)], "normal"))
+                blocks.append(para(f"   Dosing: {dosing}"))
+                blocks.append(para(f"   Instructions: {timing}"))
+                blocks.append(para(f"   Manufacturer: {manufacturer}"))
+                blocks.append(("space", 8))
+
+        warnings = interaction_flags(options, formulary)
+        if warnings:
+            blocks.append(para("Medication Warnings:", bold=True, color="red"))
+            for flag in warnings:
+                blocks.append(("para", [(f"• {' + '.join(flag['drugs'])} ({flag['severity']} {flag['type']}): ", True, "red"),
+                                        (flag["message"], False, None)], "normal"))
+            blocks.append(("space", 8))
+    
+    # Add signature section with proper spacing
+    blocks.append(("space", 30))
+    
+    # Add line for signature
+    blocks.append(para("_" * 45))
+    
+    # Add signature image centered above the line, 0.75 inches (54 points) high
+    signature_img_path = os.path.join(BASE_DIR, "sign.png")
+    if os.path.exists(signature_img_path):
+        blocks.append(("image", signature_img_path, 54))
         
-        # Build PDF with border
-        doc.build(elements)
+    # Add small space and then the text
+    blocks.append(("space", 6))
+    blocks.append(para("Doctor's Signature"))
+    
+    # Add footer
+    blocks.append(("space", 20))
+    blocks.append(para("This is a computer-generated recommendation for Over-the-Counter medicines only. For prescription medications or severe conditions, consult a licensed healthcare provider.", "footer"))
+
+    return blocks
+
+def prescription_story(patient_data, options):
+    """Flowables for one patient's prescription (see prescription_render.build_prescription_document)"""
+    return story_from_content(prescription_content(patient_data, options))
+
+def render_prescriptions(output, contents, renderer=None):
+    """prescription_render.render_prescriptions with PDF_RENDERER as the default renderer"""
+    return prescription_render.render_prescriptions(output, contents, renderer or PDF_RENDERER)
+
+def generate_prescription_pdf(patient_data, options, renderer=None):
+    buffer = None
+    try:
+        buffer = io.BytesIO()
+        render_prescriptions(buffer, [prescription_content(patient_data, options)], renderer)
         buffer.seek(0)
         return buffer
         
     except Exception as e:
-        print(f"Error generating PDF: {str(e)}")
+        log.exception("pdf.render_failed", extra={"fields": {"error": str(e), "renderer": renderer or PDF_RENDERER}})
         if buffer:
             buffer.close()
         raise
 
-@app.route("/health", methods=["GET"])
-def health():
-    return jsonify({"status":"ok","timestamp": datetime.datetime.utcnow().isoformat() + "Z"})
+def assess_patient(data, tenant=None):
+    """Triage one patient payload (the POST /assess body).
 
-@app.route("/assess", methods=["POST", "GET"])
-def assess():
-    if request.method == "GET" and request.args.get('format') == 'pdf':
-        # Handle PDF generation from GET request
-        try:
-            data = json.loads(request.args.get('data', '{}'))
-            age = data.get("age")
-            if age is not None:
-                age = float(age)
-            
-            patient = {
-                "patientName": data.get("patientName", ""),  # Get name from the patientName field
-                "age": age,
-                "sex": data.get("sex"),
-                "weight": data.get("weight"),
-                "height": data.get("height"),  # Add height for BMI calculation
-                "symptoms": data.get("symptomTexts", data.get("symptoms", ""))  # Get full symptom texts or fallback to keywords
-            }
-            
-            options = simple_symptom_to_options(data.get("symptoms", ""))
-            
-            # Get severity analysis from the first option or create new one
-            severity_info = options[0]["severity_analysis"] if options else classify_symptom_severity(data.get("symptoms", ""))
-            
-            for opt in options:
-                opt["safety_flags"] = run_safety_checks(opt, patient)
-                if age is not None:
-                    age_group = get_age_group(age)
-                    opt["age_group"] = age_group
-            
-            pdf_buffer = generate_prescription_pdf(patient, options)
-            # Create filename with patient name
-            patient_name = patient.get("patientName", "").strip().replace(" ", "_")
-            filename = f'prescription_{patient_name}_{datetime.datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf' if patient_name else f'prescription_{datetime.datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf'
-            return send_file(
-                pdf_buffer,
-                download_name=filename,
-                mimetype='application/pdf'
-            )
-        except Exception as e:
-            return jsonify({"error": str(e)}), 500
+    Returns {"patient", "options", "response"}: the fields the PDF needs and
+    the JSON response, as kept in ASSESSMENTS.
+    """
+    return assess_patients([data], tenant)[0]
 
-    # Handle regular POST request
-    data = request.json or {}
-    symptoms = data.get("symptoms","")
-    age = data.get("age")
-    if age is not None:
-        age = float(age)
-    
-    patient = {
-        "patientName": data.get("patientName", ""),
-        "age": age,
-        "sex": data.get("sex"),
-        "weight": data.get("weight"),
-        "height": data.get("height"),  # Add height for BMI calculation
-        "symptoms": symptoms,  # Add symptoms for PDF generation
-        "symptomTexts": data.get("symptomTexts", symptoms)  # Add symptomTexts field
-    }
-    
-    options = simple_symptom_to_options(symptoms)
+def patient_id_of(data):
+    """Integer patientId of a payload, or None when absent or not an integer"""
+    value = data.get("patientId")
+    try:
+        return int(value) if value not in (None, "") else None
+    except (TypeError, ValueError):
+        return None
+
+def assess_patients(payloads, tenant=None):
+    """assess_patient for many payloads, with symptom scoring done as one batch.
+
+    A payload with a patientId is triaged with that patient's history
+    (chronic conditions and recent assessments) when assessments are persisted.
+    Each payload is matched against its formulary (see select_formulary; tenant
+    is the requester's X-Tenant-ID), raising UnknownFormulary for a bad name.
+    """
+    patients = []
+    formularies = []
+    for data in payloads:
+        symptoms = data.get("symptoms","")
+        age = data.get("age")
+        if age is not None:
+            age = float(age)
+        formularies.append(select_formulary(data, tenant))
+        patients.append({
+            "formulary": formularies[-1].name,
+            "patientId": patient_id_of(data),
+            "patientName": data.get("patientName", ""),
+            "age": age,
+            "sex": data.get("sex"),
+            "weight": data.get("weight"),
+            "height": data.get("height"),  # Add height for BMI calculation
+            "symptoms": symptoms,  # Add symptoms for PDF generation
+            "symptomTexts": data.get("symptomTexts", symptoms)  # Add symptomTexts field
+        })
+    histories = [
+        PATIENT_HISTORY.get(p["patientId"]) if PATIENT_HISTORY is not None and p["patientId"] is not None else None
+        for p in patients
+    ]
+    all_options = symptom_options_batch([p["symptoms"] for p in patients], [p["age"] for p in patients],
+                                        [history_adjustments(h) if h else None for h in histories], formularies)
+    return [complete_assessment(patient, options, history)
+            for patient, options, history in zip(patients, all_options, histories)]
+
+def complete_assessment(patient, options, history=None):
+    """Safety checks, age-specific evidence and the JSON response for triaged options"""
+    symptoms = patient["symptoms"]
+    age = patient["age"]
     
     # Get severity analysis from the first option (they all have the same analysis)
     severity_info = options[0]["severity_analysis"] if options else classify_symptom_severity(symptoms)
@@ -977,6 +1109,13 @@ def assess():
                     {"title": "Adult treatment guidelines", "date": "2025-09-10", 
                      "snippet": "Standard adult dosing and monitoring recommended."}
                 ]
+    # Duplicated or interacting medicines across options; each involved option shows the warning too
+    interactions = interaction_flags(options, formulary_of(patient))
+    for flag in interactions:
+        for opt in options:
+            if opt["id"] in flag["options"]:
+                opt.setdefault("safety_flags", []).append(f"{' + '.join(flag['drugs'])}: {flag['message']}")
+
     # Determine triage level based on severity
     triage_level = "primary_care"
     if severity_info["case_severity"] == "severe":
@@ -992,19 +1131,281 @@ def assess():
             "urgency": severity_info["urgency"],
             "recommendation": severity_info["recommendation"],
             "symptom_breakdown": severity_info["symptom_breakdown"],
+            "normalized_symptoms": severity_info["normalized_symptoms"],
             "total_symptoms": severity_info["total_symptoms"]
         },
         "triage": triage_level,
+        "formulary": patient["formulary"],
         "differential": ["viral pharyngitis", "streptococcal pharyngitis (consider if Centor criteria met)"],
         "options": options,
+        "interaction_flags": interactions,
         "note": "This system recommends only Over-the-Counter (OTC) medicines. For prescription medications or severe conditions, consult a licensed healthcare provider. This is clinical decision support only.",
         "medicine_policy": "Only Over-the-Counter medicines are recommended by this system",
         "requires_clinician_signoff": True
     }
+    if history is not None:
+        response["history"] = {
+            "patient_id": history.patient_id,
+            "chronic_conditions": list(history.chronic_conditions),
+            "recent_assessments": len(history.recent),
+            "adjusted_clusters": severity_info.get("history_adjustments", {})
+        }
+
+    return {"patient": patient, "options": options, "response": response}
+
+# Computed assessments kept for PDF/JSON downloads by id, on any node when the cache is shared
+if SHARED_CACHE is None:
+    ASSESSMENT_CACHE = None
+elif CACHE_NEAR_TTL > 0:
+    ASSESSMENT_CACHE = TieredCache(LocalCache(max_items=1000), SHARED_CACHE, near_ttl=CACHE_NEAR_TTL)
+else:
+    ASSESSMENT_CACHE = SHARED_CACHE
+ASSESSMENTS = AssessmentStore(max_items=1000, ttl_seconds=3600, backend=ASSESSMENT_CACHE)
+
+# Every stored assessment is also written to a database in the background
+# (ASSESSMENT_DB is the SQLite file; set it empty to turn persistence off)
+ASSESSMENT_DB_PATH = os.environ.get("ASSESSMENT_DB", os.path.join(DATA_DIR, "assessments.db"))
+ASSESSMENT_DB = AssessmentDatabase(sqlite_connector(ASSESSMENT_DB_PATH)) if ASSESSMENT_DB_PATH else None
+if ASSESSMENT_DB is not None:
+    atexit.register(ASSESSMENT_DB.close)
+
+def load_patient_history(patient_id):
+    """PatientHistory from the database: chronic conditions and the last RECENT_DAYS of assessments"""
+    since = db_datetime(datetime.datetime.utcnow() - datetime.timedelta(days=RECENT_DAYS))
+    conditions, recent = ASSESSMENT_DB.patient_history(patient_id, since, limit=PATIENT_HISTORY_RECENT)
+    return PatientHistory(patient_id, tuple(conditions),
+                          tuple((r["id"], r["assessed_at"], tuple(o["id"] for o in r["options"])) for r in recent))
+
+# Histories of recently seen patients, so a returning patient's triage doesn't query the database
+PATIENT_HISTORY_RECENT = 20
+PATIENT_HISTORY = (PatientHistoryCache(load_patient_history, max_patients=10000, max_recent=PATIENT_HISTORY_RECENT)
+                   if ASSESSMENT_DB is not None else None)
+
+def store_assessment(assessment):
+    """Keep an assessment for downloads and queue it for the database; returns its id.
+    The response gets its assessment_id / assessment_expires_in before it is stored."""
+    assessment_id = ASSESSMENTS.new_id()
+    assessment["response"]["assessment_id"] = assessment_id
+    assessment["response"]["assessment_expires_in"] = ASSESSMENTS.ttl_seconds
+    ASSESSMENTS.put(assessment, assessment_id)
+    if ASSESSMENT_DB is not None:
+        ASSESSMENT_DB.record(assessment_id, assessment)
+        patient_id = assessment["patient"].get("patientId")
+        if patient_id is not None:
+            PATIENT_HISTORY.record_assessment(patient_id, assessment_id,
+                                              db_datetime(assessment["response"]["timestamp"]),
+                                              [opt["id"] for opt in assessment["options"]])
+    return assessment_id
+
+def cache_stats():
+    """Counters of the assessment store and PDF cache tiers (GET /cache/stats)"""
+    return {
+        "shared": SHARED_CACHE.stats() if SHARED_CACHE is not None else None,
+        "assessments": ASSESSMENTS.backend.stats(),
+        "pdf": dict(PDF_CACHE.stats)
+    }
+
+def persistence_stats():
+    """Database writer counters (written, pending, dropped, failed, batches) and history cache counters"""
+    if ASSESSMENT_DB is None:
+        return {"enabled": False}
+    return dict(ASSESSMENT_DB.stats(), history_cache=PATIENT_HISTORY.stats())
+
+def add_patient_condition(patient_id, data):
+    """(JSON body, status) for POST /patients/<id>/conditions: a medical_history row
+    ({"condition_name", "is_chronic", "diagnosed_date", "description"})"""
+    if ASSESSMENT_DB is None:
+        return {"error": "Assessment persistence is disabled"}, 503
+    condition_name = str(data.get("condition_name") or "").strip()
+    if not condition_name:
+        return {"error": "condition_name is required"}, 400
+    is_chronic = bool(data.get("is_chronic", False))
+    condition_id = ASSESSMENT_DB.add_condition(patient_id, condition_name, is_chronic,
+                                               data.get("diagnosed_date"), data.get("description"))
+    PATIENT_HISTORY.record_condition(patient_id, condition_name, is_chronic)
+    return {"id": condition_id, "patient_id": patient_id, "condition_name": condition_name,
+            "is_chronic": is_chronic}, 201
+
+def patient_history_view(patient_id):
+    """(JSON body, status) for GET /patients/<id>/history: the cached history and its adjustments"""
+    if PATIENT_HISTORY is None:
+        return {"error": "Assessment persistence is disabled"}, 503
+    history = PATIENT_HISTORY.get(patient_id)
+    return {
+        "patient_id": patient_id,
+        "chronic_conditions": list(history.chronic_conditions),
+        "recent_assessments": [{"id": assessment_id, "assessed_at": assessed_at, "options": list(option_ids)}
+                               for assessment_id, assessed_at, option_ids in history.recent],
+        "threshold_adjustments": history_adjustments(history)
+    }, 200
+
+def assessment_history(params):
+    """(JSON body, status) for GET /assessments: ?patient_id= or ?patient_name=,
+    ?from= / ?to= (dates, inclusive, or ISO times) and ?limit="""
+    if ASSESSMENT_DB is None:
+        return {"error": "Assessment persistence is disabled"}, 503
+    try:
+        patient_id = int(params["patient_id"]) if params.get("patient_id") else None
+        start = date_bound(params["from"]) if params.get("from") else None
+        end = date_bound(params["to"], end=True) if params.get("to") else None
+        limit = max(min(int(params.get("limit", 50)), 500), 1)
+    except ValueError as e:
+        return {"error": f"Invalid query parameter: {e}"}, 400
+    results = ASSESSMENT_DB.query(patient_id, params.get("patient_name") or None, start, end, limit)
+    return {"count": len(results), "results": results}, 200
+
+# Concurrency budget and wait queue per expensive route class (ADMISSION_<CLASS>_<KEY> overrides);
+# requests beyond them are shed with 503 + Retry-After instead of queueing indefinitely
+ADMISSION_LIMITS = limits_from_env({
+    "triage": {"concurrency": 16, "queue": 64, "max_wait": 2.0},
+    "pdf": {"concurrency": 4, "queue": 16, "max_wait": 5.0},
+    "batch": {"concurrency": 1, "queue": 2, "max_wait": 1.0},
+})
+ADMISSION = AdmissionController(ADMISSION_LIMITS)
+
+def route_class(req):
+    """Admission class of a request, or None for cheap routes"""
+    if req.endpoint == "assess":
+        return "pdf" if req.args.get("format") == "pdf" else "triage"
+    if req.endpoint == "assessment_pdf":
+        return "pdf"
+    if req.endpoint == "start_batch_export":
+        return "batch"
+    return None
+
+def overloaded_response(exc):
+    response = jsonify({
+        "error": "Server busy, please retry later",
+        "route_class": exc.route_class,
+        "reason": exc.reason,
+        "retry_after": exc.retry_after
+    })
+    response.status_code = 503
+    response.headers["Retry-After"] = str(exc.retry_after)
+    return response
+
+@app.before_request
+def admit_request():
+    cls = route_class(request)
+    if cls is None:
+        return None
+    try:
+        g.admission = (cls, ADMISSION.acquire(cls))
+    except Overloaded as e:
+        return overloaded_response(e)
+
+@app.teardown_request
+def release_request(exc):
+    admitted = g.pop("admission", None)
+    if admitted is not None:
+        ADMISSION.release(*admitted)
+
+@app.route("/admission/stats", methods=["GET"])
+def admission_stats():
+    """Per route class: budget, running/waiting, admitted and shed counts, queue wait percentiles"""
+    return jsonify(ADMISSION.stats())
+
+@app.route("/health", methods=["GET"])
+def health():
+    return jsonify({"status":"ok","timestamp": datetime.datetime.utcnow().isoformat() + "Z"})
+
+# Warm-up inputs: together they reach every severity level and the common option rules
+WARMUP_SYMPTOMS = [
+    "fever, headache, cough, sore throat",
+    "sneezing, runny nose, itchy eyes, nasal congestion",
+    "nausea, vomiting, stomach pain",
+    "skin rash, itching, fungal infection",
+    "difficulty breathing, chest pain, high fever",
+    "head ache, sore throught",
+]
+WARMUP_PATIENT = {"patientName": "Warm Up", "age": 30, "sex": "Female", "weight": 60, "height": 1.65,
+                  "symptoms": WARMUP_SYMPTOMS[0]}
+
+def warm_rule_matchers():
+    """Fill the normalizer cache with the picker's keywords and triage the sample inputs"""
+    for group in AVAILABLE_SYMPTOMS.values():
+        for item in group:
+            for keyword in item["keywords"]:
+                SYMPTOM_NORMALIZER.normalize(keyword)
+    assess_patients([dict(WARMUP_PATIENT, age=age, symptoms=symptoms)
+                     for symptoms in WARMUP_SYMPTOMS for age in (5, 30, 70)])
+
+def warm_pdf():
+    """Render a throwaway prescription (not cached) to load fonts, styles and the renderer code"""
+    assessment = assess_patient(WARMUP_PATIENT)
+    for renderer in {PDF_RENDERER, "flowable"}:  # flowable is also the canvas fallback
+        generate_prescription_pdf(assessment["patient"], assessment["options"], renderer=renderer)
+
+def warm_caches():
+    """Load the most recently used cached PDFs into the memory tier"""
+    PDF_CACHE.preload()
+
+WARMUP_STEPS = [("rule_matchers", warm_rule_matchers), ("pdf", warm_pdf), ("caches", warm_caches)]
+
+@app.route("/ready", methods=["GET"])
+def ready():
+    """Readiness, unlike /health: 200 only once every warm-up phase has finished.
+    Reports each phase's status and duration_ms either way (503 while warming up or failed)."""
+    status = WARMUP.status()
+    return jsonify(status), 200 if status["ready"] else 503
+
+@app.route("/assess", methods=["POST", "GET"])
+def assess():
+    if request.method == "GET" and request.args.get('format') == 'pdf':
+        # Handle PDF generation from GET request
+        try:
+            data = json.loads(request.args.get('data', '{}'))
+            age = data.get("age")
+            if age is not None:
+                age = float(age)
+            
+            formulary = select_formulary(data, request.headers.get("X-Tenant-ID"))
+            patient = {
+                "formulary": formulary.name,
+                "patientName": data.get("patientName", ""),  # Get name from the patientName field
+                "age": age,
+                "sex": data.get("sex"),
+                "weight": data.get("weight"),
+                "height": data.get("height"),  # Add height for BMI calculation
+                "symptoms": data.get("symptomTexts", data.get("symptoms", ""))  # Get full symptom texts or fallback to keywords
+            }
+            
+            options = simple_symptom_to_options(data.get("symptoms", ""), age, formulary)
+            
+            # Get severity analysis from the first option or create new one
+            severity_info = options[0]["severity_analysis"] if options else classify_symptom_severity(data.get("symptoms", ""))
+            
+            for opt in options:
+                opt["safety_flags"] = run_safety_checks(opt, patient)
+                if age is not None:
+                    age_group = get_age_group(age)
+                    opt["age_group"] = age_group
+            
+            pdf_buffer = prescription_pdf(patient, options)
+            # Create filename with patient name
+            patient_name = patient.get("patientName", "").strip().replace(" ", "_")
+            filename = f'prescription_{patient_name}_{datetime.datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf' if patient_name else f'prescription_{datetime.datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf'
+            return send_file(
+                pdf_buffer,
+                download_name=filename,
+                mimetype='application/pdf'
+            )
+        except UnknownFormulary:
+            raise
+        except Exception as e:
+            return jsonify({"error": str(e)}), 500
+
+    # Handle regular POST request
+    assessment = assess_patient(request.json or {}, request.headers.get("X-Tenant-ID"))
+    patient, options, response = assessment["patient"], assessment["options"], assessment["response"]
+
+    # Keep the computed result so downloads can reference it instead of resending the payload
+    # (store_assessment adds assessment_id and assessment_expires_in to the response)
+    store_assessment(assessment)
 
     # Check if PDF is requested
     if request.args.get('format') == 'pdf':
-        pdf_buffer = generate_prescription_pdf(patient, options)
+        pdf_buffer = prescription_pdf(patient, options)
         # Create filename with patient name
         patient_name = patient.get("patientName", "").strip().replace(" ", "_")
         filename = f'Prescription_{patient_name}_{datetime.datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf' if patient_name else f'prescription_{datetime.datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf'
@@ -1016,6 +1417,129 @@ def assess():
     
     return jsonify(response)
 
+@app.route("/assessments", methods=["GET"])
+def list_assessments():
+    """Recorded assessments, newest first (see assessment_history for the filters)"""
+    body, status = assessment_history(request.args)
+    return jsonify(body), status
+
+@app.route("/assessments/stats", methods=["GET"])
+def assessment_db_stats():
+    return jsonify(persistence_stats())
+
+@app.route("/cache/stats", methods=["GET"])
+def cache_stats_view():
+    return jsonify(cache_stats())
+
+@app.route("/patients/<int:patient_id>/conditions", methods=["POST"])
+def patient_conditions(patient_id):
+    body, status = add_patient_condition(patient_id, request.get_json(silent=True) or {})
+    return jsonify(body), status
+
+@app.route("/patients/<int:patient_id>/history", methods=["GET"])
+def patient_history(patient_id):
+    body, status = patient_history_view(patient_id)
+    return jsonify(body), status
+
+@app.route("/assessments/<assessment_id>/json", methods=["GET"])
+def assessment_json(assessment_id):
+    stored = ASSESSMENTS.get(assessment_id)
+    if stored is None:
+        return jsonify({"error": "Assessment not found or expired"}), 404
+    return jsonify(stored["response"])
+
+@app.route("/assessments/<assessment_id>/pdf", methods=["GET"])
+def assessment_pdf(assessment_id):
+    stored = ASSESSMENTS.get(assessment_id)
+    if stored is None:
+        return jsonify({"error": "Assessment not found or expired"}), 404
+
+    # Rendered from the stored result; nothing is re-triaged
+    patient = stored["patient"]
+    pdf_buffer = prescription_pdf(patient, stored["options"])
+    patient_name = patient.get("patientName", "").strip().replace(" ", "_")
+    filename = f'prescription_{patient_name}_{datetime.datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf' if patient_name else f'prescription_{datetime.datetime.now().strftime("%Y%m%d_%H%M%S")}.pdf'
+    return send_file(
+        pdf_buffer,
+        download_name=filename,
+        mimetype='application/pdf'
+    )
+
+# Batch prescription exports (camp days): rendered across a process pool into temp files
+MAX_BATCH_SIZE = 1000
+MAX_PENDING_EXPORTS = 4
+EXPORT_JOBS = ExportJobs(
+    os.environ.get("BATCH_EXPORT_DIR", os.path.join(DATA_DIR, "batch_exports")),
+    content=prescription_content,
+    renderer=PDF_RENDERER,
+    max_jobs=20,
+    ttl_seconds=3600,
+    workers=int(os.environ["BATCH_EXPORT_WORKERS"]) if os.environ.get("BATCH_EXPORT_WORKERS") else None
+)
+
+def export_status(job):
+    return dict(job, status_url=f"/batch-exports/{job['id']}", download_url=f"/batch-exports/{job['id']}/download")
+
+@app.route("/batch-exports", methods=["POST"])
+def start_batch_export():
+    """Render stored assessments and/or new patient payloads as one PDF or a ZIP"""
+    data = request.json or {}
+    fmt = data.get("format", "zip")
+    if fmt not in EXPORT_FORMATS:
+        return jsonify({"error": f"format must be one of {list(EXPORT_FORMATS)}"}), 400
+
+    assessment_ids = data.get("assessment_ids", [])
+    patients = data.get("patients", [])
+    if not assessment_ids and not patients:
+        return jsonify({"error": "Provide assessment_ids and/or patients"}), 400
+    if len(assessment_ids) + len(patients) > MAX_BATCH_SIZE:
+        return jsonify({"error": f"At most {MAX_BATCH_SIZE} patients per export"}), 400
+    if EXPORT_JOBS.pending() >= MAX_PENDING_EXPORTS:
+        return overloaded_response(ADMISSION.shed("batch", "exports_pending"))
+
+    items = []
+    missing = []
+    for assessment_id in assessment_ids:
+        stored = ASSESSMENTS.get(assessment_id)
+        if stored is None:
+            missing.append(assessment_id)
+        else:
+            items.append((stored["patient"], stored["options"]))
+    if missing:
+        return jsonify({"error": "Assessment not found or expired", "missing": missing}), 404
+    for assessment in assess_patients(patients, request.headers.get("X-Tenant-ID")):
+        items.append((assessment["patient"], assessment["options"]))
+
+    job_id = EXPORT_JOBS.start(items, fmt)
+    return jsonify(export_status(EXPORT_JOBS.get(job_id))), 202
+
+@app.route("/batch-exports/<job_id>", methods=["GET"])
+def batch_export_status(job_id):
+    job = EXPORT_JOBS.get(job_id)
+    if job is None:
+        return jsonify({"error": "Export not found or expired"}), 404
+    return jsonify(export_status(job))
+
+@app.route("/batch-exports/<job_id>/download", methods=["GET"])
+def batch_export_download(job_id):
+    job = EXPORT_JOBS.get(job_id)
+    if job is None:
+        return jsonify({"error": "Export not found or expired"}), 404
+    path = EXPORT_JOBS.path(job_id)
+    if path is None:
+        return jsonify(dict(export_status(job), error="Export not finished")), 409
+    filename = f'prescriptions_{datetime.datetime.now().strftime("%Y%m%d_%H%M%S")}.{job["format"]}'
+    return send_file(
+        path,
+        download_name=filename,
+        mimetype='application/pdf' if job["format"] == "pdf" else 'application/zip'
+    )
+
+# Warm up in the background of the serving process; worker processes that import this
+# module (batch export, ASGI PDF rendering) skip it, as does WARMUP=0
+if os.environ.get("WARMUP", "1") != "0" and multiprocessing.parent_process() is None:
+    WARMUP.start(WARMUP_STEPS)
+
 if __name__ == "__main__":
     # Development server (do not use in production)
     app.run(host="0.0.0.0", port=5000, debug=True)
@@ -0,0 +1,388 @@
+# asgi_app.py -- ASGI variant of app.py's routes (requires starlette; serve with uvicorn)
+# Routing and request I/O run on the event loop. Triage runs in a bounded thread
+# pool and PDF rendering in a bounded process pool, so slow PDF builds never hold
+# up cheap routes like /health or /symptoms. Expensive route classes go through
+# the same admission budgets as app.py: queued on the loop without taking a
+# worker, and shed with 503 + Retry-After once the queue is full.
+#
+#   uvicorn asgi_app:app --host 0.0.0.0 --port 5000 --no-access-log
+#
+# (each request is logged as a structured "request" event; uvicorn's access log
+# would add query strings, which for the legacy PDF URL contain patient data)
+#
+# The catalog, assessment store, PDF cache and export jobs are app.py's own objects.
+import asyncio
+import contextvars
+import datetime
+import functools
+import json
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+
+from starlette.applications import Starlette
+from starlette.middleware import Middleware
+from starlette.responses import FileResponse, JSONResponse, Response
+from starlette.routing import Route
+
+import app as cds
+from admission import AsyncAdmissionController, Overloaded
+from structured_logging import get_logger, log_event, new_correlation_id
+
+log = get_logger("asgi")
+
+TRIAGE_THREADS = int(os.environ.get("ASGI_TRIAGE_THREADS", 4))
+PDF_WORKERS = int(os.environ.get("ASGI_PDF_WORKERS", os.cpu_count() or 1))
+
+TRIAGE_EXECUTOR = ThreadPoolExecutor(max_workers=TRIAGE_THREADS, thread_name_prefix="triage")
+# Spawned rather than forked: the server process already runs threads
+PDF_EXECUTOR = ProcessPoolExecutor(max_workers=PDF_WORKERS, mp_context=multiprocessing.get_context("spawn"))
+# Light routes (health, symptoms, catalog) are not admission-controlled
+ADMISSION = AsyncAdmissionController(cds.ADMISSION_LIMITS)
+# Not ready until the PDF workers are warm as well as app.py's own warm-up
+cds.WARMUP.expect("pdf_workers")
+
+
+def render_pdf(patient, options):
+    """Process-pool worker: PDF bytes for an assessment (imports app.py once per worker)"""
+    return cds.generate_prescription_pdf(patient, options).getvalue()
+
+
+def warm_worker():
+    """Process-pool worker: load app.py (by importing this module) and render a throwaway PDF"""
+    cds.warm_pdf()
+    return os.getpid()
+
+
+async def run_triage(func, *args):
+    # Copy the context so log records from the worker thread keep the correlation id
+    call = functools.partial(contextvars.copy_context().run, func, *args)
+    return await asyncio.get_running_loop().run_in_executor(TRIAGE_EXECUTOR, call)
+
+
+def load_assessments(assessment_ids):
+    """Stored assessments by id, None where unknown or expired (may call the shared cache)"""
+    return [cds.ASSESSMENTS.get(assessment_id) for assessment_id in assessment_ids]
+
+
+async def prescription_pdf(patient, options):
+    """app.prescription_pdf with the cache checked here and misses rendered in PDF_EXECUTOR"""
+    key = cds.pdf_cache_key(patient, options)
+    data = await run_triage(cds.PDF_CACHE.get, key)
+    if data is None:
+        loop = asyncio.get_running_loop()
+        data = await loop.run_in_executor(PDF_EXECUTOR, render_pdf, patient, options)
+        await run_triage(cds.PDF_CACHE.put, key, data)
+    return data
+
+
+def overloaded_response(exc):
+    return JSONResponse({
+        "error": "Server busy, please retry later",
+        "route_class": exc.route_class,
+        "reason": exc.reason,
+        "retry_after": exc.retry_after
+    }, status_code=503, headers={"Retry-After": str(exc.retry_after)})
+
+
+def limited(route_class):
+    """Run a handler under its route class's admission budget"""
+    def wrap(handler):
+        async def run(request):
+            try:
+                admitted_at = await ADMISSION.acquire(route_class)
+            except Overloaded as e:
+                return overloaded_response(e)
+            try:
+                return await handler(request)
+            finally:
+                ADMISSION.release(route_class, admitted_at)
+        return run
+    return wrap
+
+
+def error(message, status_code, **extra):
+    return JSONResponse(dict(extra, error=message), status_code=status_code)
+
+
+def pdf_response(data, patient, prefix="prescription"):
+    patient_name = patient.get("patientName", "").strip().replace(" ", "_")
+    stamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+    filename = f"{prefix}_{patient_name}_{stamp}.pdf" if patient_name else f"prescription_{stamp}.pdf"
+    return Response(data, media_type="application/pdf",
+                    headers={"Content-Disposition": f'inline; filename="{filename}"'})
+
+
+async def read_json(request):
+    try:
+        return await request.json() or {}
+    except ValueError:
+        return {}
+
+
+def query_value(params, name, type_, default=None):
+    """params.get(name) converted like werkzeug's get(type=...): bad values give default"""
+    try:
+        return type_(params[name])
+    except (KeyError, ValueError):
+        return default
+
+
+async def index(request):
+    return FileResponse(os.path.join(cds.BASE_DIR, "index.html"))
+
+
+async def health(request):
+    return JSONResponse({"status": "ok", "timestamp": datetime.datetime.utcnow().isoformat() + "Z"})
+
+
+async def ready(request):
+    status = cds.WARMUP.status()
+    return JSONResponse(status, status_code=200 if status["ready"] else 503)
+
+
+async def symptoms(request):
+    return JSONResponse(cds.AVAILABLE_SYMPTOMS)
+
+
+async def medicines(request):
+    params = request.query_params
+    criteria = {field: params.getlist(field) for field in cds.CATEGORICAL_COLUMNS}
+    min_strength = query_value(params, "min_strength", float)
+    max_strength = query_value(params, "max_strength", float)
+    limit = max(min(query_value(params, "limit", int, 50), 500), 0)
+    offset = max(query_value(params, "offset", int, 0), 0)
+    # A formulary's first use loads its CSV, so selecting one stays off the event loop
+    catalog = (await run_triage(cds.select_formulary, params, request.headers.get("X-Tenant-ID"))).catalog
+
+    matches = catalog.filter(criteria, min_strength=min_strength, max_strength=max_strength)
+    return JSONResponse({
+        "total": matches.bit_count(),
+        "offset": offset,
+        "limit": limit,
+        "results": catalog.records(matches, offset=offset, limit=limit)
+    })
+
+
+async def admission_stats(request):
+    return JSONResponse(ADMISSION.stats())
+
+
+async def list_assessments(request):
+    loop = asyncio.get_running_loop()
+    body, status = await loop.run_in_executor(TRIAGE_EXECUTOR, cds.assessment_history, request.query_params)
+    return JSONResponse(body, status_code=status)
+
+
+async def assessment_db_stats(request):
+    return JSONResponse(cds.persistence_stats())
+
+
+async def patient_conditions(request):
+    data = await read_json(request)
+    loop = asyncio.get_running_loop()
+    body, status = await loop.run_in_executor(TRIAGE_EXECUTOR, cds.add_patient_condition,
+                                              request.path_params["patient_id"], data)
+    return JSONResponse(body, status_code=status)
+
+
+async def patient_history(request):
+    loop = asyncio.get_running_loop()
+    body, status = await loop.run_in_executor(TRIAGE_EXECUTOR, cds.patient_history_view,
+                                              request.path_params["patient_id"])
+    return JSONResponse(body, status_code=status)
+
+
+async def cache_stats(request):
+    return JSONResponse(cds.cache_stats())
+
+
+async def memory_usage(request):
+    loop = asyncio.get_running_loop()
+    return JSONResponse(await loop.run_in_executor(TRIAGE_EXECUTOR, cds.memory_usage_report))
+
+
+async def catalog_stats(request):
+    formulary = await run_triage(cds.select_formulary, request.query_params, request.headers.get("X-Tenant-ID"))
+    return JSONResponse(cds.catalog_summary(formulary))
+
+
+async def unknown_formulary(request, exc):
+    return error(str(exc), 400, formularies=cds.FORMULARIES.names())
+
+
+@limited("triage")
+async def assess_json(request):
+    assessment = await run_triage(cds.assess_patient, await read_json(request), request.headers.get("X-Tenant-ID"))
+    await run_triage(cds.store_assessment, assessment)
+    return JSONResponse(assessment["response"])
+
+
+@limited("pdf")
+async def assess_pdf(request):
+    if request.method == "GET":
+        # Legacy ?format=pdf&data=<json> download; the PDF does not depend on what is stored
+        try:
+            data = json.loads(request.query_params.get("data", "{}"))
+            assessment = await run_triage(cds.assess_patient, data, request.headers.get("X-Tenant-ID"))
+            pdf = await prescription_pdf(assessment["patient"], assessment["options"])
+        except cds.UnknownFormulary:
+            raise
+        except Exception as e:
+            return error(str(e), 500)
+        return pdf_response(pdf, assessment["patient"])
+
+    assessment = await run_triage(cds.assess_patient, await read_json(request), request.headers.get("X-Tenant-ID"))
+    await run_triage(cds.store_assessment, assessment)
+    pdf = await prescription_pdf(assessment["patient"], assessment["options"])
+    return pdf_response(pdf, assessment["patient"], prefix="Prescription")
+
+
+async def assess(request):
+    if request.query_params.get("format") == "pdf":
+        return await assess_pdf(request)
+    if request.method == "GET":
+        return error("Use POST, or GET with format=pdf", 405)
+    return await assess_json(request)
+
+
+async def assessment_json(request):
+    stored = await run_triage(cds.ASSESSMENTS.get, request.path_params["assessment_id"])
+    if stored is None:
+        return error("Assessment not found or expired", 404)
+    return JSONResponse(stored["response"])
+
+
+@limited("pdf")
+async def assessment_pdf(request):
+    stored = await run_triage(cds.ASSESSMENTS.get, request.path_params["assessment_id"])
+    if stored is None:
+        return error("Assessment not found or expired", 404)
+    pdf = await prescription_pdf(stored["patient"], stored["options"])
+    return pdf_response(pdf, stored["patient"])
+
+
+@limited("batch")
+async def start_batch_export(request):
+    data = await read_json(request)
+    fmt = data.get("format", "zip")
+    if fmt not in cds.EXPORT_FORMATS:
+        return error(f"format must be one of {list(cds.EXPORT_FORMATS)}", 400)
+
+    assessment_ids = data.get("assessment_ids", [])
+    patients = data.get("patients", [])
+    if not assessment_ids and not patients:
+        return error("Provide assessment_ids and/or patients", 400)
+    if len(assessment_ids) + len(patients) > cds.MAX_BATCH_SIZE:
+        return error(f"At most {cds.MAX_BATCH_SIZE} patients per export", 400)
+    if cds.EXPORT_JOBS.pending() >= cds.MAX_PENDING_EXPORTS:
+        return overloaded_response(ADMISSION.shed("batch", "exports_pending"))
+
+    items = []
+    missing = []
+    for assessment_id, stored in zip(assessment_ids, await run_triage(load_assessments, assessment_ids)):
+        if stored is None:
+            missing.append(assessment_id)
+        else:
+            items.append((stored["patient"], stored["options"]))
+    if missing:
+        return error("Assessment not found or expired", 404, missing=missing)
+    for assessment in await run_triage(cds.assess_patients, patients, request.headers.get("X-Tenant-ID")):
+        items.append((assessment["patient"], assessment["options"]))
+
+    job_id = cds.EXPORT_JOBS.start(items, fmt)
+    return JSONResponse(cds.export_status(cds.EXPORT_JOBS.get(job_id)), status_code=202)
+
+
+async def batch_export_status(request):
+    job = cds.EXPORT_JOBS.get(request.path_params["job_id"])
+    if job is None:
+        return error("Export not found or expired", 404)
+    return JSONResponse(cds.export_status(job))
+
+
+async def batch_export_download(request):
+    job_id = request.path_params["job_id"]
+    job = cds.EXPORT_JOBS.get(job_id)
+    if job is None:
+        return error("Export not found or expired", 404)
+    path = cds.EXPORT_JOBS.path(job_id)
+    if path is None:
+        return JSONResponse(dict(cds.export_status(job), error="Export not finished"), status_code=409)
+    filename = f'prescriptions_{datetime.datetime.now().strftime("%Y%m%d_%H%M%S")}.{job["format"]}'
+    return FileResponse(path, filename=filename, content_disposition_type="inline",
+                        media_type="application/pdf" if job["format"] == "pdf" else "application/zip")
+
+
+class RequestLogMiddleware:
+    """Correlation id per request (X-Request-ID in and out) and a structured "request" event"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = dict(scope["headers"])
+        incoming = headers.get(b"x-request-id", b"").decode("latin-1")
+        cid = new_correlation_id(incoming)
+        started = time.perf_counter()
+        status = {}
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-request-id", cid.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_id)
+        except Exception as e:
+            log.error("request.failed", exc_info=e, extra={"fields": {"path": scope["path"], "error": str(e)}})
+            raise
+        finally:
+            log_event(log, logging.INFO, "request", method=scope["method"], path=scope["path"],
+                      status=status.get("code", 500),
+                      duration_ms=round((time.perf_counter() - started) * 1000, 2))
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Start the PDF workers (each imports app.py) before the first request needs one
+    loop = asyncio.get_running_loop()
+    with cds.WARMUP.phase("pdf_workers"):
+        await asyncio.gather(*(loop.run_in_executor(PDF_EXECUTOR, warm_worker) for _ in range(PDF_WORKERS)))
+    yield
+    PDF_EXECUTOR.shutdown(cancel_futures=True)
+    TRIAGE_EXECUTOR.shutdown(cancel_futures=True)
+
+
+app = Starlette(
+    routes=[
+        Route("/", index),
+        Route("/health", health),
+        Route("/ready", ready),
+        Route("/symptoms", symptoms),
+        Route("/medicines", medicines),
+        Route("/catalog/stats", catalog_stats),
+        Route("/debug/memory", memory_usage),
+        Route("/cache/stats", cache_stats),
+        Route("/admission/stats", admission_stats),
+        Route("/assess", assess, methods=["GET", "POST"]),
+        Route("/assessments", list_assessments),
+        Route("/assessments/stats", assessment_db_stats),
+        Route("/assessments/{assessment_id}/json", assessment_json),
+        Route("/assessments/{assessment_id}/pdf", assessment_pdf),
+        Route("/patients/{patient_id:int}/conditions", patient_conditions, methods=["POST"]),
+        Route("/patients/{patient_id:int}/history", patient_history),
+        Route("/batch-exports", start_batch_export, methods=["POST"]),
+        Route("/batch-exports/{job_id}", batch_export_status),
+        Route("/batch-exports/{job_id}/download", batch_export_download),
+    ],
+    middleware=[Middleware(RequestLogMiddleware)],
+    exception_handlers={cds.UnknownFormulary: unknown_formulary},
+    lifespan=lifespan,
+)
@@ -0,0 +1,326 @@
+# assessment_db.py -- Persistent record of every assessment, written in the background
+# record() only puts the assessment on a bounded queue; one writer thread drains it
+# in batches (one transaction per batch) through a small connection pool, so a
+# request never waits on a disk commit. SQLite is the local backend; the SQL is
+# the subset MariaDB also accepts (see assessment_schema.sql), with the driver's
+# placeholder passed in.
+import datetime
+import json
+import logging
+import os
+import queue
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+from structured_logging import get_logger, log_event
+
+log = get_logger("assessment_db")
+
+SCHEMA_PATH = os.path.join(os.path.dirname(__file__), "assessment_schema.sql")
+ASSESSMENT_COLUMNS = ["id", "patient_id", "patient_name", "age", "sex", "symptoms", "case_severity",
+                      "severity_score", "triage", "assessed_at", "response_json"]
+OPTION_COLUMNS = ["assessment_id", "position", "option_id", "option_type", "title", "drug_id"]
+SUMMARY_COLUMNS = ASSESSMENT_COLUMNS[:-1]
+
+
+def sqlite_connector(path):
+    """connect() for a SQLite file shared by threads (WAL, so reads don't block the writer).
+
+    A new file is created readable by this user only, in a directory created
+    the same way; SQLite gives its -wal and -shm files the same permissions.
+    """
+    def connect():
+        if path != ":memory:" and not os.path.exists(path):
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, mode=0o700, exist_ok=True)
+            os.close(os.open(path, os.O_CREAT | os.O_WRONLY, 0o600))
+        conn = sqlite3.connect(path, timeout=10, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+    return connect
+
+
+def db_datetime(value):
+    """'YYYY-MM-DD HH:MM:SS' (UTC) of an ISO timestamp or datetime, as stored in assessed_at"""
+    if isinstance(value, str):
+        value = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    if value.tzinfo is not None:
+        value = value.astimezone(datetime.timezone.utc).replace(tzinfo=None)
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+
+def date_bound(text, end=False):
+    """assessed_at bound of a query parameter: a date (an end date includes the whole
+    day) or an ISO timestamp; ValueError when it is neither"""
+    if len(text) == 10:
+        day = datetime.date.fromisoformat(text)
+        if end:
+            day += datetime.timedelta(days=1)
+        return f"{day.isoformat()} 00:00:00"
+    return db_datetime(text)
+
+
+class ConnectionPool:
+    """Up to size connections from connect(), reused across callers.
+
+    Connections are opened on demand; a caller that finds all of them busy
+    waits up to timeout seconds for one to be returned.
+    """
+
+    def __init__(self, connect, size=4, timeout=5.0):
+        self.connect = connect
+        self.size = size
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.idle = queue.LifoQueue()
+        self.opened = 0
+
+    def _acquire(self):
+        try:
+            return self.idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self.lock:
+            if self.opened < self.size:
+                self.opened += 1
+                try:
+                    return self.connect()
+                except Exception:
+                    self.opened -= 1
+                    raise
+        try:
+            return self.idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise TimeoutError(f"no database connection free within {self.timeout}s") from None
+
+    @contextmanager
+    def connection(self):
+        """A pooled connection; uncommitted work is rolled back if the block raises"""
+        conn = self._acquire()
+        try:
+            yield conn
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self.idle.put(conn)
+
+    def close(self):
+        """Close the idle connections (call once no caller holds one)"""
+        while True:
+            try:
+                self.idle.get_nowait().close()
+            except queue.Empty:
+                break
+            with self.lock:
+                self.opened -= 1
+
+
+class AssessmentDatabase:
+    """Assessments and their options, written in batches by a background thread.
+
+    At most max_pending assessments wait in memory; beyond that record() drops
+    the assessment (counted in stats) rather than block the request. The writer
+    commits when batch_size are waiting or flush_interval seconds after the
+    first of a batch arrived. The schema is created on first use.
+    """
+
+    def __init__(self, connect, pool_size=4, batch_size=100, flush_interval=0.2, max_pending=10000,
+                 placeholder="?"):
+        self.pool = ConnectionPool(connect, pool_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.placeholder = placeholder
+        self.pending = queue.Queue(maxsize=max_pending)
+        self.lock = threading.Lock()
+        self.writer = None
+        self.schema_lock = threading.Lock()
+        self.schema_ready = False
+        self.stats_counts = {"written": 0, "dropped": 0, "failed": 0, "batches": 0}
+
+    def _values(self, count):
+        return ", ".join([self.placeholder] * count)
+
+    def _ensure_schema(self, conn):
+        """Create the tables of assessment_schema.sql that are missing, with their indexes"""
+        if self.schema_ready:
+            return
+        with self.schema_lock:
+            if not self.schema_ready:
+                self._create_schema(conn)
+                self.schema_ready = True
+
+    def _create_schema(self, conn):
+        # IF NOT EXISTS throughout also covers another process creating the schema at the same time
+        with open(SCHEMA_PATH) as f:
+            ddl = "\n".join(line for line in f if not line.lstrip().startswith("--"))
+        statements = [s.strip() for s in ddl.split(";") if s.strip()]
+        cursor = conn.cursor()
+        missing = set()
+        for statement in statements:
+            table = re.match(r"CREATE TABLE IF NOT EXISTS (\w+)", statement)
+            if table:
+                try:
+                    cursor.execute(f"SELECT 1 FROM {table.group(1)} WHERE 1 = 0")
+                except Exception:
+                    conn.rollback()
+                    missing.add(table.group(1))
+        for statement in statements:
+            table = re.match(r"CREATE (?:TABLE|INDEX) IF NOT EXISTS (?:\w+ ON )?(\w+)", statement)
+            if table and table.group(1) in missing:
+                cursor.execute(statement)
+        conn.commit()
+
+    def _start_writer(self):
+        with self.lock:
+            if self.writer is None:
+                self.writer = threading.Thread(target=self._run, name="assessment-db-writer", daemon=True)
+                self.writer.start()
+
+    def record(self, assessment_id, assessment):
+        """Queue an assessment (app.py's {"patient", "options", "response"}) for writing"""
+        if self.writer is None:
+            self._start_writer()
+        try:
+            self.pending.put_nowait((assessment_id, assessment))
+        except queue.Full:
+            with self.lock:
+                self.stats_counts["dropped"] += 1
+            log_event(log, logging.WARNING, "assessment_db.dropped", pending=self.pending.qsize())
+
+    def _rows(self, assessment_id, assessment):
+        patient, response = assessment["patient"], assessment["response"]
+        severity = response["severity_classification"]
+        row = (assessment_id, patient.get("patientId"), (patient.get("patientName") or "").strip() or None,
+               patient.get("age"), patient.get("sex"), patient.get("symptoms") or "",
+               severity["case_severity"], severity["severity_score"], response["triage"],
+               db_datetime(response["timestamp"]), json.dumps(response, default=str))
+        options = [(assessment_id, position, opt["id"], opt.get("type"), opt.get("title"),
+                    (opt.get("drugs") or [None])[0])
+                   for position, opt in enumerate(assessment["options"])]
+        return row, options
+
+    def _write(self, batch):
+        started = time.perf_counter()
+        try:
+            rows, options = [], []
+            for assessment_id, assessment in batch:
+                row, opts = self._rows(assessment_id, assessment)
+                rows.append(row)
+                options.extend(opts)
+            with self.pool.connection() as conn:
+                self._ensure_schema(conn)
+                cursor = conn.cursor()
+                cursor.executemany(f"INSERT INTO assessments ({', '.join(ASSESSMENT_COLUMNS)}) "
+                                   f"VALUES ({self._values(len(ASSESSMENT_COLUMNS))})", rows)
+                cursor.executemany(f"INSERT INTO assessment_options ({', '.join(OPTION_COLUMNS)}) "
+                                   f"VALUES ({self._values(len(OPTION_COLUMNS))})", options)
+                conn.commit()
+        except Exception as e:
+            with self.lock:
+                self.stats_counts["failed"] += len(batch)
+            log.error("assessment_db.write_failed", exc_info=e, extra={"fields": {"assessments": len(batch)}})
+            return
+        with self.lock:
+            self.stats_counts["written"] += len(batch)
+            self.stats_counts["batches"] += 1
+        log_event(log, logging.DEBUG, "assessment_db.batch", assessments=len(batch),
+                  duration_ms=round((time.perf_counter() - started) * 1000, 2))
+
+    def _run(self):
+        while True:
+            batch, markers = [], []
+            item = self.pending.get()
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                if isinstance(item, threading.Event):
+                    markers.append(item)
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self.pending.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+            for marker in markers:
+                marker.set()
+
+    def flush(self, timeout=10.0):
+        """Wait until everything recorded so far is written; False on timeout"""
+        if self.writer is None:
+            return True
+        marker = threading.Event()
+        self.pending.put(marker)
+        return marker.wait(timeout)
+
+    def close(self):
+        """Write what is still queued and close the pooled connections"""
+        self.flush()
+        self.pool.close()
+
+    def stats(self):
+        with self.lock:
+            return dict(self.stats_counts, pending=self.pending.qsize())
+
+    def query(self, patient_id=None, patient_name=None, start=None, end=None, limit=50):
+        """Recorded assessments, newest first, with their options: optionally one patient's
+        (by id or exact name) and assessed in [start, end) (db_datetime strings)"""
+        where, params = [], []
+        for column, op, value in (("patient_id", "=", patient_id), ("patient_name", "=", patient_name),
+                                  ("assessed_at", ">=", start), ("assessed_at", "<", end)):
+            if value is not None:
+                where.append(f"{column} {op} {self.placeholder}")
+                params.append(value)
+        sql = (f"SELECT {', '.join(SUMMARY_COLUMNS)} FROM assessments"
+               + (f" WHERE {' AND '.join(where)}" if where else "")
+               + f" ORDER BY assessed_at DESC, id LIMIT {int(limit)}")
+        with self.pool.connection() as conn:
+            self._ensure_schema(conn)
+            cursor = conn.cursor()
+            cursor.execute(sql, params)
+            results = [dict(zip(SUMMARY_COLUMNS, row)) for row in cursor.fetchall()]
+            options = []
+            if results:
+                cursor.execute(f"SELECT {', '.join(OPTION_COLUMNS)} FROM assessment_options "
+                               f"WHERE assessment_id IN ({self._values(len(results))}) "
+                               f"ORDER BY assessment_id, position", [r["id"] for r in results])
+                options = cursor.fetchall()
+            conn.rollback()
+        by_id = {r["id"]: r for r in results}
+        for r in results:
+            r["options"] = []
+        for assessment_id, _, option_id, option_type, title, drug_id in options:
+            by_id[assessment_id]["options"].append(
+                {"id": option_id, "type": option_type, "title": title, "drug": drug_id})
+        return results
+
+    def add_condition(self, patient_id, condition_name, is_chronic=False, diagnosed_date=None, description=None):
+        """Insert a medical_history row (synchronously; conditions are rare writes)"""
+        with self.pool.connection() as conn:
+            self._ensure_schema(conn)
+            cursor = conn.cursor()
+            cursor.execute("INSERT INTO medical_history (patient_id, condition_name, diagnosed_date, description, "
+                           f"is_chronic) VALUES ({self._values(5)})",
+                           (patient_id, condition_name, diagnosed_date, description, bool(is_chronic)))
+            conn.commit()
+            return cursor.lastrowid
+
+    def patient_history(self, patient_id, since, limit=20):
+        """(chronic condition names, query() rows of assessments since then) for a patient"""
+        with self.pool.connection() as conn:
+            self._ensure_schema(conn)
+            cursor = conn.cursor()
+            cursor.execute("SELECT condition_name FROM medical_history "
+                           f"WHERE patient_id = {self.placeholder} AND is_chronic = {self.placeholder} ORDER BY id",
+                           (patient_id, True))
+            conditions = [name for name, in cursor.fetchall()]
+            conn.rollback()
+        return conditions, self.query(patient_id=patient_id, start=since, limit=limit)
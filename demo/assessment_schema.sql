@@ -0,0 +1,48 @@
+-- assessment_schema.sql -- Assessments recorded by the CDS demo (assessment_db.py)
+-- Plain DDL that runs unchanged on SQLite (the local backend) and on MariaDB next to
+-- database/schema.sql (MySQL 8 has no CREATE INDEX IF NOT EXISTS; drop the clause
+-- there). Times are UTC. patient_id is patients.id when the caller
+-- supplied one; assessments of unregistered patients are found by name.
+-- medical_history is only created where database/schema.sql has not created it
+-- already: the same columns, with a SQLite rowid id and no patients foreign key.
+
+CREATE TABLE IF NOT EXISTS assessments (
+    id VARCHAR(32) PRIMARY KEY,
+    patient_id INT NULL,
+    patient_name VARCHAR(255) NULL,
+    age DECIMAL(5,1) NULL,
+    sex VARCHAR(16) NULL,
+    symptoms TEXT NOT NULL,
+    case_severity VARCHAR(32) NOT NULL,
+    severity_score DECIMAL(6,2) NOT NULL,
+    triage VARCHAR(32) NOT NULL,
+    assessed_at DATETIME NOT NULL,
+    response_json TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_assessments_patient ON assessments(patient_id, assessed_at);
+CREATE INDEX IF NOT EXISTS idx_assessments_patient_name ON assessments(patient_name, assessed_at);
+CREATE INDEX IF NOT EXISTS idx_assessments_date ON assessments(assessed_at);
+
+CREATE TABLE IF NOT EXISTS assessment_options (
+    assessment_id VARCHAR(32) NOT NULL,
+    position INT NOT NULL,
+    option_id VARCHAR(64) NOT NULL,
+    option_type VARCHAR(32) NULL,
+    title VARCHAR(255) NULL,
+    drug_id VARCHAR(255) NULL,
+    PRIMARY KEY (assessment_id, position),
+    FOREIGN KEY (assessment_id) REFERENCES assessments(id) ON DELETE CASCADE
+);
+
+CREATE TABLE IF NOT EXISTS medical_history (
+    id INTEGER PRIMARY KEY,
+    patient_id INT NOT NULL,
+    condition_name VARCHAR(255) NOT NULL,
+    diagnosed_date DATE NULL,
+    description TEXT NULL,
+    is_chronic BOOLEAN DEFAULT FALSE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE INDEX IF NOT EXISTS idx_medical_history_patient ON medical_history(patient_id, is_chronic);
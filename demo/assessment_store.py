@@ -0,0 +1,41 @@
+# assessment_store.py -- Bounded, expiring store of computed assessments
+# POST /assess saves its result here so PDF/JSON downloads can reference it by id
+# instead of re-sending (and re-triaging) the whole patient payload. Entries live
+# in a cache_backend: in-process by default, or a cache shared by every node (with
+# a near cache in front) so a download may land on a different node than the POST.
+import secrets
+import time
+
+from cache_backend import LocalCache
+
+
+class AssessmentStore:
+    """Assessments by random id with a fixed time-to-live.
+
+    Without a backend the assessments are kept in this process, at most
+    max_items, the least recently used dropped first. A stored assessment
+    must not be changed afterwards: a shared backend holds a copy.
+    """
+
+    def __init__(self, max_items=1000, ttl_seconds=3600, clock=time.monotonic, backend=None):
+        self.max_items = max_items
+        self.ttl_seconds = ttl_seconds
+        self.backend = backend if backend is not None else LocalCache(max_items=max_items, clock=clock)
+
+    @staticmethod
+    def new_id():
+        return secrets.token_urlsafe(16)
+
+    def put(self, assessment, assessment_id=None):
+        """Store an assessment (under a new id unless one is given) and return its id"""
+        assessment_id = assessment_id or self.new_id()
+        self.backend.set(f"assessment:{assessment_id}", assessment, self.ttl_seconds)
+        return assessment_id
+
+    def get(self, assessment_id):
+        """Stored assessment, or None if unknown or expired"""
+        return self.backend.get(f"assessment:{assessment_id}")
+
+    def __len__(self):
+        """Live assessments (in-process backends only)"""
+        return len(self.backend)
@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+# batch_export.py -- Render many prescriptions at once across a process pool
+# Output is one multi-page PDF (each patient starts on a new page) or a ZIP of
+# individual PDFs, written to a temporary file as results arrive. Workers only
+# lay out content blocks (prescription_render); they never import the app.
+#
+# CLI:  python batch_export.py patients.jsonl -o camp_day.zip [--workers N]
+#       (one POST /assess body per line; .pdf output gives the combined document)
+import argparse
+import json
+import os
+import secrets
+import shutil
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor
+
+from pdf_merge import PdfConcatenator
+from prescription_render import render_file, render_pdf
+
+FORMATS = ("pdf", "zip")
+# Patients per worker task when the combined PDF is rendered in runs and merged
+PAGES_PER_TASK = 25
+# Tasks submitted per worker ahead of the one being written out
+TASKS_AHEAD = 2
+
+
+def export_filename(index, patient):
+    """Name of a patient's PDF inside the ZIP, numbered in batch order"""
+    name = str(patient.get("patientName", "")).strip().replace(" ", "_")
+    return f"{index:03d}_prescription_{name}.pdf" if name else f"{index:03d}_prescription.pdf"
+
+
+def _in_order(pool, func, tasks, window):
+    """func(*task) results in task order, with at most window tasks in flight"""
+    pending = deque()
+    for task in tasks:
+        pending.append(pool.submit(func, *task))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+def export_batch(items, output, fmt="zip", workers=None, progress=None, *, content, renderer="flowable"):
+    """Render (patient, options) pairs to the file path output.
+
+    content(patient, options) gives a patient's prescription blocks; it runs
+    here, and only the blocks go to the workers (prescription_render), so
+    they never load the app. Tasks are submitted a few per worker ahead of
+    the output, keeping memory flat however large the batch.
+    fmt "zip" writes each PDF into the archive as soon as it is rendered.
+    fmt "pdf" renders runs of PAGES_PER_TASK patients to part files next to
+    output and streams them into it (pdf_merge) as they finish.
+    progress(done, total) is called as patients finish.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown export format: {fmt}")
+    items = list(items)
+    total = len(items)
+    report = progress or (lambda done, total: None)
+    report(0, total)
+    workers = workers or os.cpu_count() or 1
+    window = workers * TASKS_AHEAD
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        if fmt == "zip":
+            tasks = ((content(patient, options), renderer) for patient, options in items)
+            with zipfile.ZipFile(output, "w", zipfile.ZIP_DEFLATED) as archive:
+                rendered = _in_order(pool, render_pdf, tasks, window)
+                for done, ((patient, _), data) in enumerate(zip(items, rendered), 1):
+                    archive.writestr(export_filename(done, patient), data)
+                    report(done, total)
+            return total
+
+        runs = [items[i:i + PAGES_PER_TASK] for i in range(0, total, PAGES_PER_TASK)]
+        if len(runs) <= 1:
+            pool.submit(render_file, output, [content(p, o) for p, o in items], renderer).result()
+            report(total, total)
+            return total
+
+        parts = tempfile.mkdtemp(prefix="parts_", dir=os.path.dirname(os.path.abspath(output)))
+        try:
+            tasks = ((os.path.join(parts, f"{n:05d}.pdf"), [content(p, o) for p, o in run], renderer)
+                     for n, run in enumerate(runs))
+            with open(output, "wb") as f:
+                merged = PdfConcatenator(f)
+                done = 0
+                for run, path in zip(runs, _in_order(pool, render_file, tasks, window)):
+                    merged.append(path)
+                    os.remove(path)
+                    done += len(run)
+                    report(done, total)
+                merged.close()
+        finally:
+            shutil.rmtree(parts, ignore_errors=True)
+    return total
+
+
+class ExportJobs:
+    """Batch exports running in the background, tracked by random id.
+
+    Exports run one at a time (each already uses every worker in its pool);
+    later ones wait in the "queued" state. Finished jobs keep their output
+    file for ttl_seconds; the file is deleted when the job is dropped.
+    content and renderer are passed on to export_batch.
+    """
+
+    def __init__(self, directory, content, renderer="flowable", max_jobs=20, ttl_seconds=3600, workers=None,
+                 clock=time.monotonic):
+        self.directory = directory
+        self.content = content
+        self.renderer = renderer
+        self.max_jobs = max_jobs
+        self.ttl_seconds = ttl_seconds
+        self.workers = workers
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.slot = threading.Semaphore(1)
+        self.jobs = OrderedDict()  # id -> job dict
+        os.makedirs(directory, mode=0o700, exist_ok=True)  # exports carry patient names
+
+    def _drop(self, job_id):
+        job = self.jobs.pop(job_id)
+        if job["path"] and os.path.exists(job["path"]):
+            os.remove(job["path"])
+
+    def _purge(self, now):
+        finished = [job_id for job_id, job in self.jobs.items() if job["state"] in ("done", "failed")]
+        for job_id in finished:
+            if self.jobs[job_id]["expires_at"] <= now:
+                self._drop(job_id)
+        finished = [job_id for job_id in finished if job_id in self.jobs]
+        while len(self.jobs) >= self.max_jobs and finished:
+            self._drop(finished.pop(0))
+
+    def start(self, items, fmt):
+        """Queue an export of (patient, options) pairs and return its id"""
+        job_id = secrets.token_urlsafe(12)
+        fd, path = tempfile.mkstemp(suffix=f".{fmt}", prefix="batch_", dir=self.directory)
+        os.close(fd)
+        job = {"id": job_id, "format": fmt, "state": "queued", "done": 0, "total": len(items),
+               "error": None, "path": path, "expires_at": None}
+        with self.lock:
+            self._purge(self.clock())
+            self.jobs[job_id] = job
+        threading.Thread(target=self._run, args=(job, items), daemon=True).start()
+        return job_id
+
+    def _run(self, job, items):
+        def progress(done, total):
+            job["done"] = done
+
+        with self.slot:
+            job["state"] = "running"
+            started = time.perf_counter()
+            try:
+                export_batch(items, job["path"], job["format"], self.workers, progress,
+                             content=self.content, renderer=self.renderer)
+                job["state"] = "done"
+            except Exception as e:
+                job["state"] = "failed"
+                job["error"] = str(e)
+            job["seconds"] = round(time.perf_counter() - started, 3)
+        with self.lock:
+            job["expires_at"] = self.clock() + self.ttl_seconds
+
+    def get(self, job_id):
+        """Public status of a job, or None if unknown or expired"""
+        with self.lock:
+            self._purge(self.clock())
+            job = self.jobs.get(job_id)
+            if job is None:
+                return None
+            return {k: v for k, v in job.items() if k not in ("path", "expires_at")}
+
+    def pending(self):
+        """Number of exports queued or running"""
+        with self.lock:
+            return sum(job["state"] in ("queued", "running") for job in self.jobs.values())
+
+    def path(self, job_id):
+        """Output file of a finished job, or None"""
+        with self.lock:
+            job = self.jobs.get(job_id)
+            return job["path"] if job is not None and job["state"] == "done" else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render prescriptions for many patients")
+    parser.add_argument("patients", help="JSONL file, one POST /assess body per line")
+    parser.add_argument("-o", "--output", required=True, help="output .pdf or .zip")
+    parser.add_argument("--format", choices=FORMATS, help="default: from the output extension")
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: CPU count)")
+    args = parser.parse_args()
+
+    fmt = args.format or os.path.splitext(args.output)[1].lstrip(".").lower()
+    if fmt not in FORMATS:
+        parser.error("output must end in .pdf or .zip, or pass --format")
+
+    import app
+    with open(args.patients) as f:
+        payloads = [json.loads(line) for line in f if line.strip()]
+    items = [(assessment["patient"], assessment["options"]) for assessment in app.assess_patients(payloads)]
+
+    def progress(done, total):
+        print(f"\rRendered {done}/{total} prescriptions", end="", file=sys.stderr, flush=True)
+
+    started = time.perf_counter()
+    # Spool next to the destination and move into place only once complete
+    fd, tmp = tempfile.mkstemp(suffix=f".{fmt}", dir=os.path.dirname(os.path.abspath(args.output)))
+    os.close(fd)
+    try:
+        export_batch(items, tmp, fmt, args.workers, progress,
+                     content=app.prescription_content, renderer=app.PDF_RENDERER)
+        os.replace(tmp, args.output)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    print(f"\nWrote {args.output} ({os.path.getsize(args.output):,} bytes) in "
+          f"{time.perf_counter() - started:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
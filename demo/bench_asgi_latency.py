@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+Benchmark: tail latency under mixed traffic, WSGI (Flask threaded server) vs ASGI (uvicorn)
+Each server is started in a subprocess. PDF clients post unique /assess?format=pdf requests
+(every one a cache miss) while light clients poll /health and /symptoms; latency percentiles
+are reported per request class. Requires starlette and uvicorn for the ASGI side.
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import requests
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+SERVERS = {
+    "wsgi": [sys.executable, "-c", "import sys, app; app.app.run(port=int(sys.argv[1]), threaded=True)"],
+    "asgi": [sys.executable, "-m", "uvicorn", "asgi_app:app", "--log-level", "warning", "--port"],
+}
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+def start_server(kind, cache_dir):
+    port = free_port()
+    # Benchmark patients stay out of the assessment database
+    env = dict(os.environ, PDF_CACHE_DIR=cache_dir, ASSESSMENT_DB="")
+    proc = subprocess.Popen(SERVERS[kind] + [str(port)], cwd=BASE_DIR, env=env,
+                            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    base_url = f"http://127.0.0.1:{port}"
+    # Wait for /ready, not /health: start-up work (the ASGI PDF workers) is not measured
+    for _ in range(240):
+        try:
+            if requests.get(f"{base_url}/ready", timeout=1).status_code == 200:
+                return proc, base_url
+        except requests.exceptions.ConnectionError:
+            pass
+        time.sleep(0.25)
+    proc.kill()
+    raise RuntimeError(f"{kind} server did not start")
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(int(len(values) * p), len(values) - 1)] if values else float("nan")
+
+def run_load(base_url, seconds, pdf_clients, light_clients):
+    """Latencies (seconds) per request class during seconds of mixed traffic"""
+    results = {"pdf": [], "light": []}
+    errors = {"pdf": 0, "light": 0}
+    stop = time.perf_counter() + seconds
+    lock = threading.Lock()
+
+    def pdf_client(n):
+        session = requests.Session()
+        i = 0
+        while time.perf_counter() < stop:
+            i += 1
+            payload = {"patientName": f"Load {n}-{i}", "age": 20 + i % 60, "sex": "Female",
+                       "weight": 60, "height": 1.65, "symptoms": "fever, headache, cough, sore throat"}
+            started = time.perf_counter()
+            response = session.post(f"{base_url}/assess?format=pdf", json=payload)
+            elapsed = time.perf_counter() - started
+            with lock:
+                results["pdf"].append(elapsed)
+                errors["pdf"] += response.status_code != 200
+
+    def light_client(n):
+        session = requests.Session()
+        paths = ["/health", "/symptoms"]
+        i = 0
+        while time.perf_counter() < stop:
+            started = time.perf_counter()
+            response = session.get(f"{base_url}{paths[i % 2]}")
+            elapsed = time.perf_counter() - started
+            i += 1
+            with lock:
+                results["light"].append(elapsed)
+                errors["light"] += response.status_code != 200
+            time.sleep(0.02)
+
+    threads = [threading.Thread(target=pdf_client, args=(n,)) for n in range(pdf_clients)]
+    threads += [threading.Thread(target=light_client, args=(n,)) for n in range(light_clients)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, errors
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=15)
+    parser.add_argument("--pdf-clients", type=int, default=8)
+    parser.add_argument("--light-clients", type=int, default=4)
+    args = parser.parse_args()
+
+    print("="*60)
+    print("ASGI vs WSGI TAIL LATENCY BENCHMARK")
+    print("="*60)
+    print(f"{args.seconds:.0f}s per server, {args.pdf_clients} PDF clients, {args.light_clients} light clients\n")
+    print(f"{'server':<6} {'class':<6} {'requests':>8} {'errors':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+
+    for kind in ("wsgi", "asgi"):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            proc, base_url = start_server(kind, cache_dir)
+            try:
+                results, errors = run_load(base_url, args.seconds, args.pdf_clients, args.light_clients)
+            finally:
+                proc.terminate()
+                proc.wait()
+        for cls in ("light", "pdf"):
+            lat = results[cls]
+            print(f"{kind:<6} {cls:<6} {len(lat):8d} {errors[cls]:6d} "
+                  f"{percentile(lat, 0.50) * 1000:8.1f} {percentile(lat, 0.95) * 1000:8.1f} "
+                  f"{percentile(lat, 0.99) * 1000:8.1f} {max(lat, default=float('nan')) * 1000:8.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Benchmark: catalog build, memory and request latency as the formulary grows
+Synthesizes main_data.csv-schema catalogs (50k, 500k and 5M rows by default) with the
+same distinct values and value frequencies per column as main_data.csv, starts one
+worker process per size with CATALOG_CSV pointing at it, and reports catalog build
+time, the worker's resident memory, /medicines lookup, top-k ranking lookup and
+/assess latency. Exits 1 when any metric grows faster than its complexity budget.
+"""
+
+import argparse
+import contextlib
+import gc
+import io
+import json
+import math
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from catalog import CATEGORICAL_COLUMNS
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SOURCE_CSV = os.path.join(BASE_DIR, "main_data.csv")
+DEFAULT_SIZES = "50000,500000,5000000"
+
+# Largest allowed growth exponent k (metric ~ rows ** k) between consecutive sizes
+COMPLEXITY_BUDGET = {
+    "build_s": 1.2,      # one pass per column, plus the n log n strength sort
+    "rss_mb": 1.1,       # per-row storage only; nothing quadratic held
+    "lookup_ms": 1.0,    # slowest query: bitmap AND and page scan over rows / 64 words
+    # Size-independent by design; 0.3 leaves room for cache misses on a larger heap
+    "topk_us": 0.3,      # rankings precomputed per bucket
+    "assess_ms": 0.3,    # rule medicines resolved at load
+}
+
+LOOKUPS = [
+    "/medicines?category=analgesic&dosage_form=tablet&limit=50",
+    "/medicines?indication=pain&indication=fever&min_strength=100&max_strength=500&limit=50",
+    "/medicines?manufacturer=pfizer%20inc.&classification=over-the-counter&offset=200&limit=50",
+]
+TOPK_BUCKETS = [("analgesic", "pain"), ("antipyretic", "fever"), ("antiseptic", None)]
+
+
+def synthesize(rows, path, seed=0):
+    """Write a rows-long CSV whose columns draw main_data.csv's values at their observed frequencies"""
+    source = pd.read_csv(SOURCE_CSV)
+    rng = np.random.default_rng(seed)
+    columns = {}
+    for col in source.columns:
+        counts = source[col].value_counts(sort=False)
+        values = np.array(counts.index.tolist(), dtype=object)
+        columns[col] = values[rng.choice(len(values), size=rows, p=counts.to_numpy() / counts.sum())]
+    pd.DataFrame(columns).to_csv(path, index=False)
+
+
+def memory_kb():
+    """(resident, peak resident) kB of this process"""
+    status = {}
+    with open("/proc/self/status") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            status[key] = value.split()
+    return int(status["VmRSS"][0]), int(status["VmHWM"][0])
+
+
+def median_ms(call, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        call()
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings)
+
+
+def worker(repeat):
+    """Load the app against CATALOG_CSV and print one JSON line of measurements"""
+    started = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app
+    load_s = time.perf_counter() - started
+    gc.collect()
+    rss_kb, peak_kb = memory_kb()
+    phases = app.WARMUP.status()["phases"]
+    client = app.app.test_client()
+
+    lookup = []
+    for url in LOOKUPS:
+        assert client.get(url).status_code == 200
+        lookup.append(median_ms(lambda: client.get(url), repeat))
+
+    topk = []
+    for category, indication in TOPK_BUCKETS:
+        for age_group in ("child", "adult"):
+            topk.append(median_ms(lambda: app.ranked_medicines(category, indication, age_group), repeat * 10) * 1000)
+
+    from workload import WorkloadGenerator
+    payloads = list(WorkloadGenerator(seed=1).generate(repeat))
+    for payload in payloads[:5]:
+        assert client.post("/assess", json=payload).status_code == 200
+    timings = []
+    for payload in payloads:
+        started = time.perf_counter()
+        client.post("/assess", json=payload)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    stats = client.get("/catalog/stats").get_json()
+    print(json.dumps({
+        "rows": app.CATALOG.size,
+        "otc": len(app.MEDS),
+        "distinct": stats["distinct_values"],
+        "load_s": load_s,
+        "build_s": sum(phases[name]["duration_ms"] for name in ("catalog", "medicines", "treatment_rules")) / 1000,
+        "phases_ms": {name: phase["duration_ms"] for name, phase in phases.items()},
+        "rss_mb": rss_kb / 1024,
+        "peak_mb": peak_kb / 1024,
+        "lookup_ms": max(lookup),
+        "topk_us": statistics.median(topk),
+        "assess_ms": statistics.median(timings),
+        "assess_p95_ms": statistics.quantiles(timings, n=20)[-1],
+    }))
+
+
+def measure(path, repeat):
+    """Run worker() in a fresh process, so every size starts from an empty heap"""
+    # ASSESSMENT_DB="" keeps the synthetic /assess traffic out of the assessment database
+    env = dict(os.environ, CATALOG_CSV=path, WARMUP="0", LOG_LEVEL="WARNING", ASSESSMENT_DB="")
+    result = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker", "--repeat", str(repeat)],
+                            env=env, cwd=BASE_DIR, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"worker for {path} failed:\n{result.stderr}")
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def growth(results):
+    """[(metric, from rows, to rows, exponent, budget)] between consecutive sizes"""
+    checks = []
+    for before, after in zip(results, results[1:]):
+        scale = math.log(after["rows"] / before["rows"])
+        for metric, budget in COMPLEXITY_BUDGET.items():
+            exponent = math.log(after[metric] / before[metric]) / scale
+            checks.append((metric, before["rows"], after["rows"], exponent, budget))
+    return checks
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help=f"comma-separated row counts (default {DEFAULT_SIZES})")
+    parser.add_argument("--repeat", type=int, default=50, help="requests timed per lookup / /assess")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workdir", help="where synthetic catalogs are written and reused (default: a temp dir)")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        worker(args.repeat)
+        return 0
+
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+    workdir = args.workdir or tempfile.mkdtemp(prefix="catalog_scaling_")
+    os.makedirs(workdir, exist_ok=True)
+    source = pd.read_csv(SOURCE_CSV)
+
+    print("="*60)
+    print("CATALOG SCALING BENCHMARK")
+    print("="*60)
+
+    results = []
+    failed = False
+    for rows in sizes:
+        path = os.path.join(workdir, f"catalog_{rows}_{args.seed}.csv")
+        if not os.path.exists(path):
+            started = time.perf_counter()
+            synthesize(rows, path, args.seed)
+            print(f"Synthesized {rows:,} rows in {time.perf_counter() - started:.1f}s -> {path}")
+        result = measure(path, args.repeat)
+        changed = sorted(col for field, col in CATEGORICAL_COLUMNS.items()
+                         if result["distinct"][field] != source[col].nunique())
+        if changed:
+            failed = True
+            print(f"  ❌ {rows:,} rows: distinct values differ from main_data.csv in {changed}")
+        results.append(result)
+
+    print(f"\n{'rows':>10} {'otc':>10} {'build s':>8} {'rss MB':>8} {'peak MB':>8} "
+          f"{'lookup ms':>10} {'topk us':>8} {'assess ms':>10} {'p95 ms':>8}")
+    for r in results:
+        print(f"{r['rows']:>10,} {r['otc']:>10,} {r['build_s']:8.2f} {r['rss_mb']:8.0f} {r['peak_mb']:8.0f} "
+              f"{r['lookup_ms']:10.2f} {r['topk_us']:8.2f} {r['assess_ms']:10.2f} {r['assess_p95_ms']:8.2f}")
+    for r in results:
+        print(f"  {r['rows']:>10,} rows phases (ms): " + ", ".join(f"{k} {v}" for k, v in r["phases_ms"].items()))
+
+    print("\nGrowth exponent k (metric ~ rows ** k) against the complexity budget:")
+    for metric, low, high, exponent, budget in growth(results):
+        ok = exponent <= budget
+        failed |= not ok
+        print(f"  {'✅' if ok else '❌'} {metric:<10} {low:>10,} -> {high:<10,} k = {exponent:5.2f} (budget {budget})")
+    print("\nWithin budget" if not failed else "\n❌ Growth exceeds the complexity budget")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
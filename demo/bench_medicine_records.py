@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-row dict entries (old MEDS layout) vs immutable Medicine records
+Reports memory held by the MEDS list and attribute access time for both layouts.
+"""
+
+import timeit
+import tracemalloc
+import pandas as pd
+from catalog import Catalog, build_medicines
+from dispensing import build_dispensing_profiles
+
+def build_dict_meds(df):
+    """The MEDS layout app.py used before Medicine records"""
+    meds = []
+    for _, row in df.iterrows():
+        if row['Classification'].lower() == 'over-the-counter':
+            meds.append({
+                "id": row['Name'].lower().replace(' ', '_'),
+                "name": row['Name'],
+                "category": row['Category'],
+                "dosage_form": row['Dosage Form'],
+                "strength": row['Strength'],
+                "manufacturer": row['Manufacturer'],
+                "indication": row['Indication'],
+                "classification": row['Classification'],
+                "contraindications": [],
+                "age_groups": {
+                    "adult": {
+                        "dose": f"{row['Strength']} {row['Dosage Form'].lower()}",
+                        "min_age": 18,
+                        "max_age": 64
+                    },
+                    "elderly": {
+                        "dose": f"Reduced dose: {row['Strength']} {row['Dosage Form'].lower()}",
+                        "min_age": 65,
+                        "max_age": 999,
+                        "notes": "Consider dose adjustment for elderly patients"
+                    }
+                }
+            })
+    return meds
+
+def build_record_meds(catalog):
+    """The MEDS layout app.py builds now"""
+    profiles = build_dispensing_profiles(
+        (c, f) for c in catalog.dictionaries["category"] for f in catalog.dictionaries["dosage_form"]
+    )
+    return build_medicines(catalog, profiles, "over-the-counter")
+
+def traced(build, *args):
+    """Result of build(*args) and the bytes still allocated by it afterwards"""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    result = build(*args)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, after - before
+
+def main():
+    df = pd.read_csv('main_data.csv')
+    catalog = Catalog(df)
+
+    dict_meds, dict_bytes = traced(build_dict_meds, df)
+    record_meds, record_bytes = traced(build_record_meds, catalog)
+
+    print("="*60)
+    print("MEDICINE RECORD BENCHMARK")
+    print("="*60)
+    print(f"OTC medicines: {len(record_meds):,}")
+    print(f"\nMemory held by MEDS:")
+    print(f"  dict entries:     {dict_bytes / 1024 / 1024:8.2f} MiB ({dict_bytes / len(dict_meds):.0f} B/medicine)")
+    print(f"  Medicine records: {record_bytes / 1024 / 1024:8.2f} MiB ({record_bytes / len(record_meds):.0f} B/medicine)")
+    print(f"  saved:            {(dict_bytes - record_bytes) / 1024 / 1024:8.2f} MiB")
+
+    # Field access as done by run_safety_checks / generate_prescription_pdf
+    def dict_access():
+        for med in dict_meds:
+            med["name"], med["strength"], med["dosage_form"], med["age_groups"]["adult"]["dose"]
+
+    def record_access():
+        for med in record_meds:
+            med.name, med.strength, med.dosage_form, med.dispensing.age_groups["adult"]
+
+    runs = 20
+    dict_time = timeit.timeit(dict_access, number=runs) / runs
+    record_time = timeit.timeit(record_access, number=runs) / runs
+    print(f"\nAttribute access over all medicines (mean of {runs} runs):")
+    print(f"  dict entries:     {dict_time * 1000:8.2f} ms")
+    print(f"  Medicine records: {record_time * 1000:8.2f} ms")
+    print(f"  speedup:          {dict_time / record_time:8.2f}x")
+
+    print(f"\nSample record: {record_meds[0].to_dict()}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark: platypus flowable renderer vs direct-canvas renderer for prescriptions
+Reports render latency (content built once, so only layout/drawing is timed), output
+size and page count, and checks both renderers place the same text on each page.
+"""
+
+import contextlib
+import io
+import statistics
+import time
+import app
+
+try:
+    from pypdf import PdfReader
+except ImportError:
+    PdfReader = None
+
+PATIENTS = [
+    {"patientName": "Ann Lee", "age": 34, "sex": "Female", "weight": 60, "height": 1.65, "symptoms": "fever, headache, body aches, sore throat"},
+    {"patientName": "Bo Chen", "age": 6, "sex": "Male", "weight": 20, "height": 1.1, "symptoms": "cough, runny nose, diarrhea"},
+    {"patientName": "Cy Ortiz", "age": 80, "sex": "Male", "weight": 72, "height": 1.7, "symptoms": "chest pain, shortness of breath, dizziness, rash, itching"},
+    {"patientName": "Dee Park", "age": 40, "sex": "Female", "symptoms": ""},
+    {"patientName": "Fay Brown", "age": 50, "sex": "Female", "weight": 90, "height": 1.6, "symptoms": "back pain, joint pain, acne, heartburn, constipation, allergies, insomnia"},
+]
+
+def render(contents, renderer):
+    buffer = io.BytesIO()
+    used = app.render_prescriptions(buffer, [contents], renderer)
+    return buffer.getvalue(), used
+
+def page_lines(data):
+    """{(page, baseline y): text} as a PDF reader sees it"""
+    lines = {}
+    for page_no, page in enumerate(PdfReader(io.BytesIO(data)).pages):
+        def visit(text, cm, tm, font, size):
+            if text.strip():
+                lines.setdefault((page_no, round(tm[5] + cm[5], 1)), []).append(text.strip())
+        page.extract_text(visitor_text=visit)
+    return {key: " ".join(parts) for key, parts in lines.items()}
+
+def main():
+    with contextlib.redirect_stdout(io.StringIO()):
+        contents = []
+        for patient in PATIENTS:
+            assessment = app.assess_patient(patient)
+            contents.append(app.prescription_content(assessment["patient"], assessment["options"]))
+
+    runs = 50
+    print("="*60)
+    print("PDF RENDERER BENCHMARK")
+    print("="*60)
+    print(f"{len(PATIENTS)} patients, {runs} renders each\n")
+    print(f"{'renderer':<10} {'median ms':>10} {'p95 ms':>8} {'bytes':>8}")
+
+    outputs = {}
+    for renderer in ("flowable", "canvas"):
+        times = []
+        for blocks in contents:
+            for _ in range(runs):
+                started = time.perf_counter()
+                data, used = render(blocks, renderer)
+                times.append(time.perf_counter() - started)
+            outputs.setdefault(renderer, []).append((data, used))
+        times.sort()
+        size = statistics.mean(len(data) for data, _ in outputs[renderer])
+        print(f"{renderer:<10} {statistics.median(times) * 1000:10.2f} "
+              f"{times[int(len(times) * 0.95)] * 1000:8.2f} {size:8.0f}")
+
+    fallbacks = sum(used != "canvas" for _, used in outputs["canvas"])
+    print(f"\nCanvas fallbacks to flowables: {fallbacks}/{len(PATIENTS)}")
+
+    if PdfReader is None:
+        print("Install pypdf to compare the text layout of both renderers")
+        return
+    print("\nText layout comparison (same text at the same baseline on each page):")
+    for patient, (flow, _), (canv, _) in zip(PATIENTS, outputs["flowable"], outputs["canvas"]):
+        a, b = page_lines(flow), page_lines(canv)
+        pages = (len(PdfReader(io.BytesIO(flow)).pages), len(PdfReader(io.BytesIO(canv)).pages))
+        status = "MATCH" if a == b else f"MISMATCH ({len(set(a.items()) ^ set(b.items()))} lines differ)"
+        print(f"  {patient['patientName']:<10} pages {pages[0]}/{pages[1]}  {status}")
+
+if __name__ == "__main__":
+    main()
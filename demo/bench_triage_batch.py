@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Benchmark: triage one patient at a time vs one vectorized batch
+Generates random symptom lists from the rule vocabulary (with a few misspellings),
+scores them with simple_symptom_to_options per patient and with symptom_options_batch
+over the whole list, checks both give the same options, and reports patients/second,
+end to end and for the vectorized scoring step alone.
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import random
+import time
+
+os.environ.setdefault("WARMUP", "0")
+with contextlib.redirect_stdout(io.StringIO()):
+    import app
+
+MISSPELLINGS = ["head ache", "sore throught", "runy nose", "vomitting", "shortness of breth"]
+
+def random_patients(n, seed):
+    rng = random.Random(seed)
+    words = sorted(set(app.SYMPTOM_VOCABULARY)) + MISSPELLINGS
+    ages = [None, 1, 6, 15, 35, 72]
+    return [(", ".join(rng.sample(words, rng.randint(1, 6))), rng.choice(ages)) for _ in range(n)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--patients", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    patients = random_patients(args.patients, args.seed)
+    texts = [text for text, _ in patients]
+    ages = [age for _, age in patients]
+
+    print("="*60)
+    print("BATCH TRIAGE BENCHMARK")
+    print("="*60)
+    print(f"{len(patients)} patients, {len(app.SYMPTOM_SCORER.vocabulary)} vocabulary keywords\n")
+
+    # Same warm caches (normalizer, keyword encoding) for both runs
+    app.symptom_options_batch(texts, ages)
+
+    started = time.perf_counter()
+    single = [app.simple_symptom_to_options(text, age) for text, age in patients]
+    single_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    batch = app.symptom_options_batch(texts, ages)
+    batch_s = time.perf_counter() - started
+
+    print(f"{'mode':<12} {'seconds':>8} {'patients/s':>11} {'us/patient':>11}")
+    for mode, seconds in (("per patient", single_s), ("batch", batch_s)):
+        print(f"{mode:<12} {seconds:8.3f} {len(patients) / seconds:11.0f} {seconds / len(patients) * 1e6:11.1f}")
+    print(f"\nSpeed-up: {single_s / batch_s:.1f}x")
+    print("Options identical" if single == batch else "❌ Options differ between per-patient and batch")
+
+    # Scoring alone (cluster scores, severity, keyword counts), without building option dicts
+    symptoms = [[s.strip().lower() for s in app.SYMPTOM_NORMALIZER.normalize_text(text).split(",")] for text in texts]
+    started = time.perf_counter()
+    for patient in symptoms:
+        app.SYMPTOM_SCORER.score([patient])
+    single_s = time.perf_counter() - started
+    started = time.perf_counter()
+    app.SYMPTOM_SCORER.score(symptoms)
+    batch_s = time.perf_counter() - started
+    print(f"\nScoring only: {single_s / len(symptoms) * 1e6:.1f} us/patient per patient, "
+          f"{batch_s / len(symptoms) * 1e6:.2f} us/patient in one batch ({single_s / batch_s:.0f}x)")
+
+if __name__ == "__main__":
+    main()
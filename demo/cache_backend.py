@@ -0,0 +1,338 @@
+# cache_backend.py -- Key/value caches with per-entry TTLs behind one small interface
+# Each node's in-process caches only help requests that land on that node; with
+# requests spread round-robin every node renders and triages the same things again.
+# A CacheBackend is get/set/delete with a per-entry TTL:
+#   LocalCache   in-process LRU (values kept as-is, no copy)
+#   RedisCache   a shared server spoken to over the Redis protocol (RESP), values in
+#                a compact binary encoding (encode_value / decode_value)
+#   TieredCache  a short-lived LocalCache (near cache) in front of a shared backend,
+#                so hot entries are read without a network round-trip
+# A shared cache that is down degrades to misses; it never fails a request.
+import json
+import logging
+import queue
+import socket
+import threading
+import time
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from urllib.parse import unquote, urlparse
+
+from structured_logging import get_logger, log_event
+
+log = get_logger("cache")
+
+# Encoded values start with one tag byte: raw bytes (PDFs are already compressed),
+# JSON, or zlib-compressed JSON for values of at least COMPRESS_MIN_BYTES
+RAW, JSON, JSON_ZLIB = b"\x00", b"\x01", b"\x02"
+COMPRESS_MIN_BYTES = 512
+
+
+def encode_value(value):
+    """Bytes for bytes or a JSON-serialisable value (tuples come back as lists)"""
+    if isinstance(value, (bytes, bytearray)):
+        return RAW + bytes(value)
+    payload = json.dumps(value, separators=(",", ":"), default=str).encode("utf-8")
+    if len(payload) >= COMPRESS_MIN_BYTES:
+        return JSON_ZLIB + zlib.compress(payload, 1)
+    return JSON + payload
+
+
+def decode_value(data):
+    tag, payload = data[:1], data[1:]
+    if tag == RAW:
+        return payload
+    if tag == JSON_ZLIB:
+        payload = zlib.decompress(payload)
+    elif tag != JSON:
+        raise ValueError(f"unknown cache value tag {tag!r}")
+    return json.loads(payload)
+
+
+class CacheBackend(ABC):
+    """get(key) -> value or None; set(key, value, ttl) with ttl in seconds
+    (None: the backend's default_ttl, or no expiry); delete(key); stats()"""
+
+    @abstractmethod
+    def get(self, key):
+        """Value stored under key, or None when missing or expired"""
+
+    @abstractmethod
+    def set(self, key, value, ttl=None):
+        """Store value under key for ttl seconds"""
+
+    @abstractmethod
+    def delete(self, key):
+        """Remove key if present"""
+
+    def stats(self):
+        return {}
+
+
+class LocalCache(CacheBackend):
+    """In-process LRU bounded by entry count and, for bytes values, total bytes.
+
+    Values are stored by reference, so callers must not mutate what they put
+    or get. Expired entries are dropped when read or pushed out by new ones.
+    """
+
+    def __init__(self, max_items=1000, max_bytes=None, default_ttl=None, clock=time.monotonic):
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.default_ttl = default_ttl
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # key -> (expires_at or None, value, bytes)
+        self.size = 0
+        self.counts = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def _drop(self, key):
+        self.size -= self.entries.pop(key)[2]
+
+    def get(self, key):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] is not None and entry[0] <= self.clock():
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self.counts["misses"] += 1
+                return None
+            self.entries.move_to_end(key)
+            self.counts["hits"] += 1
+            return entry[1]
+
+    def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        size = len(value) if isinstance(value, (bytes, bytearray)) else 0
+        if self.max_bytes is not None and size > self.max_bytes:
+            return
+        with self.lock:
+            if key in self.entries:
+                self._drop(key)
+            self.entries[key] = (self.clock() + ttl if ttl is not None else None, value, size)
+            self.size += size
+            while len(self.entries) > self.max_items or (self.max_bytes is not None and self.size > self.max_bytes):
+                self._drop(next(iter(self.entries)))
+                self.counts["evictions"] += 1
+
+    def delete(self, key):
+        with self.lock:
+            if key in self.entries:
+                self._drop(key)
+
+    def __len__(self):
+        with self.lock:
+            now = self.clock()
+            for key in [k for k, (expires_at, _, _) in self.entries.items()
+                        if expires_at is not None and expires_at <= now]:
+                self._drop(key)
+            return len(self.entries)
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counts, items=len(self.entries), bytes=self.size)
+
+
+class RedisError(Exception):
+    """An error reply from the server"""
+
+
+class RedisCache(CacheBackend):
+    """Shared cache on a Redis-protocol server (Redis, Valkey, KeyDB, redis_standin.py).
+
+    Keys are prefixed, values encoded with encode_value and written with a
+    millisecond TTL (SET ... PX). Connections are pooled. After a connection
+    failure the server is skipped for retry_interval seconds: reads miss and
+    writes are dropped, so an outage costs one timeout, not one per request.
+    """
+
+    def __init__(self, host="127.0.0.1", port=6379, db=0, password=None, prefix="cds:", default_ttl=None,
+                 timeout=0.5, pool_size=8, retry_interval=5.0):
+        self.address = (host, port)
+        self.db = db
+        self.password = password
+        self.prefix = prefix
+        self.default_ttl = default_ttl
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self.idle = queue.LifoQueue(maxsize=pool_size)
+        self.lock = threading.Lock()
+        self.down_until = 0.0
+        self.counts = {"hits": 0, "misses": 0, "sets": 0, "errors": 0}
+
+    def _connect(self):
+        sock = socket.create_connection(self.address, timeout=self.timeout)
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        conn = (sock, sock.makefile("rb"))
+        try:
+            if self.password:
+                self._call(conn, "AUTH", self.password)
+            if self.db:
+                self._call(conn, "SELECT", self.db)
+        except Exception:
+            sock.close()
+            raise
+        return conn
+
+    @staticmethod
+    def _call(conn, *args):
+        sock, reader = conn
+        parts = [b"*%d\r\n" % len(args)]
+        for arg in args:
+            if not isinstance(arg, bytes):
+                arg = str(arg).encode("utf-8")
+            parts.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+        sock.sendall(b"".join(parts))
+        return RedisCache._reply(reader)
+
+    @staticmethod
+    def _reply(reader):
+        line = reader.readline()
+        if not line.endswith(b"\r\n"):
+            raise ConnectionError("connection closed by the cache server")
+        kind, rest = line[:1], line[1:-2]
+        if kind == b"+":
+            return rest
+        if kind == b"-":
+            raise RedisError(rest.decode("utf-8", "replace"))
+        if kind == b":":
+            return int(rest)
+        if kind == b"$":
+            length = int(rest)
+            if length < 0:
+                return None
+            data = reader.read(length + 2)
+            if len(data) != length + 2:
+                raise ConnectionError("connection closed by the cache server")
+            return data[:-2]
+        if kind == b"*":
+            length = int(rest)
+            return None if length < 0 else [RedisCache._reply(reader) for _ in range(length)]
+        raise ConnectionError(f"unexpected reply {line[:20]!r}")
+
+    def command(self, *args):
+        """Reply to one command; OSError when the server can't be reached"""
+        if time.monotonic() < self.down_until:
+            raise ConnectionError("cache server marked down")
+        try:
+            conn = self.idle.get_nowait()
+        except queue.Empty:
+            conn = None
+        while True:
+            reused = conn is not None
+            try:
+                if conn is None:
+                    conn = self._connect()
+                reply = self._call(conn, *args)
+            except RedisError:
+                if conn is not None:
+                    self._release(conn)
+                raise
+            except OSError as e:
+                if conn is not None:
+                    conn[0].close()
+                if reused:
+                    # A pooled connection may have gone stale (server restart); retry on a new one
+                    conn = None
+                    continue
+                with self.lock:
+                    self.down_until = time.monotonic() + self.retry_interval
+                    self.counts["errors"] += 1
+                log_event(log, logging.WARNING, "cache.unavailable",
+                          server=f"{self.address[0]}:{self.address[1]}", error=str(e),
+                          retry_in_s=self.retry_interval)
+                raise
+            self._release(conn)
+            return reply
+
+    def _release(self, conn):
+        try:
+            self.idle.put_nowait(conn)
+        except queue.Full:
+            conn[0].close()
+
+    def get(self, key):
+        try:
+            data = self.command("GET", self.prefix + key)
+        except (OSError, RedisError):
+            return None
+        with self.lock:
+            self.counts["hits" if data is not None else "misses"] += 1
+        return decode_value(data) if data is not None else None
+
+    def set(self, key, value, ttl=None):
+        ttl = self.default_ttl if ttl is None else ttl
+        args = ["SET", self.prefix + key, encode_value(value)]
+        if ttl is not None:
+            args += ["PX", max(int(ttl * 1000), 1)]
+        try:
+            self.command(*args)
+        except (OSError, RedisError):
+            return
+        with self.lock:
+            self.counts["sets"] += 1
+
+    def delete(self, key):
+        try:
+            self.command("DEL", self.prefix + key)
+        except (OSError, RedisError):
+            pass
+
+    def close(self):
+        while True:
+            try:
+                self.idle.get_nowait()[0].close()
+            except queue.Empty:
+                break
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counts, server=f"{self.address[0]}:{self.address[1]}",
+                        available=time.monotonic() >= self.down_until)
+
+
+class TieredCache(CacheBackend):
+    """A near LocalCache in front of a shared backend.
+
+    Reads try the near cache, then the shared one (filling the near cache);
+    writes go to both. A near entry lives at most near_ttl seconds, which
+    bounds how long a node can serve a value deleted or replaced elsewhere.
+    """
+
+    def __init__(self, near, shared, near_ttl=30.0):
+        self.near = near
+        self.shared = shared
+        self.near_ttl = near_ttl
+
+    def get(self, key):
+        value = self.near.get(key)
+        if value is None:
+            value = self.shared.get(key)
+            if value is not None:
+                self.near.set(key, value, self.near_ttl)
+        return value
+
+    def set(self, key, value, ttl=None):
+        self.shared.set(key, value, ttl)
+        self.near.set(key, value, self.near_ttl if ttl is None else min(ttl, self.near_ttl))
+
+    def delete(self, key):
+        self.shared.delete(key)
+        self.near.delete(key)
+
+    def stats(self):
+        return {"near": self.near.stats(), "shared": self.shared.stats()}
+
+
+def shared_cache_from_url(url, **options):
+    """RedisCache for redis://[:password@]host[:port][/db] (None for an empty url)"""
+    if not url:
+        return None
+    parsed = urlparse(url)
+    if parsed.scheme != "redis":
+        raise ValueError(f"unsupported cache URL {url!r} (expected redis://host:port/db)")
+    return RedisCache(parsed.hostname or "127.0.0.1", parsed.port or 6379,
+                      db=int(parsed.path.lstrip("/") or 0),
+                      password=unquote(parsed.password) if parsed.password else None, **options)
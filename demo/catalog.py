@@ -0,0 +1,348 @@
+# catalog.py -- Column-oriented medicine catalog with bitmap indexes
+# Built once from main_data.csv at startup; request handlers only read from it.
+import bisect
+import re
+import sys
+from array import array
+from collections import namedtuple
+
+import numpy as np
+
+# Low-cardinality CSV columns that get a per-value bitmap index
+CATEGORICAL_COLUMNS = {
+    "category": "Category",
+    "dosage_form": "Dosage Form",
+    "manufacturer": "Manufacturer",
+    "indication": "Indication",
+    "classification": "Classification",
+}
+
+
+def medicine_id(name):
+    """Same id scheme the MEDS list has always used"""
+    return name.lower().replace(' ', '_')
+
+
+# Strength units are normalized to one canonical unit per dimension
+STRENGTH_PATTERN = re.compile(r'^\s*(\d+(?:\.\d+)?)\s*([a-zA-Z\u00b5%/]+)?')
+UNIT_CONVERSIONS = {
+    "mg": ("mg", 1.0),
+    "g": ("mg", 1000.0),
+    "mcg": ("mg", 0.001),
+    "\u00b5g": ("mg", 0.001),
+    "ug": ("mg", 0.001),
+    "ml": ("ml", 1.0),
+    "l": ("ml", 1000.0),
+}
+DEFAULT_UNIT = "mg"
+
+
+def normalize_unit(value, unit):
+    """Convert (value, unit) to the canonical unit of its dimension"""
+    unit = (unit or DEFAULT_UNIT).lower()
+    canonical, factor = UNIT_CONVERSIONS.get(unit, (unit, 1.0))
+    return value * factor, canonical
+
+
+def parse_strength(text):
+    """(value, unit) of a strength string such as '938 mg' or '0.5 g', or (None, None)"""
+    match = STRENGTH_PATTERN.match(str(text))
+    if not match:
+        return None, None
+    return normalize_unit(float(match.group(1)), match.group(2))
+
+
+def parse_strength_column(series):
+    """Vectorized parse_strength over a pandas Series -> (values, units) lists"""
+    parts = series.astype(str).str.extract(STRENGTH_PATTERN.pattern)
+    values, units = [], []
+    for raw_value, raw_unit in zip(parts[0].tolist(), parts[1].tolist()):
+        if not isinstance(raw_value, str):
+            values.append(None)
+            units.append(None)
+            continue
+        value, unit = normalize_unit(float(raw_value), raw_unit if isinstance(raw_unit, str) else None)
+        values.append(value)
+        units.append(sys.intern(unit))
+    return values, units
+
+
+def format_strength(value, unit):
+    """Render a parsed strength back as text ('938 mg')"""
+    if value is None:
+        return ""
+    return f"{value:g} {unit}"
+
+
+class Medicine(namedtuple("Medicine", [
+    "id", "catalog_row", "name", "category", "dosage_form", "strength",
+    "strength_value", "strength_unit", "manufacturer", "indication",
+    "classification", "contraindications", "dispensing"
+])):
+    """Immutable, slotted medicine record; string fields share the catalog dictionaries"""
+    __slots__ = ()
+
+    def to_dict(self):
+        """JSON view (the shared dispensing profile and catalog row are left out)"""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "category": self.category,
+            "dosage_form": self.dosage_form,
+            "strength": self.strength,
+            "strength_value": self.strength_value,
+            "strength_unit": self.strength_unit,
+            "manufacturer": self.manufacturer,
+            "indication": self.indication,
+            "classification": self.classification,
+            "contraindications": list(self.contraindications)
+        }
+
+
+def _list_bytes(values):
+    """List plus every distinct string object it references"""
+    seen = {id(v): v for v in values}
+    return sys.getsizeof(values) + sum(sys.getsizeof(v) for v in seen.values())
+
+
+def iter_bits(bitmap):
+    """Yield row numbers set in a bitmap, lowest first.
+
+    Walks the bitmap as 64-bit words: clearing bits of the whole int instead
+    would copy it once per row, quadratic on large catalogs.
+    """
+    words = array("Q", bitmap.to_bytes((bitmap.bit_length() + 63) // 64 * 8, "little"))
+    if sys.byteorder == "big":
+        words.byteswap()
+    for index, word in enumerate(words):
+        base = index * 64
+        while word:
+            low = word & -word
+            yield base + low.bit_length() - 1
+            word ^= low
+
+
+def bitmap_from_mask(mask):
+    """Build a bitmap from a boolean array (bit i = mask[i])"""
+    return int.from_bytes(np.packbits(mask, bitorder="little").tobytes(), "little")
+
+
+def mask_from_bitmap(bitmap, size):
+    """Boolean array of the first size bits of a bitmap"""
+    data = np.frombuffer(bitmap.to_bytes((size + 7) // 8, "little"), dtype=np.uint8)
+    return np.unpackbits(data, count=size, bitorder="little").view(bool)
+
+
+def bitmap_from_rows(rows, size):
+    """Build a bitmap from a sequence or integer array of row numbers"""
+    mask = np.zeros(size, dtype=bool)
+    mask[np.asarray(rows, dtype=np.intp)] = True
+    return bitmap_from_mask(mask)
+
+
+class Catalog:
+    """Medicine rows stored column-wise with bitmap and strength indexes.
+
+    Categorical columns are stored as compact integer code arrays into one
+    shared dictionary per column, and every code has a Python int bitmap
+    whose bit i is set when row i has that value, so multi-attribute filters
+    are answered with bitwise AND/OR instead of scanning rows.
+    Strength is parsed once into numeric value/unit arrays and kept as sorted
+    arrays (overall and per category) for bisect-based range predicates.
+    """
+
+    def __init__(self, df):
+        self.size = len(df)
+        self.all_rows = (1 << self.size) - 1
+
+        self.names = df['Name'].tolist()
+        self.strengths = df['Strength'].tolist()
+
+        # Categorical columns as integer codes into one shared dictionary per column.
+        # Codes are assigned per lower-cased value; the dictionary keeps the first
+        # display spelling, interned so every user of it shares one string object.
+        self.dictionaries = {}
+        self.lowered = {}
+        self.code_of = {}
+        self.codes = {}
+        self.bitmaps = {}
+        string_bytes = 0
+        for field, col in CATEGORICAL_COLUMNS.items():
+            raw = df[col].tolist()
+            string_bytes += _list_bytes(raw)
+
+            display, code_of, row_codes, rows_by_code = [], {}, [], []
+            for row, value in enumerate(raw):
+                value = str(value)
+                key = value.lower()
+                code = code_of.get(key)
+                if code is None:
+                    code = code_of[key] = len(display)
+                    display.append(sys.intern(value))
+                    rows_by_code.append([])
+                row_codes.append(code)
+                rows_by_code[code].append(row)
+
+            self.dictionaries[field] = display
+            self.lowered[field] = [value.lower() for value in display]
+            self.code_of[field] = code_of
+            self.codes[field] = array("H" if len(display) <= 0xFFFF else "I", row_codes)
+            # Per-value bitmaps, indexed by code
+            self.bitmaps[field] = [bitmap_from_rows(rows, self.size) for rows in rows_by_code]
+
+        code_bytes = sum(
+            codes.buffer_info()[1] * codes.itemsize + _list_bytes(self.dictionaries[field])
+            + sys.getsizeof(self.code_of[field])
+            for field, codes in self.codes.items()
+        )
+        self.memory = {
+            "categorical_strings_bytes": string_bytes,
+            "categorical_codes_bytes": code_bytes,
+            "saved_bytes": string_bytes - code_bytes
+        }
+
+        # Strength parsed once into numeric value and unit arrays
+        self.strength_values, self.strength_units = parse_strength_column(df['Strength'])
+        # mg strengths as one float array (NaN for other units), for vectorized range checks
+        self.strength_mg = np.array([
+            value if unit == DEFAULT_UNIT else np.nan
+            for value, unit in zip(self.strength_values, self.strength_units)
+        ], dtype=float)
+
+        # Sorted (strength, row) arrays over mg-denominated rows, overall and per category
+        self.strength_index = self._strength_index(np.arange(self.size))
+        categories = np.array(self.codes["category"])
+        self.category_strength_index = [
+            self._strength_index(np.flatnonzero(categories == code))
+            for code in range(len(self.dictionaries["category"]))
+        ]
+
+    def _strength_index(self, rows):
+        """(sorted strength list for bisect, row array in the same order); ties keep row order"""
+        rows = rows[~np.isnan(self.strength_mg[rows])]
+        rows = rows[np.argsort(self.strength_mg[rows], kind="stable")]
+        return self.strength_mg[rows].tolist(), rows
+
+    def code(self, field, value):
+        """Integer code of a lower-cased categorical value, or None if unknown"""
+        return self.code_of[field].get(value)
+
+    def value(self, field, row):
+        """Shared display string of a categorical column at a row"""
+        return self.dictionaries[field][self.codes[field][row]]
+
+    def values(self, field):
+        """Distinct lower-cased values indexed for a categorical column"""
+        return sorted(self.code_of[field])
+
+    def match_any(self, field, values):
+        """OR together the bitmaps of the requested values of one column"""
+        bitmaps = self.bitmaps[field]
+        bitmap = 0
+        for value in values:
+            code = self.code(field, str(value).strip().lower())
+            if code is not None:
+                bitmap |= bitmaps[code]
+        return bitmap
+
+    def strength_range(self, min_strength=None, max_strength=None, candidates=None, categories=None):
+        """Bitmap of rows whose strength (mg) lies in [min_strength, max_strength].
+
+        With categories given only those per-category indexes are sliced.
+        When the candidate set is already smaller than the strength slices the
+        candidates are checked directly instead of materialising the slices.
+        """
+        if categories:
+            codes = {self.code("category", str(c).strip().lower()) for c in categories}
+            indexes = [self.category_strength_index[code] for code in codes if code is not None]
+        else:
+            indexes = [self.strength_index]
+
+        slices = []
+        for values, rows in indexes:
+            lo = 0 if min_strength is None else bisect.bisect_left(values, min_strength)
+            hi = len(values) if max_strength is None else bisect.bisect_right(values, max_strength)
+            if hi > lo:
+                slices.append(rows[lo:hi])
+        if not slices:
+            return 0
+
+        if candidates is not None and candidates.bit_count() < sum(len(rows) for rows in slices):
+            low = float("-inf") if min_strength is None else min_strength
+            high = float("inf") if max_strength is None else max_strength
+            strengths = self.strength_mg
+            return bitmap_from_mask(mask_from_bitmap(candidates, self.size) & (strengths >= low) & (strengths <= high))
+        return bitmap_from_rows(np.concatenate(slices), self.size)
+
+    def strength_rank(self, category_code, value):
+        """Fraction of a category's mg strengths that are <= value (0-1)"""
+        values, _ = self.category_strength_index[category_code]
+        if not values or value is None:
+            return None
+        return bisect.bisect_right(values, value) / len(values)
+
+    def filter(self, criteria=None, min_strength=None, max_strength=None):
+        """Bitmap of rows matching every column in criteria (AND across columns,
+        OR across the values given for one column) and the strength range."""
+        bitmap = self.all_rows
+        for field, values in (criteria or {}).items():
+            if values:
+                bitmap &= self.match_any(field, values)
+                if not bitmap:
+                    return 0
+        if min_strength is not None or max_strength is not None:
+            bitmap &= self.strength_range(min_strength, max_strength, candidates=bitmap,
+                                          categories=(criteria or {}).get("category"))
+        return bitmap
+
+    def record(self, row):
+        """JSON-friendly view of a single row"""
+        rec = {
+            "id": medicine_id(self.names[row]),
+            "name": self.names[row],
+            "strength": self.strengths[row],
+            "strength_value": self.strength_values[row],
+            "strength_unit": self.strength_units[row],
+        }
+        for field in CATEGORICAL_COLUMNS:
+            rec[field] = self.value(field, row)
+        return rec
+
+    def records(self, bitmap, offset=0, limit=None):
+        """Materialise rows of a bitmap in CSV order, with pagination"""
+        results = []
+        for i, row in enumerate(iter_bits(bitmap)):
+            if i < offset:
+                continue
+            if limit is not None and len(results) >= limit:
+                break
+            results.append(self.record(row))
+        return results
+
+
+def build_medicines(catalog, dispensing_profiles, classification="over-the-counter"):
+    """Medicine records for every catalog row of one classification, in CSV order"""
+    wanted = catalog.code("classification", classification)
+    classifications = catalog.codes["classification"]
+    meds = []
+    for row in range(catalog.size):
+        if classifications[row] != wanted:
+            continue
+        category = catalog.value("category", row)
+        dosage_form = catalog.value("dosage_form", row)
+        meds.append(Medicine(
+            id=medicine_id(catalog.names[row]),
+            catalog_row=row,
+            name=catalog.names[row],
+            category=category,
+            dosage_form=dosage_form,
+            strength=catalog.strengths[row],
+            strength_value=catalog.strength_values[row],
+            strength_unit=catalog.strength_units[row],
+            manufacturer=catalog.value("manufacturer", row),
+            indication=catalog.value("indication", row),
+            classification=catalog.value("classification", row),
+            contraindications=(),
+            dispensing=dispensing_profiles[(category.lower(), dosage_form.lower())]
+        ))
+    return meds
@@ -0,0 +1,85 @@
+# dispensing.py -- Shared dispensing instructions and age-group dosing rules
+# Both depend only on (category, dosage form), so one immutable profile is built
+# per distinct pair when the catalog loads and every medicine points at it.
+from types import MappingProxyType
+from collections import namedtuple
+
+DispensingProfile = namedtuple("DispensingProfile", ["instructions", "age_groups"])
+
+
+def dispensing_instructions(category, dosage_form):
+    """Default timing text for a category / dosage form pair"""
+    category = category.lower()
+    dosage_form = dosage_form.lower()
+    if category == "analgesic":
+        return "Take every 6-8 hours as needed for pain"
+    elif category == "antipyretic":
+        return "Take every 6-8 hours as needed for fever"
+    elif category == "antibiotic":
+        return "Take every 8 hours for 7-10 days"
+    elif category == "antiviral":
+        return "Take as directed for 5-7 days"
+    elif category == "antidiabetic":
+        return "Take once or twice daily with meals"
+    elif category == "antifungal":
+        return "Take once daily"
+    elif category == "antidepressant":
+        return "Take once daily"
+    elif category == "antiseptic":
+        if dosage_form in ["ointment", "cream"]:
+            return "Apply to affected area 2-3 times daily"
+        return "Use as directed"
+    elif dosage_form == "inhaler":
+        return "Use 2 puffs every 4-6 hours as needed"
+    elif dosage_form in ["ointment", "cream"]:
+        return "Apply to affected area 2-3 times daily"
+    elif dosage_form == "drops":
+        return "Use as directed"
+    elif dosage_form == "injection":
+        return "Administer as prescribed by healthcare provider"
+    return "Take as directed"
+
+
+def age_group_dosing(dosage_form):
+    """Age-group dosing rules; the dose text is completed per medicine by dose_text()"""
+    form = dosage_form.lower()
+    return MappingProxyType({
+        "adult": MappingProxyType({
+            "dose_prefix": "",
+            "dose_suffix": f" {form}",
+            "min_age": 18,
+            "max_age": 64
+        }),
+        "elderly": MappingProxyType({
+            "dose_prefix": "Reduced dose: ",
+            "dose_suffix": f" {form}",
+            "min_age": 65,
+            "max_age": 999,
+            "notes": "Consider dose adjustment for elderly patients"
+        })
+    })
+
+
+def build_dispensing_profiles(pairs, profiles=None):
+    """One shared DispensingProfile per distinct (category, dosage form), keyed lower-cased.
+
+    Given an existing profiles dict, only the pairs it lacks are added (in place),
+    so catalogs loaded later share the profiles and dosing rules already built.
+    """
+    profiles = {} if profiles is None else profiles
+    dosing_by_form = {form: profile.age_groups for (_, form), profile in profiles.items()}
+    for category, dosage_form in pairs:
+        key = (category.lower(), dosage_form.lower())
+        if key not in profiles:
+            if key[1] not in dosing_by_form:
+                dosing_by_form[key[1]] = age_group_dosing(dosage_form)
+            profiles[key] = DispensingProfile(
+                instructions=dispensing_instructions(category, dosage_form),
+                age_groups=dosing_by_form[key[1]]
+            )
+    return profiles
+
+
+def dose_text(strength_text, age_info):
+    """Dose line for one medicine under an age-group rule"""
+    return f"{age_info['dose_prefix']}{strength_text}{age_info['dose_suffix']}"
@@ -0,0 +1,127 @@
+# formulary.py -- Named medicine catalogs (formularies), loaded on first use and evicted LRU
+# Districts stock different medicines, so a request is triaged against the formulary
+# of its region or tenant. Each formulary carries its own Catalog, OTC Medicine
+# records, top-k rankings and resolved treatment rules, built by the app the first
+# time the formulary is asked for. Loaded formularies are kept until their combined
+# size exceeds the budget, then the least recently used idle ones are dropped (a
+# request still holding one keeps using it). What depends only on values, not on
+# rows, is shared: catalog dictionary strings are interned and dispensing profiles
+# come from one registry (dispensing.build_dispensing_profiles extends it in place).
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+
+from memory_report import deep_size
+from structured_logging import get_logger, log_event
+
+log = get_logger("formulary")
+
+# meds_by_id: drug id -> first OTC Medicine of that id; size_bytes: deep size
+# not shared with other formularies, measured when loaded
+Formulary = namedtuple("Formulary", ["name", "catalog", "meds", "meds_by_id", "top_k", "treatments",
+                                     "size_bytes", "loaded_at"])
+
+
+def formulary_sources(directory):
+    """{name: CSV path} for every <name>.csv in directory (empty when it doesn't exist)"""
+    if not directory or not os.path.isdir(directory):
+        return {}
+    return {
+        os.path.splitext(entry)[0]: os.path.join(directory, entry)
+        for entry in sorted(os.listdir(directory))
+        if entry.endswith(".csv")
+    }
+
+
+class UnknownFormulary(LookupError):
+    """A request named a formulary that is not configured"""
+
+    def __init__(self, name):
+        super().__init__(f"Unknown formulary: {name}")
+        self.name = name
+
+
+class FormularyRegistry:
+    """Formularies by name, built by build(name, source) on first use.
+
+    The default formulary is loaded by the caller and pinned: it is never
+    evicted and does not count against max_bytes. Loads are serialized, so
+    concurrent first requests for a formulary build it once; lookups of a
+    loaded formulary only take the short registry lock. shared is what the
+    sizes should leave out (objects every formulary references).
+    """
+
+    def __init__(self, default, sources, build, max_bytes, shared=()):
+        self.default = default
+        self.sources = dict(sources)
+        self.build = build
+        self.max_bytes = max_bytes
+        self.shared = shared
+        self.lock = threading.Lock()
+        self.load_lock = threading.Lock()
+        self.loaded = OrderedDict()  # name -> Formulary, least recently used first
+        self.counts = {"hits": 0, "loads": 0, "evictions": 0}
+
+    def names(self):
+        return [self.default.name] + [name for name in self.sources if name != self.default.name]
+
+    def __contains__(self, name):
+        return name == self.default.name or name in self.sources
+
+    def measure(self, formulary):
+        """Formulary with size_bytes set to the deep size it does not share"""
+        seen = set()
+        deep_size(self.shared, seen)
+        return formulary._replace(size_bytes=deep_size(formulary, seen))
+
+    def get(self, name=None):
+        """Formulary by name (None is the default); UnknownFormulary for a name not configured"""
+        if name is None or name == self.default.name:
+            return self.default
+        if name not in self.sources:
+            raise UnknownFormulary(name)
+        with self.lock:
+            formulary = self.loaded.get(name)
+            if formulary is not None:
+                self.loaded.move_to_end(name)
+                self.counts["hits"] += 1
+                return formulary
+        with self.load_lock:
+            with self.lock:
+                formulary = self.loaded.get(name)
+            if formulary is None:
+                started = time.perf_counter()
+                formulary = self.measure(self.build(name, self.sources[name]))
+                with self.lock:
+                    self.loaded[name] = formulary
+                    self.counts["loads"] += 1
+                    self._evict(keep=name)
+                log_event(log, logging.INFO, "formulary.loaded", formulary=name,
+                          rows=formulary.catalog.size, size_mb=round(formulary.size_bytes / 1024 / 1024, 1),
+                          duration_ms=round((time.perf_counter() - started) * 1000, 2))
+        with self.lock:
+            if name in self.loaded:
+                self.loaded.move_to_end(name)
+        return formulary
+
+    def _evict(self, keep):
+        """Drop least recently used formularies (never keep) while over max_bytes"""
+        total = sum(f.size_bytes for f in self.loaded.values())
+        for name in list(self.loaded):
+            if total <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            total -= self.loaded.pop(name).size_bytes
+            self.counts["evictions"] += 1
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counts, default=self.default.name, available=self.names(),
+                        loaded={name: {"rows": f.catalog.size, "otc_medicines": len(f.meds),
+                                       "size_bytes": f.size_bytes}
+                                for name, f in self.loaded.items()},
+                        loaded_bytes=sum(f.size_bytes for f in self.loaded.values()),
+                        max_bytes=self.max_bytes)
@@ -0,0 +1,80 @@
+# interactions.py -- Duplication and interaction checks over the recommended medicines
+# The options of one assessment can recommend overlapping therapy (an analgesic and
+# an antipyretic, the same ingredient under two brand names, the same medicine
+# twice) or medicines that interact. The rules table is compiled once into a dict
+# keyed by the unordered pair, so checking an assessment's k recommended medicines
+# is k(k-1)/2 hash lookups per rule kind and never reads the catalog.
+from collections import namedtuple
+
+# kind: "category" or "ingredient"; a and b: lower-cased category / ingredient names,
+# or both "*" for any two medicines sharing one; type: "duplication" or "interaction";
+# severity: "major", "moderate" or "minor"; message may use {a} and {b}
+InteractionRule = namedtuple("InteractionRule", ["kind", "a", "b", "type", "severity", "message"])
+
+SAME = "*"
+SEVERITY_ORDER = {"major": 0, "moderate": 1, "minor": 2}
+
+
+class InteractionChecker:
+    """Pair index over an InteractionRule table.
+
+    ingredient_stems maps a lower-case name fragment to the ingredient it
+    marks (the catalog has no ingredient column); a medicine's ingredients are
+    worked out once per distinct name. check() returns at most one flag per
+    pair of recommended medicines, the most severe rule that matched.
+    """
+
+    def __init__(self, rules, ingredient_stems):
+        self.pairs = {}   # (kind, a, b) with a <= b -> rule
+        self.same = {}    # kind -> rule for two medicines sharing a value
+        for rule in rules:
+            if rule.a == SAME:
+                self.same[rule.kind] = rule
+            else:
+                self.pairs[(rule.kind,) + tuple(sorted((rule.a, rule.b)))] = rule
+        self.stems = sorted(ingredient_stems.items())
+        self._ingredients = {}
+
+    def ingredients(self, name):
+        """Ingredients a medicine name is recognised as containing"""
+        found = self._ingredients.get(name)
+        if found is None:
+            lowered = name.lower()
+            found = tuple(sorted({ingredient for stem, ingredient in self.stems if stem in lowered}))
+            self._ingredients[name] = found
+        return found
+
+    def _match(self, kind, values_a, values_b):
+        """(rule, value a, value b) of the most severe rule between two value sets, or None"""
+        best = None
+        for a in values_a:
+            for b in values_b:
+                rule = self.same.get(kind) if a == b else None
+                if rule is None:
+                    rule = self.pairs.get((kind, a, b) if a <= b else (kind, b, a))
+                if rule is not None and (best is None or
+                                         SEVERITY_ORDER[rule.severity] < SEVERITY_ORDER[best[0].severity]):
+                    best = (rule, a, b)
+        return best
+
+    def check(self, drugs):
+        """Flags (dicts) for a list of (option id, Medicine) recommended together"""
+        flags = []
+        for i, (option_a, med_a) in enumerate(drugs):
+            for option_b, med_b in drugs[i + 1:]:
+                pair = {"drugs": [med_a.name, med_b.name], "options": [option_a, option_b]}
+                if med_a.id == med_b.id:
+                    flags.append(dict(pair, type="duplication", severity="major", basis="medicine",
+                                      message=f"{med_a.name} is recommended by more than one option; take it only once"))
+                    continue
+                matches = [m for m in (
+                    self._match("ingredient", self.ingredients(med_a.name), self.ingredients(med_b.name)),
+                    self._match("category", (med_a.category.lower(),), (med_b.category.lower(),)),
+                ) if m is not None]
+                if not matches:
+                    continue
+                rule, a, b = min(matches, key=lambda m: SEVERITY_ORDER[m[0].severity])
+                flags.append(dict(pair, type=rule.type, severity=rule.severity, basis=rule.kind,
+                                  message=rule.message.format(a=a, b=b)))
+        flags.sort(key=lambda flag: SEVERITY_ORDER[flag["severity"]])
+        return flags
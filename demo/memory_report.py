@@ -0,0 +1,221 @@
+#!/usr/bin/env python3
+# memory_report.py -- Deep sizes of app.py's global structures and per-request allocation sites
+# A deep size follows references through containers, NumPy arrays, DataFrames and
+# instances of this demo's own classes; anything else (locks, functions, third-party
+# objects) counts only its own size. Objects shared between structures, such as the
+# catalog dictionary strings every Medicine record points at, are in "deep" for each
+# structure but in "unique" only for the first structure listed, so the unique sizes
+# add up to what the structures hold together.
+#
+# CLI:  python memory_report.py                  (structure sizes, then tracemalloc
+#       python memory_report.py --release-df      over sample /assess and PDF requests)
+#       python memory_report.py --requests 100 --top 20 --json
+import argparse
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+import tracemalloc
+from array import array
+from collections import deque
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Module-level names in app.py, in "unique" attribution order; df last, so its unique
+# size is what releasing it frees
+STRUCTURES = [
+    "CATALOG", "MEDS", "MEDS_BY_ID", "MEDS_TOP_K", "DISPENSING_PROFILES", "TREATMENTS",
+    "SYMPTOM_SCORER", "SYMPTOM_NORMALIZER", "PDF_CACHE", "ASSESSMENTS", "PATIENT_HISTORY", "EXPORT_JOBS", "FORMULARIES", "df",
+]
+
+
+def _own_class(obj):
+    """True for instances of classes defined in this directory"""
+    module = sys.modules.get(type(obj).__module__)
+    return os.path.dirname(os.path.abspath(getattr(module, "__file__", None) or "/")) == BASE_DIR
+
+
+def deep_size(obj, seen=None):
+    """Bytes held by obj and everything it references that is not already in seen"""
+    seen = set() if seen is None else seen
+    size = 0
+    stack = [obj]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        if isinstance(obj, pd.DataFrame):
+            size += int(obj.index.memory_usage(deep=True))
+            for _, column in obj.items():
+                values = column.to_numpy()
+                size += values.nbytes
+                if values.dtype == object:
+                    stack.extend(values.tolist())
+            continue
+        size += sys.getsizeof(obj)
+        if isinstance(obj, np.ndarray):
+            if obj.base is not None:
+                stack.append(obj.base)
+        elif isinstance(obj, dict):
+            for key, value in list(obj.items()):
+                stack.append(key)
+                stack.append(value)
+        elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+            stack.extend(list(obj))
+        elif isinstance(obj, (str, bytes, bytearray, int, float, array)) or not _own_class(obj):
+            continue
+        else:
+            if hasattr(obj, "__dict__"):
+                stack.append(vars(obj))
+            for cls in type(obj).__mro__:
+                for slot in getattr(cls, "__slots__", ()):
+                    if hasattr(obj, slot):
+                        stack.append(getattr(obj, slot))
+    return size
+
+
+def structure_sizes(namespace, names=STRUCTURES):
+    """[{name, type, deep_bytes, unique_bytes}] for the names present in namespace"""
+    shared = set()
+    rows = []
+    for name in names:
+        if name not in namespace:
+            continue
+        obj = namespace[name]
+        rows.append({
+            "name": name,
+            "type": type(obj).__name__,
+            "deep_bytes": deep_size(obj),
+            "unique_bytes": deep_size(obj, shared),
+        })
+    return rows
+
+
+def process_memory():
+    """{"rss_bytes", "peak_rss_bytes"} of this process (None where /proc is unavailable)"""
+    try:
+        with open("/proc/self/status") as f:
+            status = dict(line.split(":", 1) for line in f if ":" in line)
+    except OSError:
+        return {"rss_bytes": None, "peak_rss_bytes": None}
+    return {"rss_bytes": int(status["VmRSS"].split()[0]) * 1024,
+            "peak_rss_bytes": int(status["VmHWM"].split()[0]) * 1024}
+
+
+def memory_report(namespace, names=STRUCTURES):
+    """Process memory and deep sizes of the structures in namespace"""
+    rows = structure_sizes(namespace, names)
+    return {
+        "process": process_memory(),
+        "structures": rows,
+        "total_unique_bytes": sum(row["unique_bytes"] for row in rows),
+    }
+
+
+def trace_allocations(run, top=15):
+    """Allocations made while run() executes: peak traced bytes above the starting
+    point, and the top sites (file:line) of memory still held afterwards"""
+    ignore = [tracemalloc.Filter(False, tracemalloc.__file__),
+              tracemalloc.Filter(False, "<frozen importlib._bootstrap*>")]
+    tracemalloc.start()
+    try:
+        before = tracemalloc.take_snapshot().filter_traces(ignore)
+        start, _ = tracemalloc.get_traced_memory()
+        tracemalloc.reset_peak()
+        run()
+        end, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot().filter_traces(ignore)
+    finally:
+        tracemalloc.stop()
+    sites = []
+    for stat in after.compare_to(before, "lineno")[:top]:
+        frame = stat.traceback[0]
+        sites.append({
+            "site": f"{os.path.relpath(frame.filename, BASE_DIR) if frame.filename.startswith(BASE_DIR) else frame.filename}:{frame.lineno}",
+            "bytes": stat.size_diff,
+            "blocks": stat.count_diff,
+        })
+    return {"peak_bytes": peak - start, "retained_bytes": end - start, "top_sites": sites}
+
+
+def sample_requests(cds, count, top):
+    """trace_allocations over count /assess requests, then count PDF requests"""
+    from workload import WorkloadGenerator
+    payloads = list(WorkloadGenerator(seed=3).generate(count * 2 + 2))
+    client = cds.app.test_client()
+    # One of each first, so lazy imports and first-use caches are not attributed to the sample
+    client.post("/assess", json=payloads[0])
+    client.post("/assess?format=pdf", json=payloads[1])
+
+    def run(url, batch):
+        def requests():
+            for payload in batch:
+                client.post(url, json=payload)
+        return requests
+
+    return {
+        "assess": trace_allocations(run("/assess", payloads[2:count + 2]), top),
+        "pdf": trace_allocations(run("/assess?format=pdf", payloads[count + 2:]), top),
+    }
+
+
+def mb(value):
+    return "n/a" if value is None else f"{value / 1024 / 1024:.1f}"
+
+
+def print_report(report, traces, count):
+    print("="*60)
+    print("MEMORY REPORT")
+    print("="*60)
+    process = report["process"]
+    print(f"Process RSS {mb(process['rss_bytes'])} MB (peak {mb(process['peak_rss_bytes'])} MB), "
+          f"source DataFrame {'released' if report['source_df_released'] else 'kept'}\n")
+    print(f"{'structure':<22} {'type':<18} {'deep MB':>9} {'unique MB':>10}")
+    for row in report["structures"]:
+        print(f"{row['name']:<22} {row['type']:<18} {mb(row['deep_bytes']):>9} {mb(row['unique_bytes']):>10}")
+    print(f"{'total':<41} {mb(report['total_unique_bytes']):>21}")
+
+    for kind, trace in traces.items():
+        print(f"\n{kind}: {count} requests, peak {trace['peak_bytes'] / 1024:.0f} KiB above start, "
+              f"{trace['retained_bytes'] / 1024:.0f} KiB still held after")
+        print(f"  {'KiB':>8} {'blocks':>7}  site")
+        for site in trace["top_sites"]:
+            print(f"  {site['bytes'] / 1024:8.1f} {site['blocks']:7d}  {site['site']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Deep sizes of app.py's global structures and "
+                                                 "allocation sites of sample requests")
+    parser.add_argument("--release-df", action="store_true", help="load the app with RELEASE_SOURCE_DF=1")
+    parser.add_argument("--requests", type=int, default=50, help="sample requests traced per kind")
+    parser.add_argument("--top", type=int, default=10, help="allocation sites listed per kind")
+    parser.add_argument("--json", action="store_true", help="print the report as JSON")
+    args = parser.parse_args()
+
+    os.environ.setdefault("WARMUP", "0")
+    os.environ.setdefault("LOG_LEVEL", "WARNING")
+    # Render into a throwaway cache, so every sampled PDF is a miss that really renders
+    os.environ.setdefault("PDF_CACHE_DIR", tempfile.mkdtemp(prefix="memory_report_pdf_"))
+    # Sample assessments are not real patients: keep them out of the assessment database
+    os.environ["ASSESSMENT_DB"] = ""
+    if args.release_df:
+        os.environ["RELEASE_SOURCE_DF"] = "1"
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app as cds
+
+    report = cds.memory_usage_report()
+    traces = sample_requests(cds, args.requests, args.top) if args.requests > 0 else {}
+    if args.json:
+        print(json.dumps(dict(report, requests=traces), indent=2))
+    else:
+        print_report(report, traces, args.requests)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# patient_history.py -- Bounded per-patient cache of chronic conditions and recent assessments
+# History-aware triage needs a patient's history on every /assess that names the
+# patient; a cached patient costs no database round-trip. Writes go through the
+# cache: a new assessment or condition updates the cached entry as it is recorded,
+# so the entry stays current even while the assessment itself is still queued for
+# the database. Writes for a patient who is not cached are held until the patient's
+# history is next loaded and merged into it, as the database may not have them yet.
+import threading
+from collections import OrderedDict, namedtuple
+
+# chronic_conditions: condition names; recent: ((assessment id, assessed_at, option ids), ...),
+# newest first, assessed_at as stored ('YYYY-MM-DD HH:MM:SS' UTC)
+PatientHistory = namedtuple("PatientHistory", ["patient_id", "chronic_conditions", "recent"])
+
+
+class PatientHistoryCache:
+    """PatientHistory by patient id, least recently used evicted beyond max_patients.
+
+    load(patient_id) reads a history on a miss (outside the lock). Entries are
+    immutable tuples replaced on write, so a reader always sees one whole
+    version; at most max_recent assessments are kept per patient. Writes for
+    up to max_patients uncached patients wait in unmerged for their next load.
+    """
+
+    def __init__(self, load, max_patients=10000, max_recent=20):
+        self.load = load
+        self.max_patients = max_patients
+        self.max_recent = max_recent
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()  # patient id -> PatientHistory
+        self.unmerged = OrderedDict()  # patient id -> PatientHistory of writes not yet merged into a load
+        self.counts = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def _put(self, history):
+        self.entries[history.patient_id] = history
+        self.entries.move_to_end(history.patient_id)
+        while len(self.entries) > self.max_patients:
+            self.entries.popitem(last=False)
+            self.counts["evictions"] += 1
+
+    def get(self, patient_id):
+        with self.lock:
+            history = self.entries.get(patient_id)
+            if history is not None:
+                self.entries.move_to_end(patient_id)
+                self.counts["hits"] += 1
+                return history
+            self.counts["misses"] += 1
+        loaded = self.load(patient_id)
+        with self.lock:
+            # An entry written through while this one loaded is at least as recent
+            history = self.entries.get(patient_id)
+            if history is None:
+                history = self._merge(loaded, self.unmerged.pop(patient_id, None))
+                self._put(history)
+            return history
+
+    def _merge(self, loaded, written):
+        """loaded plus the writes in written that the database did not return yet"""
+        if written is None:
+            return loaded
+        known = {record[0] for record in loaded.recent}
+        recent = sorted(loaded.recent + tuple(r for r in written.recent if r[0] not in known),
+                        key=lambda record: record[1], reverse=True)
+        conditions = loaded.chronic_conditions + tuple(
+            name for name in written.chronic_conditions if name not in loaded.chronic_conditions)
+        return loaded._replace(chronic_conditions=conditions, recent=tuple(recent[:self.max_recent]))
+
+    def _update(self, patient_id, change):
+        """Apply change(PatientHistory) to the cached entry, or to the writes held for the next load"""
+        history = self.entries.get(patient_id)
+        if history is not None:
+            self._put(change(history))
+            return
+        written = self.unmerged.pop(patient_id, None) or PatientHistory(patient_id, (), ())
+        self.unmerged[patient_id] = change(written)
+        while len(self.unmerged) > self.max_patients:
+            self.unmerged.popitem(last=False)
+
+    def record_assessment(self, patient_id, assessment_id, assessed_at, option_ids):
+        """Write-through of a new assessment"""
+        record = (assessment_id, assessed_at, tuple(option_ids))
+        with self.lock:
+            self._update(patient_id, lambda history: history._replace(
+                recent=((record,) + history.recent)[:self.max_recent]))
+
+    def record_condition(self, patient_id, condition_name, is_chronic):
+        """Write-through of a new medical_history row"""
+        if not is_chronic:
+            return
+        with self.lock:
+            self._update(patient_id, lambda history: history._replace(
+                chronic_conditions=history.chronic_conditions + (condition_name,)))
+
+    def stats(self):
+        with self.lock:
+            return dict(self.counts, patients=len(self.entries), unmerged=len(self.unmerged))
@@ -0,0 +1,161 @@
+# pdf_cache.py -- Content-addressed cache for rendered prescription PDFs
+# A bounded in-memory LRU sits in front of a size-capped on-disk LRU, so a
+# repeated download of the same assessment is a memory hit or a single file read.
+# An optional shared cache_backend behind both lets a node reuse PDFs that other
+# nodes rendered.
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+
+def content_key(*parts):
+    """Stable SHA-256 of JSON-serialisable parts"""
+    payload = json.dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class PDFCache:
+    """Two-tier LRU cache of PDF bytes keyed by content hash.
+
+    The memory tier is bounded by entry count and total bytes; entries it
+    evicts stay on disk. The disk tier is bounded by total bytes and evicts
+    least recently used files (access order is rebuilt from mtimes at start).
+    shared, when given, is a third tier (a cache_backend, entries expiring
+    after shared_ttl seconds) consulted on a local miss and written on put.
+    """
+
+    def __init__(self, directory, memory_items=64, memory_bytes=16 * 1024 * 1024,
+                 disk_bytes=256 * 1024 * 1024, shared=None, shared_ttl=24 * 3600):
+        self.directory = directory
+        self.memory_items = memory_items
+        self.memory_bytes = memory_bytes
+        self.disk_bytes = disk_bytes
+        self.shared = shared
+        self.shared_ttl = shared_ttl
+        self.lock = threading.Lock()
+
+        self.memory = OrderedDict()      # key -> bytes
+        self.memory_size = 0
+        self.disk = OrderedDict()        # key -> file size, least recently used first
+        self.disk_size = 0
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "shared_hits": 0, "misses": 0, "disk_evictions": 0}
+
+        # PDFs carry patient names: the directory and files are readable by this user only
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        entries = []
+        for name in os.listdir(directory):
+            if name.endswith(".pdf"):
+                path = os.path.join(directory, name)
+                st = os.stat(path)
+                entries.append((st.st_mtime, name[:-4], st.st_size))
+        for _, key, size in sorted(entries):
+            self.disk[key] = size
+            self.disk_size += size
+        with self.lock:
+            self._evict_disk()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.pdf")
+
+    def _remember(self, key, data):
+        if len(data) > self.memory_bytes:
+            return
+        if key in self.memory:
+            self.memory_size -= len(self.memory.pop(key))
+        self.memory[key] = data
+        self.memory_size += len(data)
+        while len(self.memory) > self.memory_items or self.memory_size > self.memory_bytes:
+            _, old = self.memory.popitem(last=False)
+            self.memory_size -= len(old)
+
+    def _evict_disk(self):
+        while self.disk and self.disk_size > self.disk_bytes:
+            key, size = self.disk.popitem(last=False)
+            self.disk_size -= size
+            self.stats["disk_evictions"] += 1
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    def get(self, key):
+        """Cached PDF bytes or None"""
+        with self.lock:
+            data = self.memory.get(key)
+            if data is not None:
+                self.memory.move_to_end(key)
+                if key in self.disk:
+                    self.disk.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return data
+            on_disk = key in self.disk
+            if on_disk:
+                self.disk.move_to_end(key)
+        if not on_disk:
+            return self._get_shared(key)
+
+        try:
+            with open(self._path(key), "rb") as f:
+                data = f.read()
+            os.utime(self._path(key))
+        except OSError:
+            with self.lock:
+                self.disk_size -= self.disk.pop(key, 0)
+            return self._get_shared(key)
+
+        with self.lock:
+            self.stats["disk_hits"] += 1
+            self._remember(key, data)
+        return data
+
+    def _get_shared(self, key):
+        data = self.shared.get(f"pdf:{key}") if self.shared is not None else None
+        with self.lock:
+            if data is None:
+                self.stats["misses"] += 1
+                return None
+            self.stats["shared_hits"] += 1
+            self._remember(key, data)
+        return data
+
+    def put(self, key, data):
+        """Store PDF bytes in every tier (the file write is atomic)"""
+        if self.shared is not None:
+            self.shared.set(f"pdf:{key}", data, self.shared_ttl)
+        path = self._path(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with os.fdopen(os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600), "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+            path = None
+
+        with self.lock:
+            self._remember(key, data)
+            if path is not None:
+                self.disk_size -= self.disk.pop(key, 0)
+                self.disk[key] = len(data)
+                self.disk_size += len(data)
+                self._evict_disk()
+
+    def preload(self, limit=None):
+        """Read the most recently used disk entries into the memory tier; returns how many"""
+        with self.lock:
+            keys = list(reversed(self.disk))[:min(limit or self.memory_items, self.memory_items)]
+        loaded = 0
+        for key in reversed(keys):
+            try:
+                with open(self._path(key), "rb") as f:
+                    data = f.read()
+            except OSError:
+                continue
+            with self.lock:
+                if key in self.disk:
+                    self._remember(key, data)
+                    loaded += 1
+        return loaded
@@ -0,0 +1,238 @@
+# pdf_canvas.py -- Direct-canvas renderer for prescription content blocks
+# Lays the blocks from app.prescription_content out line by line at computed
+# coordinates and draws them straight onto a ReportLab canvas, skipping platypus
+# flowables. Positions follow platypus' own conventions (frame padding, first
+# baseline at top - fontSize, spaceBefore reduced by the previous spaceAfter) so
+# both renderers produce the same page. Content that does not fit raises CanvasOverflow.
+import re
+
+from reportlab.lib import colors
+from reportlab.lib.fonts import ps2tt, tt2ps
+from reportlab.lib.utils import ImageReader
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.pdfgen import canvas
+
+# Platypus Frame default padding on every side
+FRAME_PADDING = 6
+# Single-line table cells as platypus draws them with 6pt padding and the default 10/12 font
+TABLE_FONT_SIZE = 10
+TABLE_ROW_HEIGHT = 18
+TABLE_BASELINE = 5
+TABLE_PADDING = 6
+
+
+class CanvasOverflow(Exception):
+    """Content does not fit the fixed canvas layout; render it with flowables instead"""
+
+
+def run_font(style, bold):
+    """Font name for a run of a paragraph style, bold or not"""
+    family, style_bold, italic = ps2tt(style.fontName)
+    return tt2ps(family, style_bold or bold, italic)
+
+
+def wrap_runs(runs, style, width):
+    """Greedy word wrap of (text, bold, color) runs.
+
+    Whitespace collapses as in a Paragraph. Returns lines as
+    (width, [(text, font, color), ...]) with adjacent same-font pieces merged.
+    """
+    size = style.fontSize
+    words = []      # (pieces, width, font of the space before it or None)
+    space_font = None
+    for text, bold, color in runs:
+        font = run_font(style, bold)
+        for part in re.split(r"(\s+)", text):
+            if not part:
+                continue
+            if part.isspace():
+                space_font = font
+                continue
+            w = stringWidth(part, font, size)
+            if words and space_font is None:
+                # Glued to the previous word across a font change
+                pieces, prev_w, prev_space = words[-1]
+                words[-1] = (pieces + [(part, font, color)], prev_w + w, prev_space)
+            else:
+                words.append(([(part, font, color)], w, space_font if words else None))
+            space_font = None
+
+    lines = []
+    line, line_w = [], 0.0
+    for pieces, w, before in words:
+        if w > width:
+            raise CanvasOverflow(f"word wider than the line: {''.join(p[0] for p in pieces)[:40]}")
+        gap = stringWidth(" ", before, size) if before and line else 0.0
+        if line and line_w + gap + w > width:
+            lines.append((line_w, line))
+            line, line_w, gap = [], 0.0, 0.0
+        for i, (text, font, color) in enumerate(pieces):
+            if i == 0 and gap:
+                text = " " + text
+            if line and line[-1][1] == font and line[-1][2] == color:
+                line[-1] = (line[-1][0] + text, font, color)
+            else:
+                line.append((text, font, color))
+        line_w += gap + w
+    if line:
+        lines.append((line_w, line))
+    return lines
+
+
+class CanvasLayout:
+    """Pages of drawing operations for a sequence of documents.
+
+    Each page is a list of ("text", x, y, text, font, size, color),
+    ("grid", x, top, col_widths, rows) and ("image", path, x, y, w, h).
+    """
+
+    def __init__(self, pagesize, margins, styles, max_pages):
+        left, right, top, bottom = margins
+        self.page_width, self.page_height = pagesize
+        self.left = left + FRAME_PADDING
+        self.width = self.page_width - left - right - 2 * FRAME_PADDING
+        self.top = self.page_height - top - FRAME_PADDING
+        self.bottom = bottom + FRAME_PADDING
+        self.styles = styles
+        self.max_pages = max_pages
+        self.pages = []
+        self.new_page()
+
+    def new_page(self):
+        if len(self.pages) >= self.max_pages:
+            raise CanvasOverflow(f"more than {self.max_pages} pages")
+        self.ops = []
+        self.pages.append(self.ops)
+        self.y = self.top
+        self.at_top = True
+        self.prev_space_after = 0
+
+    def _fits(self, height):
+        """Start a new page unless height fits above the bottom margin"""
+        if self.y - height < self.bottom and not self.at_top:
+            self.new_page()
+
+    def paragraph(self, runs, style_name):
+        style = self.styles[style_name]
+        lines = wrap_runs(runs, style, self.width)
+        if not self.at_top:
+            self.y -= max(style.spaceBefore - self.prev_space_after, 0)
+        for line_w, pieces in lines:
+            self._fits(style.leading)
+            x = self.left
+            if style.alignment == 1:
+                x += (self.width - line_w) / 2
+            elif style.alignment == 2:
+                x += self.width - line_w
+            baseline = self.y - style.fontSize
+            for text, font, color in pieces:
+                self.ops.append(("text", x, baseline, text, font, style.fontSize, color))
+                x += stringWidth(text, font, style.fontSize)
+            self.y -= style.leading
+            self.at_top = False
+        self.y -= style.spaceAfter
+        self.prev_space_after = style.spaceAfter
+
+    def space(self, height):
+        if self.y - height < self.bottom:
+            # Platypus carries a spacer that does not fit to the top of the next page
+            self.new_page()
+        self.y -= height
+        self.at_top = False
+        self.prev_space_after = 0
+
+    def table(self, rows, col_widths):
+        for row in rows:
+            for i, value in enumerate(row):
+                font = "Helvetica-Bold" if i == 0 else "Helvetica"
+                if stringWidth(value, font, TABLE_FONT_SIZE) > col_widths[i] - 2 * TABLE_PADDING:
+                    raise CanvasOverflow(f"table cell too wide: {value[:40]}")
+        height = TABLE_ROW_HEIGHT * len(rows)
+        self._fits(height)
+        x = self.left + (self.width - sum(col_widths)) / 2
+        self.ops.append(("grid", x, self.y, col_widths, rows))
+        self.y -= height
+        self.at_top = False
+        self.prev_space_after = 0
+
+    def image(self, path, height):
+        reader = ImageReader(path)
+        w, h = reader.getSize()
+        width = height * w / h
+        self._fits(height)
+        self.ops.append(("image", path, self.left + (self.width - width) / 2, self.y - height, width, height))
+        self.y -= height
+        self.at_top = False
+        self.prev_space_after = 0
+
+    def document(self, blocks):
+        """Lay out one patient's blocks, starting on a fresh page"""
+        if self.ops:
+            self.new_page()
+        for block in blocks:
+            kind = block[0]
+            if kind == "para":
+                self.paragraph(block[1], block[2])
+            elif kind == "space":
+                self.space(block[1])
+            elif kind == "table":
+                self.table(block[1], block[2])
+            elif kind == "image":
+                self.image(block[1], block[2])
+
+
+def draw_grid(c, x, top, col_widths, rows):
+    bottom = top - TABLE_ROW_HEIGHT * len(rows)
+    right = x + sum(col_widths)
+    c.setLineWidth(1)
+    c.setStrokeColor(colors.black)
+    for r, row in enumerate(rows):
+        y = top - TABLE_ROW_HEIGHT * (r + 1)
+        cx = x
+        for i, value in enumerate(row):
+            c.setFont("Helvetica-Bold" if i == 0 else "Helvetica", TABLE_FONT_SIZE)
+            c.drawString(cx + TABLE_PADDING, y + TABLE_BASELINE, value)
+            cx += col_widths[i]
+        c.line(x, y, right, y)
+    c.line(x, top, right, top)
+    cx = x
+    for w in [0] + list(col_widths):
+        cx += w
+        c.line(cx, bottom, cx, top)
+
+
+def render_canvas(output, documents, styles, pagesize, margins, on_page=None, max_pages=3):
+    """Draw each document's blocks (a new page per document) to output.
+
+    Layout completes before anything is written, so CanvasOverflow leaves
+    output untouched. max_pages bounds the pages of any one document.
+    """
+    pages = []
+    for blocks in documents:
+        layout = CanvasLayout(pagesize, margins, styles, max_pages)
+        layout.document(blocks)
+        pages.extend(layout.pages)
+
+    c = canvas.Canvas(output, pagesize=pagesize)
+    for ops in pages:
+        if on_page is not None:
+            on_page(c, None)
+        fill = None
+        for op in ops:
+            kind = op[0]
+            if kind == "text":
+                _, x, y, text, font, size, color = op
+                if color != fill:
+                    c.setFillColor(colors.toColor(color) if color else colors.black)
+                    fill = color
+                c.setFont(font, size)
+                c.drawString(x, y, text)
+            elif kind == "grid":
+                c.setFillColor(colors.black)
+                fill = None
+                draw_grid(c, *op[1:])
+            elif kind == "image":
+                _, path, x, y, w, h = op
+                c.drawImage(path, x, y, w, h, mask="auto")
+        c.showPage()
+    c.save()
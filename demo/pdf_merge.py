@@ -0,0 +1,139 @@
+# pdf_merge.py -- Concatenate PDF files into one, streaming objects to the output
+# Batch exports render the combined document in runs on several workers; the runs
+# are appended here one at a time. Each run's objects are renumbered and written
+# out as they are read, and its page tree hangs under one new root, so memory
+# holds a single run plus one offset per object however long the document is.
+# Handles files with a classic xref table (what ReportLab writes), not PDF 1.5
+# cross-reference or object streams.
+import re
+
+_HEADER = re.compile(rb"%PDF-(\d\.\d)")
+_OBJECT = re.compile(rb"\s*(\d+)\s+(\d+)\s+obj\b")
+_REFERENCE = re.compile(rb"\b(\d+)\s+(\d+)\s+R\b")
+_STREAM = re.compile(rb">>\s*stream\r?\n")
+
+
+def _entry(dictionary, name):
+    """Object number an indirect reference /name points to, or None"""
+    match = re.search(rb"/" + name + rb"\s+(\d+)\s+\d+\s+R\b", dictionary)
+    return int(match.group(1)) if match else None
+
+
+def _read_objects(data):
+    """({object number: bytes between 'obj' and 'endobj'}, trailer dictionary)"""
+    start = data.rfind(b"startxref")
+    if start < 0:
+        raise ValueError("not a PDF: no startxref")
+    xref = int(data[start + 9:].split()[0])
+    if not data.startswith(b"xref", xref):
+        raise ValueError("PDF without a classic xref table is not supported")
+    trailer_at = data.index(b"trailer", xref)
+    fields = data[xref + 4:trailer_at].split()
+    offsets = {}
+    i = 0
+    while i < len(fields):
+        first, count = int(fields[i]), int(fields[i + 1])
+        i += 2
+        for number in range(first, first + count):
+            if fields[i + 2] == b"n":
+                offsets[number] = int(fields[i])
+            i += 3
+    trailer = data[trailer_at + 7:data.index(b"startxref", trailer_at)]
+
+    # An object runs up to the next one (or the xref), so stream data is never scanned
+    bounds = sorted(offsets.values()) + [xref]
+    following = dict(zip(bounds, bounds[1:]))
+    objects = {}
+    for number, offset in offsets.items():
+        match = _OBJECT.match(data, offset)
+        if match is None or int(match.group(1)) != number:
+            raise ValueError(f"xref entry for object {number} does not point at it")
+        body = data[match.end():following[offset]].rstrip()
+        if not body.endswith(b"endobj"):
+            raise ValueError(f"object {number} is not terminated")
+        objects[number] = body[:-6].strip()
+    return objects, trailer
+
+
+class PdfConcatenator:
+    """Writes the pages of several PDFs, in order, into the binary file output.
+
+    append(path) adds one file and returns its page count; close() writes the
+    root page tree, catalog and xref. Objects 1 and 2 are reserved for the
+    root Pages and Catalog, which are only known once every file is in.
+    """
+
+    def __init__(self, output):
+        self.output = output
+        self.offsets = {}   # object number -> byte offset in output
+        self.next_number = 3
+        self.kids = []      # page tree root of each appended file
+        self.pages = 0
+        self.started = False
+
+    def _write(self, data):
+        self.output.write(data)
+        self.position += len(data)
+
+    def append(self, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        header = _HEADER.match(data)
+        if header is None:
+            raise ValueError(f"{path} is not a PDF")
+        objects, trailer = _read_objects(data)
+        root = _entry(trailer, b"Root")
+        pages = _entry(objects[root], b"Pages") if root in objects else None
+        if pages is None or pages not in objects:
+            raise ValueError(f"{path} has no page tree")
+        if not self.started:
+            self.position = 0
+            self._write(b"%PDF-" + header.group(1) + b"\n%\x93\x8c\x8b\x9e\n")
+            self.started = True
+
+        # The catalog and document info are replaced by the merged document's own
+        dropped = {root, _entry(trailer, b"Info")}
+        numbers = {}
+        for number in sorted(objects):
+            if number not in dropped:
+                numbers[number] = self.next_number
+                self.next_number += 1
+
+        def renumber(match):
+            number = numbers.get(int(match.group(1)))
+            return b"%d 0 R" % number if number is not None else b"null"
+
+        for number, new_number in numbers.items():
+            body = objects[number]
+            stream = _STREAM.search(body)
+            head, tail = (body[:stream.start()], body[stream.start():]) if stream else (body, b"")
+            head = _REFERENCE.sub(renumber, head)
+            if number == pages:
+                head = head.replace(b"<<", b"<< /Parent 1 0 R", 1)
+            self.offsets[new_number] = self.position
+            self._write(b"%d 0 obj\n%s%s\nendobj\n" % (new_number, head, tail))
+
+        count = re.search(rb"/Count\s+(\d+)", objects[pages])
+        added = int(count.group(1)) if count else 0
+        self.kids.append(numbers[pages])
+        self.pages += added
+        return added
+
+    def close(self):
+        """Finish the document; returns the total page count"""
+        if not self.started:
+            raise ValueError("no PDF was appended")
+        kids = b" ".join(b"%d 0 R" % kid for kid in self.kids)
+        for number, body in ((1, b"<< /Count %d /Kids [ %s ] /Type /Pages >>" % (self.pages, kids)),
+                             (2, b"<< /Pages 1 0 R /Type /Catalog >>")):
+            self.offsets[number] = self.position
+            self._write(b"%d 0 obj\n%s\nendobj\n" % (number, body))
+        xref = self.position
+        size = self.next_number
+        entries = [b"0000000000 65535 f \n"]
+        for number in range(1, size):
+            offset = self.offsets.get(number)
+            entries.append(b"%010d 00000 n \n" % offset if offset is not None else b"0000000000 65535 f \n")
+        self._write(b"xref\n0 %d\n%s" % (size, b"".join(entries)))
+        self._write(b"trailer\n<< /Root 2 0 R /Size %d >>\nstartxref\n%d\n%%%%EOF\n" % (size, xref))
+        return self.pages
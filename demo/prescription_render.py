@@ -0,0 +1,154 @@
+# prescription_render.py -- Page layout of prescriptions, from content blocks to PDF
+# app.prescription_content decides what a prescription says; this module only lays
+# the blocks out, with platypus flowables or pdf_canvas. It depends on ReportLab
+# alone, so batch export workers import it instead of the whole app.
+import io
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import letter
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image, PageTemplate, Frame, PageBreak
+from pdf_canvas import render_canvas, CanvasOverflow
+
+PDF_PAGE_MARGINS = (72, 72, 72, 72)  # left, right, top, bottom
+
+def add_prescription_border(canvas, doc):
+    """onPage callback: rounded border around every prescription page"""
+    canvas.saveState()
+    # Draw a rectangle border with rounded corners
+    canvas.setStrokeColorRGB(0.2, 0.2, 0.2)  # Dark gray color
+    canvas.setLineWidth(2)
+    # Leave 0.5 inch margin from edges
+    margin = 36  # 0.5 inch in points
+    width, height = letter
+    canvas.roundRect(margin, margin, width - 2*margin, height - 2*margin, radius=10)
+    canvas.restoreState()
+
+def build_prescription_document(output, stories):
+    """Lay out one or more prescription stories into output, starting each on a new page"""
+    doc = SimpleDocTemplate(
+        output,
+        pagesize=letter,
+        leftMargin=PDF_PAGE_MARGINS[0],
+        rightMargin=PDF_PAGE_MARGINS[1],
+        topMargin=PDF_PAGE_MARGINS[2],
+        bottomMargin=PDF_PAGE_MARGINS[3]
+    )
+
+    # Create a frame for the content
+    frame = Frame(
+        doc.leftMargin,
+        doc.bottomMargin,
+        doc.width,
+        doc.height,
+        id='normal'
+    )
+
+    # Create PageTemplate with frame and onPage callback
+    template = PageTemplate(
+        'normal',
+        [frame],
+        onPage=add_prescription_border
+    )
+    doc.addPageTemplates([template])
+
+    elements = []
+    for story in stories:
+        if elements:
+            elements.append(PageBreak())
+        elements.extend(story)
+
+    # Build PDF with border
+    doc.build(elements)
+
+def prescription_styles():
+    """Paragraph styles of the prescription layout, shared by both renderers"""
+    # Get the default style sheet and define custom styles
+    styles = getSampleStyleSheet()
+    return {
+        "title": ParagraphStyle(
+            'CustomTitle',
+            parent=styles['Heading1'],
+            fontSize=16,
+            spaceAfter=30,
+            alignment=1  # Center alignment
+        ),
+        "normal": ParagraphStyle(
+            'CustomNormal',
+            parent=styles['Normal'],
+            fontSize=12,
+            leading=14
+        ),
+        "heading": ParagraphStyle(
+            'CustomHeading',
+            parent=styles['Heading2'],
+            fontSize=14,
+            spaceAfter=12,
+            spaceBefore=12
+        ),
+        "footer": ParagraphStyle('Footer', parent=styles['Italic'], fontSize=8),
+    }
+
+PRESCRIPTION_STYLES = prescription_styles()
+def run_markup(runs):
+    """Paragraph markup for (text, bold, color) runs"""
+    markup = []
+    for text, bold, color in runs:
+        if bold:
+            text = f"<b>{text}</b>"
+        if color:
+            text = f'<font color="{color}">{text}</font>'
+        markup.append(text)
+    return "".join(markup)
+
+def story_from_content(blocks):
+    """Platypus flowables for prescription_content blocks"""
+    elements = []
+    for block in blocks:
+        kind = block[0]
+        if kind == "para":
+            elements.append(Paragraph(run_markup(block[1]), PRESCRIPTION_STYLES[block[2]]))
+        elif kind == "space":
+            elements.append(Spacer(1, block[1]))
+        elif kind == "table":
+            t = Table(block[1], colWidths=block[2])
+            t.setStyle(TableStyle([
+                ('GRID', (0, 0), (-1, -1), 1, colors.black),
+                ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+                ('PADDING', (0, 0), (-1, -1), 6),
+            ]))
+            elements.append(t)
+        elif kind == "image":
+            signature = Image(block[1])
+            # Adjust width proportionally to the requested height
+            aspect_ratio = signature.imageWidth / signature.imageHeight
+            signature.drawHeight = block[2]
+            signature.drawWidth = block[2] * aspect_ratio
+            signature.hAlign = 'CENTER'
+            elements.append(signature)
+    return elements
+
+def render_prescriptions(output, contents, renderer="flowable"):
+    """Write content block lists to output (a path or file), each patient starting a
+    new page; returns the renderer used ("canvas" falls back to "flowable")"""
+    contents = list(contents)
+    if renderer == "canvas":
+        try:
+            render_canvas(output, contents, PRESCRIPTION_STYLES, letter, PDF_PAGE_MARGINS,
+                          on_page=add_prescription_border)
+            return "canvas"
+        except CanvasOverflow:
+            pass
+    build_prescription_document(output, [story_from_content(blocks) for blocks in contents])
+    return "flowable"
+
+def render_pdf(blocks, renderer="flowable"):
+    """Worker: PDF bytes of one patient's content blocks"""
+    buffer = io.BytesIO()
+    render_prescriptions(buffer, [blocks], renderer)
+    return buffer.getvalue()
+
+def render_file(path, contents, renderer="flowable"):
+    """Worker: write several patients' content blocks to the PDF file path"""
+    render_prescriptions(path, contents, renderer)
+    return path
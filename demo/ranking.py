@@ -0,0 +1,88 @@
+# ranking.py -- Precomputed top-k medicine rankings per catalog bucket
+# A bucket is (category, indication, age group); indication None means "any".
+# Rankings are built once when the catalog loads so a request only reads k entries.
+import heapq
+
+AGE_GROUPS = ["infant", "child", "adolescent", "adult", "elderly"]
+
+# How suitable each dosage form is for self-administration in an age group (0-1)
+FORM_SUITABILITY = {
+    "infant":     {"drops": 1.0, "syrup": 0.9, "cream": 0.6, "ointment": 0.6, "inhaler": 0.2, "tablet": 0.1, "capsule": 0.1, "injection": 0.1},
+    "child":      {"syrup": 1.0, "drops": 0.8, "cream": 0.7, "ointment": 0.7, "tablet": 0.6, "inhaler": 0.5, "capsule": 0.4, "injection": 0.1},
+    "adolescent": {"tablet": 1.0, "capsule": 0.9, "syrup": 0.8, "cream": 0.8, "ointment": 0.8, "drops": 0.7, "inhaler": 0.6, "injection": 0.2},
+    "adult":      {"tablet": 1.0, "capsule": 1.0, "cream": 0.8, "ointment": 0.8, "syrup": 0.7, "drops": 0.7, "inhaler": 0.6, "injection": 0.2},
+    "elderly":    {"syrup": 0.9, "tablet": 0.8, "drops": 0.8, "cream": 0.8, "ointment": 0.8, "capsule": 0.6, "inhaler": 0.5, "injection": 0.2},
+}
+
+# Topical forms are the right choice for these categories at any age
+TOPICAL_CATEGORIES = {"antiseptic", "antifungal"}
+TOPICAL_FORMS = {"cream", "ointment"}
+
+# Lower strengths are preferred, more strongly for the youngest and oldest patients
+STRENGTH_WEIGHT = {"infant": 0.4, "child": 0.35, "adolescent": 0.2, "adult": 0.15, "elderly": 0.35}
+FORM_WEIGHT = 0.6
+MANUFACTURER_WEIGHT = 0.1
+
+DEFAULT_TOP_K = 3
+
+
+def form_score(category, dosage_form, age_group):
+    """Suitability of a (lower-cased) dosage form for a category and age group"""
+    if category in TOPICAL_CATEGORIES and dosage_form in TOPICAL_FORMS:
+        return 1.0
+    return FORM_SUITABILITY[age_group].get(dosage_form, 0.5)
+
+
+class TopKIndex:
+    """Top-k medicines for every (category, indication, age group) bucket.
+
+    Buckets are keyed by the catalog's integer codes. The index is built in
+    one pass over the medicine list with a bounded min-heap per bucket;
+    lookups return the stored ranking without touching the catalog.
+    """
+
+    def __init__(self, meds, catalog, k=DEFAULT_TOP_K, preferred_manufacturers=()):
+        self.k = k
+        preferred = {catalog.code("manufacturer", m.lower()) for m in preferred_manufacturers}
+        categories, indications = catalog.codes["category"], catalog.codes["indication"]
+        forms, makers = catalog.codes["dosage_form"], catalog.codes["manufacturer"]
+        category_names = catalog.lowered["category"]
+        form_names = catalog.lowered["dosage_form"]
+
+        strengths = [
+            catalog.strength_values[med.catalog_row] if catalog.strength_units[med.catalog_row] == "mg" else None
+            for med in meds
+        ]
+        known = [s for s in strengths if s is not None]
+        low, high = (min(known), max(known)) if known else (0.0, 0.0)
+        span = (high - low) or 1.0
+
+        heaps = {}
+        for pos, med in enumerate(meds):
+            row = med.catalog_row
+            category, indication, form = categories[row], indications[row], forms[row]
+            strength = strengths[pos]
+            strength_score = 0.5 if strength is None else 1.0 - (strength - low) / span
+            maker_score = 1.0 if makers[row] in preferred else 0.0
+
+            for age_group in AGE_GROUPS:
+                score = (FORM_WEIGHT * form_score(category_names[category], form_names[form], age_group)
+                         + STRENGTH_WEIGHT[age_group] * strength_score
+                         + MANUFACTURER_WEIGHT * maker_score)
+                # Earlier medicines win ties, matching the old CSV-order behaviour
+                entry = (round(score, 6), -pos)
+                for key in ((category, indication, age_group), (category, None, age_group)):
+                    heap = heaps.setdefault(key, [])
+                    if len(heap) < k:
+                        heapq.heappush(heap, entry)
+                    elif entry > heap[0]:
+                        heapq.heapreplace(heap, entry)
+
+        self.buckets = {
+            key: [(-neg_pos, score) for score, neg_pos in sorted(heap, reverse=True)]
+            for key, heap in heaps.items()
+        }
+
+    def top(self, category_code, indication_code=None, age_group="adult"):
+        """Ranked [(position in meds, score), ...] for a bucket, best first"""
+        return self.buckets.get((category_code, indication_code, age_group), [])
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+# redis_standin.py -- Minimal Redis-protocol server for running and testing RedisCache locally
+# Speaks enough RESP for cache_backend.RedisCache and redis-cli: PING, GET, SET
+# (EX/PX/NX/XX), DEL, EXISTS, PTTL, DBSIZE, FLUSHDB, SELECT and AUTH. One dict
+# per database, expiry checked when a key is read; not for production use.
+#
+# CLI:  python redis_standin.py --port 6390
+#       CACHE_URL=redis://127.0.0.1:6390/0 python app.py    (on each node)
+import argparse
+import socketserver
+import threading
+import time
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        db = 0
+        while True:
+            try:
+                args = self._read_command()
+            except (ConnectionError, ValueError):
+                return
+            if args is None:
+                return
+            name = args[0].upper()
+            if name == b"SELECT":
+                db = int(args[1])
+                reply = b"+OK\r\n"
+            elif name == b"QUIT":
+                self.wfile.write(b"+OK\r\n")
+                return
+            else:
+                reply = self.server.execute(db, name, args[1:])
+            self.wfile.write(reply)
+
+    def _read_command(self):
+        line = self.rfile.readline()
+        if not line:
+            return None
+        if not line.startswith(b"*"):
+            return line.split()  # inline command (e.g. typed over telnet)
+        args = []
+        for _ in range(int(line[1:])):
+            length = int(self.rfile.readline()[1:])
+            data = self.rfile.read(length + 2)
+            if len(data) != length + 2:
+                raise ConnectionError("client went away")
+            args.append(data[:-2])
+        return args
+
+
+def _bulk(value):
+    return b"$-1\r\n" if value is None else b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+class RedisStandIn(socketserver.ThreadingTCPServer):
+    """Threaded RESP server over in-memory dicts; port 0 picks a free port (see .port)"""
+
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host="127.0.0.1", port=0, clock=time.monotonic):
+        super().__init__((host, port), _Handler)
+        self.port = self.server_address[1]
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.databases = {}  # db -> {key: (value, expires_at or None)}
+
+    def _live(self, data, key):
+        entry = data.get(key)
+        if entry is not None and entry[1] is not None and entry[1] <= self.clock():
+            del data[key]
+            return None
+        return entry
+
+    def execute(self, db, name, args):
+        """RESP reply bytes for one command"""
+        with self.lock:
+            data = self.databases.setdefault(db, {})
+            try:
+                if name == b"PING":
+                    return b"+PONG\r\n" if not args else _bulk(args[0])
+                if name == b"AUTH":
+                    return b"+OK\r\n"
+                if name == b"GET":
+                    entry = self._live(data, args[0])
+                    return _bulk(entry[0] if entry else None)
+                if name == b"SET":
+                    key, value, options = args[0], args[1], [a.upper() for a in args[2:]]
+                    expires_at = None
+                    for unit, scale in ((b"EX", 1.0), (b"PX", 0.001)):
+                        if unit in options:
+                            expires_at = self.clock() + int(options[options.index(unit) + 1]) * scale
+                    exists = self._live(data, key) is not None
+                    if (b"NX" in options and exists) or (b"XX" in options and not exists):
+                        return _bulk(None)
+                    data[key] = (value, expires_at)
+                    return b"+OK\r\n"
+                if name in (b"DEL", b"EXISTS"):
+                    found = [key for key in args if self._live(data, key) is not None]
+                    if name == b"DEL":
+                        for key in found:
+                            del data[key]
+                    return b":%d\r\n" % len(found)
+                if name == b"PTTL":
+                    entry = self._live(data, args[0])
+                    if entry is None:
+                        return b":-2\r\n"
+                    return b":%d\r\n" % (-1 if entry[1] is None else int((entry[1] - self.clock()) * 1000))
+                if name == b"DBSIZE":
+                    return b":%d\r\n" % sum(1 for key in list(data) if self._live(data, key) is not None)
+                if name == b"FLUSHDB":
+                    data.clear()
+                    return b"+OK\r\n"
+            except (IndexError, ValueError):
+                return b"-ERR syntax error\r\n"
+            return b"-ERR unknown command '%s'\r\n" % name
+
+    def start(self):
+        """Serve from a daemon thread; returns self"""
+        threading.Thread(target=self.serve_forever, name="redis-standin", daemon=True).start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Minimal Redis-protocol server for local multi-node runs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6390)
+    args = parser.parse_args()
+    server = RedisStandIn(args.host, args.port)
+    print(f"Redis stand-in listening on {args.host}:{server.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,132 @@
+# scoring.py -- Vectorized symptom scoring over a keyword-vocabulary bitmask
+# Every keyword the cluster weights, severity tiers or keyword signals mention is a
+# column of one vocabulary. A symptom is encoded once (and cached) as the columns
+# of the keywords it contains, a sparse row of a symptoms x vocabulary bitmask.
+# For a batch of patients, cluster scores, severity and keyword counts are then
+# per-patient reductions over those cells and matrix products with fixed weights.
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+
+# Weights are held as integer hundredths, so sums and threshold checks are exact
+SCALE = 100
+
+
+def fixed(value):
+    """value in integer hundredths"""
+    scaled = round(value * SCALE)
+    if abs(scaled - value * SCALE) > 1e-6:
+        raise ValueError(f"weight {value} has more than two decimals")
+    return scaled
+
+
+# Per symptom: tier index (len(tiers) = unmatched) and the index of its keyword in that
+# tier; per patient: severity, cluster scores and keyword-signal counts. offsets[i] is
+# the row of patient i's first symptom.
+BatchScores = namedtuple("BatchScores", ["offsets", "tiers", "keywords", "severity", "clusters", "signals"])
+
+
+class SymptomScorer:
+    """Cluster, severity and keyword-count scoring as matrix operations.
+
+    clusters: {name: {"symptoms": {keyword: weight}, "threshold": t}}; a symptom
+    adds the weight of every cluster keyword it contains.
+    tiers: [(tier name, {keyword: points})] in precedence order; a symptom takes
+    the points of the first keyword of the first tier it matches, else unmatched.
+    keyword_sets: {signal: [keywords]}; a patient's count is how many of the
+    keywords appear in any of their symptoms.
+    """
+
+    def __init__(self, clusters, tiers, keyword_sets, unmatched=("mild", 0.5), cache_size=4096):
+        vocabulary = {}
+        for cluster in clusters.values():
+            vocabulary.update(dict.fromkeys(cluster["symptoms"]))
+        for _, weights in tiers:
+            vocabulary.update(dict.fromkeys(weights))
+        for keywords in keyword_sets.values():
+            vocabulary.update(dict.fromkeys(keywords))
+        self.vocabulary = list(vocabulary)
+        column = {keyword: i for i, keyword in enumerate(self.vocabulary)}
+
+        self.cluster_names = list(clusters)
+        # Float64 holds the integer hundredths exactly and lets the products use BLAS
+        self.cluster_weights = np.zeros((len(self.vocabulary), len(clusters)))
+        for j, cluster in enumerate(clusters.values()):
+            for keyword, weight in cluster["symptoms"].items():
+                self.cluster_weights[column[keyword], j] = fixed(weight)
+
+        self.tier_names = [name for name, _ in tiers] + [unmatched[0]]
+        self.tier_values = [list(weights.values()) for _, weights in tiers] + [[unmatched[1]]]
+        # Every (tier, keyword) entry ranked by precedence; a column's rank is its best entry's,
+        # so the lowest rank among a symptom's columns is the keyword that classifies it
+        entries = [(t, k, column[keyword], fixed(points))
+                   for t, (_, weights) in enumerate(tiers) for k, (keyword, points) in enumerate(weights.items())]
+        entries.append((len(tiers), 0, None, fixed(unmatched[1])))
+        self.unmatched_rank = len(entries) - 1
+        self.column_rank = np.full(len(self.vocabulary), self.unmatched_rank, dtype=np.intp)
+        for rank, (_, _, col, _) in reversed(list(enumerate(entries[:-1]))):
+            self.column_rank[col] = rank
+        self.rank_tier = np.array([t for t, _, _, _ in entries], dtype=np.intp)
+        self.rank_keyword = np.array([k for _, k, _, _ in entries], dtype=np.intp)
+        self.rank_points = np.array([p for _, _, _, p in entries], dtype=np.int64)
+
+        self.signal_names = list(keyword_sets)
+        self.signal_matrix = np.zeros((len(self.vocabulary), len(keyword_sets)))
+        for j, keywords in enumerate(keyword_sets.values()):
+            self.signal_matrix[[column[k] for k in keywords], j] = 1
+
+        self.encode = lru_cache(maxsize=cache_size)(self._encode)
+
+    def _encode(self, symptom):
+        """Vocabulary columns of the keywords contained in a (normalized) symptom"""
+        return tuple(i for i, keyword in enumerate(self.vocabulary) if keyword in symptom)
+
+    def cells(self, patients):
+        """Sparse encoding of a batch: (offsets, patient of each symptom, symptom row and
+        vocabulary column of each keyword found)"""
+        offsets, owners, rows, cols = [], [], [], []
+        row = 0
+        for patient, symptoms in enumerate(patients):
+            offsets.append(row)
+            for symptom in symptoms:
+                encoded = self.encode(symptom)
+                owners.append(patient)
+                rows.extend([row] * len(encoded))
+                cols.extend(encoded)
+                row += 1
+        as_index = lambda values: np.array(values, dtype=np.intp)
+        return as_index(offsets), as_index(owners), as_index(rows), as_index(cols)
+
+    def score(self, patients):
+        """BatchScores for a list of symptom lists (each list non-empty)"""
+        offsets, owners, rows, cols = self.cells(patients)
+        width = len(self.vocabulary)
+
+        # Each symptom is classified by its lowest-ranked keyword
+        ranks = np.full(len(owners), self.unmatched_rank, dtype=np.intp)
+        np.minimum.at(ranks, rows, self.column_rank[cols])
+        points = self.rank_points[ranks]
+        # patients x vocabulary: how many of a patient's symptoms contain each keyword
+        counts = np.bincount(owners[rows] * width + cols, minlength=len(patients) * width)
+        counts = counts.reshape(len(patients), width).astype(float)
+        return BatchScores(
+            offsets=offsets,
+            tiers=self.rank_tier[ranks],
+            keywords=self.rank_keyword[ranks],
+            severity=np.bincount(owners, weights=points, minlength=len(patients)) / SCALE,
+            clusters=(counts @ self.cluster_weights) / SCALE,
+            signals=(counts > 0) @ self.signal_matrix,
+        )
+
+    def breakdown(self, scores, i, symptoms):
+        """[(symptom, tier name, points), ...] for patient i, points as given in the tiers"""
+        start = int(scores.offsets[i])
+        tiers = scores.tiers[start:start + len(symptoms)].tolist()
+        keywords = scores.keywords[start:start + len(symptoms)].tolist()
+        return [(symptom, self.tier_names[t], self.tier_values[t][k])
+                for symptom, t, k in zip(symptoms, tiers, keywords)]
+
+    def signal_table(self, scores):
+        """(names, patients x signals float matrix): cluster scores then keyword counts"""
+        return self.cluster_names + self.signal_names, np.hstack((scores.clusters, scores.signals))
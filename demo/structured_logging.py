@@ -0,0 +1,140 @@
+# structured_logging.py -- Queue-backed JSON logging with correlation ids and PHI redaction
+# Request threads only filter a record and put it on a bounded queue; a listener
+# thread formats it as one JSON line and writes it. Debug records are sampled per
+# correlation id (all or nothing for a request), patient fields are redacted, and
+# records are dropped (and counted) rather than blocking when the queue is full.
+import contextvars
+import datetime
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import uuid
+import zlib
+
+LOGGER_NAME = "cds"
+QUEUE_SIZE = 10000
+REDACTED = "[REDACTED]"
+# Patient-identifying or clinical fields never written to logs
+PHI_FIELDS = {
+    "patientname", "patient_name", "name", "age", "sex", "weight", "height",
+    "symptoms", "symptomtexts", "symptom_texts", "symptoms_text", "patient", "patient_data",
+    "patientid", "patient_id",
+}
+
+CORRELATION_ID = contextvars.ContextVar("correlation_id", default=None)
+
+
+def get_logger(name):
+    """Child of the "cds" logger, e.g. get_logger("app") -> "cds.app" """
+    return logging.getLogger(f"{LOGGER_NAME}.{name}")
+
+
+def new_correlation_id(incoming=None):
+    """Use a sane incoming X-Request-ID or make one; set it for the current context"""
+    cid = incoming if incoming and len(incoming) <= 64 and incoming.isprintable() else uuid.uuid4().hex
+    CORRELATION_ID.set(cid)
+    return cid
+
+
+def log_event(logger, level, event, **fields):
+    """Log an event name with structured fields (redacted when written)"""
+    if logger.isEnabledFor(level):
+        logger.log(level, event, extra={"fields": fields})
+
+
+def redact(value):
+    """Copy of value with PHI_FIELDS keys masked at any depth"""
+    if isinstance(value, dict):
+        return {k: REDACTED if str(k).lower() in PHI_FIELDS else redact(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [redact(v) for v in value]
+    return value
+
+
+class ContextFilter(logging.Filter):
+    """Stamps the correlation id and samples debug records (runs on the calling thread)"""
+
+    def __init__(self, debug_sample_rate):
+        super().__init__()
+        self.debug_sample_rate = debug_sample_rate
+
+    def filter(self, record):
+        record.correlation_id = CORRELATION_ID.get()
+        if record.levelno > logging.DEBUG or self.debug_sample_rate >= 1:
+            return True
+        if record.correlation_id:
+            # Same decision for every debug record of a request
+            bucket = zlib.crc32(record.correlation_id.encode()) % 10000
+        else:
+            bucket = random.randrange(10000)
+        return bucket < self.debug_sample_rate * 10000
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that never blocks: records beyond the queue bound are counted and dropped"""
+
+    def __init__(self, q):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # Leave formatting to the listener thread; only freeze exception text here
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        record.message = record.getMessage()
+        record.msg, record.args = record.message, None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record: ts, level, logger, event, correlation_id, fields, exc"""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.datetime.fromtimestamp(record.created, datetime.timezone.utc).isoformat(),
+            "level": record.levelname.lower(),
+            "logger": record.name,
+            "event": record.getMessage(),
+            "correlation_id": getattr(record, "correlation_id", None),
+        }
+        entry.update(redact(getattr(record, "fields", {})))
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+def configure_logging(level="INFO", debug_sample_rate=0.01, stream=None):
+    """Attach the queue pipeline to the "cds" logger and start its listener.
+
+    Returns (listener, queue_handler); call stop_logging(listener) to flush at exit.
+    """
+    handler = logging.StreamHandler(stream or sys.stderr)
+    handler.setFormatter(JsonFormatter())
+    log_queue = queue.Queue(QUEUE_SIZE)
+    listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=False)
+
+    queue_handler = DroppingQueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter(debug_sample_rate))
+
+    logger = logging.getLogger(LOGGER_NAME)
+    logger.handlers[:] = [queue_handler]
+    logger.setLevel(level)
+    logger.propagate = False
+    listener.start()
+    return listener, queue_handler
+
+
+def stop_logging(listener):
+    """Flush queued records and stop the listener thread (safe to call more than once)"""
+    if listener._thread is not None:
+        listener.stop()
@@ -0,0 +1,106 @@
+# symptom_normalizer.py -- Map free-text symptoms onto the known symptom vocabulary
+# Triage rules only fire on exact keyword substrings, so misspellings such as
+# "sore throught" or variants such as "head ache" are normalized first.
+from functools import lru_cache
+
+
+def _compact(text):
+    return "".join(text.lower().split())
+
+
+def _trigrams(text):
+    padded = f"$${text}$"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class SymptomNormalizer:
+    """Trigram index over the canonical vocabulary.
+
+    normalize() compares the whole phrase and every window of up to three
+    words against the vocabulary (Dice coefficient over space-insensitive
+    trigrams) and replaces the best window above the threshold with its
+    canonical keyword. Words that already form a keyword only get spacing
+    fixes ("head ache" -> "headache"); the other words are still matched. Results are cached per input
+    string.
+    """
+
+    def __init__(self, vocabulary, threshold=0.6, max_window=3, cache_size=4096):
+        # Longest first so exact-substring checks see "sore throat" before "sore"
+        self.terms = sorted({t.strip().lower() for t in vocabulary if t and t.strip()},
+                            key=lambda t: (-len(t), t))
+        self.threshold = threshold
+        self.max_window = max_window
+
+        self.compact_terms = {_compact(term): term for term in self.terms}
+        self.term_grams = []
+        self.index = {}
+        for term_id, term in enumerate(self.terms):
+            grams = _trigrams(_compact(term))
+            self.term_grams.append(len(grams))
+            for gram in grams:
+                self.index.setdefault(gram, []).append(term_id)
+
+        self.normalize = lru_cache(maxsize=cache_size)(self._normalize)
+
+    def best_match(self, text):
+        """(term, score) of the closest vocabulary keyword, or (None, 0.0)"""
+        grams = _trigrams(_compact(text))
+        shared = {}
+        for gram in grams:
+            for term_id in self.index.get(gram, ()):
+                shared[term_id] = shared.get(term_id, 0) + 1
+
+        best_id, best_score = None, 0.0
+        for term_id, count in shared.items():
+            score = 2.0 * count / (len(grams) + self.term_grams[term_id])
+            if score > best_score:
+                best_id, best_score = term_id, score
+        return (self.terms[best_id], best_score) if best_id is not None else (None, 0.0)
+
+    @staticmethod
+    def _similar_length(compact, term):
+        # Stops "itchy" from growing into "itchy eyes"
+        a, b = len(compact), len(_compact(term))
+        return min(a, b) / max(a, b) >= 0.7
+
+    def _normalize(self, symptom):
+        symptom = symptom.strip().lower()
+        words = symptom.split()
+        windows = [(start, start + size)
+                   for size in range(min(self.max_window, len(words)), 0, -1)
+                   for start in range(len(words) - size + 1)]
+        # Words of a window that already is a keyword (up to spacing) are kept: only
+        # windows clear of them are fuzzy-matched ("severe headach" fixes "headach")
+        exact = {}
+        for start, end in windows:
+            term = self.compact_terms.get(_compact(" ".join(words[start:end])))
+            if term is not None:
+                exact[(start, end)] = term
+
+        best_score, best_span, best_term = 0.0, None, None
+        # Larger windows first, so on equal scores the longer phrase wins
+        for start, end in windows:
+            window = " ".join(words[start:end])
+            term = exact.get((start, end))
+            if term is not None:
+                # Spacing variant of a keyword ("head ache" -> "headache")
+                if term != window and best_score < 1.0:
+                    best_score, best_span, best_term = 1.0, (start, end), term
+                continue
+            compact = _compact(window)
+            if len(compact) < 4 or any(start < b and a < end for a, b in exact):
+                continue
+            term, score = self.best_match(window)
+            if term is None or not self._similar_length(compact, term):
+                continue
+            if score >= self.threshold and score > best_score:
+                best_score, best_span, best_term = score, (start, end), term
+
+        if best_span is None:
+            return symptom
+        start, end = best_span
+        return " ".join(words[:start] + [best_term] + words[end:])
+
+    def normalize_text(self, symptoms_text):
+        """Normalize a comma-separated symptom string item by item"""
+        return ", ".join(self.normalize(s) for s in symptoms_text.split(','))
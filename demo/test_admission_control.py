@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Test script to verify PDF requests beyond the admission budget are shed with 503 + Retry-After
+"""
+
+import threading
+import requests
+
+def test_admission_control():
+    base_url = "http://127.0.0.1:5000"
+    burst = 60
+
+    print("="*60)
+    print("ADMISSION CONTROL TEST")
+    print("="*60)
+
+    try:
+        before = requests.get(f"{base_url}/admission/stats").json()["pdf"]
+        print(f"PDF budget: {before['concurrency']} running, {before['queue_limit']} queued")
+    except requests.exceptions.ConnectionError:
+        print("Error: Could not connect to the Flask application")
+        print("Please make sure the app is running on http://127.0.0.1:5000")
+        return
+
+    results = []
+    lock = threading.Lock()
+
+    def request_pdf(n):
+        payload = {"patientName": f"Surge {n}", "age": 30 + n % 40, "symptoms": "fever, cough, headache"}
+        response = requests.post(f"{base_url}/assess?format=pdf", json=payload)
+        with lock:
+            results.append((response.status_code, response.headers.get("Retry-After")))
+
+    threads = [threading.Thread(target=request_pdf, args=(n,)) for n in range(burst)]
+    for t in threads:
+        t.start()
+    health = requests.get(f"{base_url}/health")
+    for t in threads:
+        t.join()
+
+    served = sum(1 for status, _ in results if status == 200)
+    shed = [(status, retry) for status, retry in results if status == 503]
+    other = len(results) - served - len(shed)
+    print(f"\nBurst of {burst} PDF requests: {served} served, {len(shed)} shed, {other} other")
+    print(f"/health during the burst: HTTP {health.status_code}")
+
+    if other:
+        print("  ❌ FAIL: Unexpected status codes")
+    elif shed and all(retry and retry.isdigit() for _, retry in shed):
+        print(f"  ✅ PASS: Shed requests carry Retry-After ({shed[0][1]}s)")
+    elif not shed:
+        print("  ⚠️  No requests shed (budget larger than the burst); start the app with")
+        print("      ADMISSION_PDF_CONCURRENCY=1 ADMISSION_PDF_QUEUE=2 to force shedding")
+    else:
+        print("  ❌ FAIL: 503 without Retry-After")
+
+    after = requests.get(f"{base_url}/admission/stats").json()["pdf"]
+    print(f"\nPDF stats: admitted {after['admitted']}, shed {after['shed']}")
+    print(f"Queue wait (ms): {after['queue_wait_ms']}")
+    ok = after["shed"]["total"] - before["shed"]["total"] == len(shed)
+    print("  ✅ PASS: Shed count matches" if ok else "  ❌ FAIL: Shed count differs from 503 responses")
+
+    print("\n" + "="*60)
+    print("TEST COMPLETED")
+    print("="*60)
+
+if __name__ == "__main__":
+    test_admission_control()
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Test script to verify assessments are persisted and can be queried by patient and date
+"""
+
+import datetime
+import time
+import uuid
+import requests
+
+def test_assessment_history():
+    base_url = "http://127.0.0.1:5000"
+
+    print("="*60)
+    print("ASSESSMENT HISTORY TEST")
+    print("="*60)
+
+    # A fresh name each run, so earlier runs' rows don't count
+    patient_name = f"History Test {uuid.uuid4().hex[:8]}"
+    visits = ["fever, headache", "sore throat, cough", "stomach pain, nausea"]
+
+    try:
+        ids = []
+        for symptoms in visits:
+            response = requests.post(f"{base_url}/assess", json={
+                "patientName": patient_name, "age": 35, "sex": "Male", "symptoms": symptoms
+            })
+            if response.status_code != 200:
+                print(f"Error: HTTP {response.status_code}")
+                return
+            ids.append(response.json()["assessment_id"])
+        print(f"Posted {len(ids)} assessments for {patient_name}")
+
+        # Writes are batched in the background; give the writer a moment
+        deadline = time.time() + 5
+        while True:
+            history = requests.get(f"{base_url}/assessments", params={"patient_name": patient_name})
+            if history.status_code != 200 or history.json()["count"] >= len(ids) or time.time() > deadline:
+                break
+            time.sleep(0.2)
+
+        print(f"\nBy patient: HTTP {history.status_code}")
+        if history.status_code != 200:
+            print(f"  ❌ FAIL: {history.text[:200]}")
+            return
+        results = history.json()["results"]
+        print(f"  {len(results)} recorded")
+        if sorted(r["id"] for r in results) == sorted(ids):
+            print("  ✅ PASS: Every assessment persisted")
+        else:
+            print("  ❌ FAIL: Persisted ids differ from the POSTed ones")
+        if all(r["options"] and r["case_severity"] for r in results):
+            print("  ✅ PASS: Severity and options stored with each assessment")
+        else:
+            print("  ❌ FAIL: Assessment without severity or options")
+
+        today = datetime.datetime.utcnow().date().isoformat()
+        by_date = requests.get(f"{base_url}/assessments",
+                               params={"patient_name": patient_name, "from": today, "to": today})
+        count = by_date.json().get("count") if by_date.status_code == 200 else None
+        print(f"\nBy date ({today}): {count} recorded")
+        print("  ✅ PASS: Date range includes today's assessments" if count == len(ids) else "  ❌ FAIL: Date query")
+
+        yesterday = (datetime.datetime.utcnow().date() - datetime.timedelta(days=1)).isoformat()
+        before = requests.get(f"{base_url}/assessments", params={"patient_name": patient_name, "to": yesterday})
+        count = before.json().get("count") if before.status_code == 200 else None
+        print(f"Up to {yesterday}: {count} recorded")
+        print("  ✅ PASS: Earlier range excludes them" if count == 0 else "  ❌ FAIL: Date query")
+
+        invalid = requests.get(f"{base_url}/assessments", params={"from": "last tuesday"})
+        print(f"\nInvalid date: HTTP {invalid.status_code}")
+        print("  ✅ PASS: Rejected" if invalid.status_code == 400 else "  ❌ FAIL: Expected 400")
+
+        stats = requests.get(f"{base_url}/assessments/stats").json()
+        print(f"\nWriter: {stats}")
+
+    except requests.exceptions.ConnectionError:
+        print("Error: Could not connect to the Flask application")
+        print("Please make sure the app is running on http://127.0.0.1:5000")
+
+    print("\n" + "="*60)
+    print("TEST COMPLETED")
+    print("="*60)
+
+if __name__ == "__main__":
+    test_assessment_history()
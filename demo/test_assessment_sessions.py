@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Test script to verify stored assessments can be downloaded by id as JSON and PDF
+"""
+
+import requests
+
+def test_assessment_sessions():
+    base_url = "http://127.0.0.1:5000"
+
+    print("="*60)
+    print("ASSESSMENT SESSION TEST")
+    print("="*60)
+
+    test_data = {
+        "patientName": "Session Test",
+        "age": 42,
+        "sex": "Female",
+        "weight": 68,
+        "height": 1.68,
+        "symptoms": "fever, headache, body aches, sore throat"
+    }
+
+    try:
+        response = requests.post(f"{base_url}/assess", json=test_data)
+        if response.status_code != 200:
+            print(f"Error: HTTP {response.status_code}")
+            return
+        result = response.json()
+        assessment_id = result.get("assessment_id")
+        print(f"Assessment id: {assessment_id}")
+        print(f"Expires in: {result.get('assessment_expires_in')} seconds")
+        if not assessment_id:
+            print("  ❌ FAIL: No assessment id returned")
+            return
+
+        stored = requests.get(f"{base_url}/assessments/{assessment_id}/json")
+        same = stored.status_code == 200 and stored.json().get("options") == result.get("options")
+        print(f"\nJSON download: HTTP {stored.status_code}")
+        print("  ✅ PASS: Stored result matches POST response" if same else "  ❌ FAIL: Stored result differs")
+
+        pdf = requests.get(f"{base_url}/assessments/{assessment_id}/pdf")
+        is_pdf = pdf.status_code == 200 and pdf.content[:4] == b"%PDF"
+        print(f"\nPDF download: HTTP {pdf.status_code}, {len(pdf.content):,} bytes")
+        print("  ✅ PASS: PDF rendered from stored assessment" if is_pdf else "  ❌ FAIL: No PDF returned")
+
+        missing = requests.get(f"{base_url}/assessments/does-not-exist/pdf")
+        print(f"\nUnknown id: HTTP {missing.status_code}")
+        print("  ✅ PASS: Unknown id rejected" if missing.status_code == 404 else "  ❌ FAIL: Expected 404")
+
+    except requests.exceptions.ConnectionError:
+        print("Error: Could not connect to the Flask application")
+        print("Please make sure the app is running on http://127.0.0.1:5000")
+
+    print("\n" + "="*60)
+    print("TEST COMPLETED")
+    print("="*60)
+
+if __name__ == "__main__":
+    test_assessment_sessions()
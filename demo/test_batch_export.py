@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test script to verify batch prescription exports as a ZIP and as one combined PDF
+"""
+
+import io
+import time
+import zipfile
+import requests
+
+def wait_for_export(base_url, job):
+    """Poll an export until it finishes, printing progress"""
+    while True:
+        status = requests.get(f"{base_url}{job['status_url']}").json()
+        print(f"  {status['state']}: {status['done']}/{status['total']}")
+        if status["state"] in ("done", "failed"):
+            return status
+        time.sleep(0.5)
+
+def test_batch_export():
+    base_url = "http://127.0.0.1:5000"
+
+    print("="*60)
+    print("BATCH EXPORT TEST")
+    print("="*60)
+
+    patients = [
+        {"patientName": "Batch One", "age": 34, "sex": "Female", "weight": 60, "height": 1.65, "symptoms": "fever, headache"},
+        {"patientName": "Batch Two", "age": 8, "sex": "Male", "weight": 25, "height": 1.25, "symptoms": "cough, sore throat"},
+        {"patientName": "Batch Three", "age": 70, "sex": "Male", "weight": 80, "height": 1.75, "symptoms": "rash, itching"},
+    ]
+
+    try:
+        stored = requests.post(f"{base_url}/assess", json=patients[0]).json()
+
+        for fmt in ("zip", "pdf"):
+            print(f"\nFormat: {fmt}")
+            response = requests.post(f"{base_url}/batch-exports", json={
+                "format": fmt,
+                "assessment_ids": [stored["assessment_id"]],
+                "patients": patients[1:]
+            })
+            if response.status_code != 202:
+                print(f"  ❌ FAIL: HTTP {response.status_code} {response.text}")
+                continue
+
+            status = wait_for_export(base_url, response.json())
+            download = requests.get(f"{base_url}{status['download_url']}")
+            if status["state"] != "done" or download.status_code != 200:
+                print(f"  ❌ FAIL: export {status['state']}, download HTTP {download.status_code}")
+                continue
+
+            if fmt == "zip":
+                names = zipfile.ZipFile(io.BytesIO(download.content)).namelist()
+                print(f"  Entries: {names}")
+                ok = len(names) == len(patients)
+            else:
+                ok = download.content[:4] == b"%PDF"
+                print(f"  Combined PDF: {len(download.content):,} bytes")
+            print(f"  ✅ PASS: {fmt} export downloaded" if ok else f"  ❌ FAIL: unexpected {fmt} output")
+
+        missing = requests.post(f"{base_url}/batch-exports", json={"assessment_ids": ["does-not-exist"]})
+        print(f"\nUnknown assessment id: HTTP {missing.status_code}")
+        print("  ✅ PASS: Unknown id rejected" if missing.status_code == 404 else "  ❌ FAIL: Expected 404")
+
+    except requests.exceptions.ConnectionError:
+        print("Error: Could not connect to the Flask application")
+        print("Please make sure the app is running on http://127.0.0.1:5000")
+
+    print("\n" + "="*60)
+    print("TEST COMPLETED")
+    print("="*60)
+
+if __name__ == "__main__":
+    test_batch_export()
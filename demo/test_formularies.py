@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Test script to verify requests are matched against the formulary of their region or tenant
+"""
+
+import requests
+
+# formularies/rural_district.csv stocks tablets, syrups and drops only
+DISTRICT = "rural_district"
+DISTRICT_FORMS = {"tablet", "syrup", "drops"}
+
+def recommended_forms(response):
+    return {alt["dosage_form"].lower() for opt in response["options"] for alt in opt.get("alternatives", [])}
+
+def test_formularies():
+    base_url = "http://127.0.0.1:5000"
+
+    print("="*60)
+    print("FORMULARY SELECTION TEST")
+    print("="*60)
+
+    patient = {"patientName": "Formulary Test", "age": 30, "sex": "Male", "symptoms": "fever, headache, sore throat"}
+
+    try:
+        stats = requests.get(f"{base_url}/catalog/stats")
+        if stats.status_code != 200:
+            print(f"Error: HTTP {stats.status_code}")
+            return
+        available = stats.json()["formularies"]["available"]
+        print(f"Formularies: {available}")
+        if DISTRICT not in available:
+            print(f"  ❌ FAIL: {DISTRICT} not configured (FORMULARY_DIR)")
+            return
+
+        default = requests.post(f"{base_url}/assess", json=patient).json()
+        print(f"\nNo region: formulary {default.get('formulary')}, forms {sorted(recommended_forms(default))}")
+        print("  ✅ PASS: Default formulary" if default.get("formulary") == stats.json()["formularies"]["default"]
+              else "  ❌ FAIL: Expected the default formulary")
+
+        for label, kwargs in (("Region", {"json": dict(patient, region=DISTRICT)}),
+                              ("Tenant header", {"json": patient, "headers": {"X-Tenant-ID": DISTRICT}})):
+            result = requests.post(f"{base_url}/assess", **kwargs).json()
+            forms = recommended_forms(result)
+            print(f"\n{label}: formulary {result.get('formulary')}, forms {sorted(forms)}")
+            if result.get("formulary") == DISTRICT and forms and forms <= DISTRICT_FORMS:
+                print("  ✅ PASS: Only medicines the district stocks")
+            else:
+                print("  ❌ FAIL: Medicines from outside the district formulary")
+
+        creams = requests.get(f"{base_url}/medicines", params={"formulary": DISTRICT, "dosage_form": "cream"})
+        total = creams.json().get("total") if creams.status_code == 200 else None
+        print(f"\nDistrict creams: {total}")
+        print("  ✅ PASS: Catalog filter uses the formulary" if total == 0 else "  ❌ FAIL: Expected none")
+
+        unknown = requests.post(f"{base_url}/assess", json=dict(patient, formulary="nowhere"))
+        print(f"\nUnknown formulary: HTTP {unknown.status_code}")
+        print("  ✅ PASS: Rejected" if unknown.status_code == 400 else "  ❌ FAIL: Expected 400")
+
+        # An unknown region is not an error: it has no formulary of its own
+        other = requests.post(f"{base_url}/assess", json=dict(patient, region="elsewhere"))
+        print(f"Region without a formulary: HTTP {other.status_code}, formulary {other.json().get('formulary')}")
+        print("  ✅ PASS: Falls back to the default" if other.status_code == 200 else "  ❌ FAIL")
+
+        loaded = requests.get(f"{base_url}/catalog/stats").json()["formularies"]
+        print(f"\nLoaded: {loaded['loaded']}")
+        print(f"Hits {loaded['hits']}, loads {loaded['loads']}, evictions {loaded['evictions']}")
+        print("  ✅ PASS: District formulary loaded on demand" if DISTRICT in loaded["loaded"]
+              else "  ❌ FAIL: District formulary not loaded")
+
+    except requests.exceptions.ConnectionError:
+        print("Error: Could not connect to the Flask application")
+        print("Please make sure the app is running on http://127.0.0.1:5000")
+
+    print("\n" + "="*60)
+    print("TEST COMPLETED")
+    print("="*60)
+
+if __name__ == "__main__":
+    test_formularies()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Test script to verify duplicated and interacting medicines across options are flagged
+in the JSON response and the prescription PDF
+"""
+
+import io
+import requests
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # the PDF text check is skipped without pypdf
+    PdfReader = None
+
+def test_interactions():
+    base_url = "http://127.0.0.1:5000"
+
+    print("="*60)
+    print("MEDICINE INTERACTION TEST")
+    print("="*60)
+
+    test_cases = [
+        # (symptoms, expected (type, basis) of a flag, or None for no flag)
+        ("fever, headache, body aches", ("duplication", "category")),
+        ("depression, anxiety, back pain, headache", ("interaction", "category")),
+        ("sneezing, runny nose", None),
+    ]
+
+    try:
+        for symptoms, expected in test_cases:
+            response = requests.post(f"{base_url}/assess", json={
+                "patientName": "Interaction Test", "age": 40, "sex": "Female", "symptoms": symptoms
+            })
+            if response.status_code != 200:
+                print(f"Error: HTTP {response.status_code}")
+                return
+            result = response.json()
+            flags = result.get("interaction_flags", [])
+            print(f"\nSymptoms: {symptoms}")
+            print(f"  Options: {[(opt['id'], opt['drugs']) for opt in result['options']]}")
+            for flag in flags:
+                print(f"  Flag: {flag['severity']} {flag['type']} ({flag['basis']}) {flag['drugs']}: {flag['message']}")
+
+            if expected is None:
+                print("  ✅ PASS: No flags" if not flags else "  ❌ FAIL: Unexpected flags")
+                continue
+            if any((flag["type"], flag["basis"]) == expected for flag in flags):
+                print(f"  ✅ PASS: {expected[0]} flagged")
+            else:
+                print(f"  ❌ FAIL: Expected a {expected[1]} {expected[0]} flag")
+            flagged = {option_id for flag in flags for option_id in flag["options"]}
+            shown = all(any(flag["message"] in text for flag in flags for text in opt.get("safety_flags", []))
+                        for opt in result["options"] if opt["id"] in flagged)
+            print("  ✅ PASS: Involved options carry the warning" if shown else "  ❌ FAIL: Warning missing from options")
+
+            pdf = requests.get(f"{base_url}/assessments/{result['assessment_id']}/pdf")
+            if PdfReader is None:
+                print("  (pypdf not installed; PDF text not checked)")
+            elif pdf.status_code == 200:
+                text = " ".join(page.extract_text() for page in PdfReader(io.BytesIO(pdf.content)).pages)
+                print("  ✅ PASS: Warnings printed in the PDF" if "Medication Warnings" in text
+                      else "  ❌ FAIL: PDF has no warnings section")
+            else:
+                print(f"  ❌ FAIL: PDF download HTTP {pdf.status_code}")
+
+    except requests.exceptions.ConnectionError:
+        print("Error: Could not connect to the Flask application")
+        print("Please make sure the app is running on http://127.0.0.1:5000")
+
+    print("\n" + "="*60)
+    print("TEST COMPLETED")
+    print("="*60)
+
+if __name__ == "__main__":
+    test_interactions()
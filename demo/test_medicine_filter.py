@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the /medicines multi-attribute filter against a pandas scan
+"""
+
+import requests
+import pandas as pd
+
+def test_medicine_filter():
+    base_url = "http://127.0.0.1:5000"
+    df = pd.read_csv('main_data.csv')
+    strength_mg = df['Strength'].str.split().str[0].astype(float)
+
+    print("="*70)
+    print("MEDICINE FILTER TEST")
+    print("="*70)
+
+    test_cases = [
+        {
+            "name": "OTC antipyretic tablets or syrups under 500 mg",
+            "params": [("classification", "Over-the-Counter"), ("category", "Antipyretic"),
+                       ("dosage_form", "Tablet"), ("dosage_form", "Syrup"), ("max_strength", 500)],
+            "expected": (df['Classification'] == 'Over-the-Counter') & (df['Category'] == 'Antipyretic') &
+                        df['Dosage Form'].isin(['Tablet', 'Syrup']) & (strength_mg <= 500)
+        },
+        {
+            "name": "Analgesics from two manufacturers",
+            "params": [("category", "analgesic"), ("manufacturer", "Pfizer Inc."), ("manufacturer", "Bayer AG")],
+            "expected": (df['Category'] == 'Analgesic') & df['Manufacturer'].isin(['Pfizer Inc.', 'Bayer AG'])
+        },
+        {
+            "name": "Strength between 100 and 200 mg",
+            "params": [("min_strength", 100), ("max_strength", 200)],
+            "expected": (strength_mg >= 100) & (strength_mg <= 200)
+        },
+        {
+            "name": "Unknown category",
+            "params": [("category", "antihistamine")],
+            "expected": df['Category'] == 'Antihistamine'
+        }
+    ]
+
+    passed = 0
+    for i, test_case in enumerate(test_cases, 1):
+        print(f"\n{i}. {test_case['name']}")
+        print("-" * 50)
+        try:
+            response = requests.get(f"{base_url}/medicines", params=test_case["params"] + [("limit", 5)])
+            if response.status_code != 200:
+                print(f"Error: HTTP {response.status_code}")
+                print(response.text)
+                continue
+
+            result = response.json()
+            expected_rows = df[test_case["expected"]]
+            expected_names = expected_rows['Name'].head(5).tolist()
+            returned_names = [r['name'] for r in result.get('results', [])]
+
+            print(f"Total matches: {result.get('total')} (expected {len(expected_rows)})")
+            print(f"First results: {returned_names}")
+            if result.get('total') == len(expected_rows) and returned_names == expected_names:
+                print("  ✅ PASS")
+                passed += 1
+            else:
+                print("  ❌ FAIL")
+
+        except requests.exceptions.ConnectionError:
+            print("Error: Could not connect to the Flask application")
+            print("Please make sure the app is running on http://127.0.0.1:5000")
+            break
+
+    print("\n" + "="*70)
+    print(f"MEDICINE FILTER TEST COMPLETED: {passed}/{len(test_cases)} passed")
+    print("="*70)
+
+if __name__ == "__main__":
+    test_medicine_filter()
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Test script to verify /ready reports warm-up phases and flips to ready once they finish
+"""
+
+import time
+import requests
+
+EXPECTED_PHASES = ["catalog", "medicines", "rule_matchers", "pdf", "caches"]
+
+def test_readiness():
+    base_url = "http://127.0.0.1:5000"
+
+    print("="*60)
+    print("READINESS TEST")
+    print("="*60)
+
+    try:
+        health = requests.get(f"{base_url}/health")
+    except requests.exceptions.ConnectionError:
+        print("Error: Could not connect to the Flask application")
+        print("Please make sure the app is running on http://127.0.0.1:5000")
+        return
+    print(f"/health: HTTP {health.status_code}")
+
+    # Warm-up runs in the background after start; give it a few seconds
+    deadline = time.time() + 30
+    while True:
+        response = requests.get(f"{base_url}/ready")
+        status = response.json()
+        if response.status_code == 200 or status["status"] == "failed" or time.time() > deadline:
+            break
+        time.sleep(0.5)
+
+    print(f"/ready: HTTP {response.status_code}, status {status['status']}")
+    if response.status_code == 200 and status["ready"]:
+        print("  ✅ PASS: Ready after warm-up")
+    else:
+        print("  ❌ FAIL: Not ready")
+
+    print(f"\nWarm-up phases (total {status['total_ms']} ms):")
+    for name, phase in status["phases"].items():
+        print(f"  {name:<14} {phase['status']:<8} {phase['duration_ms']} ms")
+    missing = [name for name in EXPECTED_PHASES if name not in status["phases"]]
+    timed = all(isinstance(p["duration_ms"], (int, float)) for p in status["phases"].values())
+    if missing:
+        print(f"  ❌ FAIL: Missing phases {missing} (is the app running with WARMUP=0?)")
+    elif not timed:
+        print("  ❌ FAIL: Phase without a duration")
+    else:
+        print("  ✅ PASS: Every phase reported with its duration")
+
+    print("\n" + "="*60)
+    print("TEST COMPLETED")
+    print("="*60)
+
+if __name__ == "__main__":
+    test_readiness()
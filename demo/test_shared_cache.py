@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Test script to verify the shared cache backend against a local Redis-protocol stand-in:
+two "nodes" sharing assessments and PDFs, TTLs, the near cache and an unreachable server
+"""
+
+import tempfile
+import time
+
+from assessment_store import AssessmentStore
+from cache_backend import LocalCache, RedisCache, TieredCache, decode_value, encode_value
+from pdf_cache import PDFCache
+from redis_standin import RedisStandIn
+
+def check(ok, message):
+    print(f"  {'✅ PASS' if ok else '❌ FAIL'}: {message}")
+
+def test_shared_cache():
+    print("="*60)
+    print("SHARED CACHE TEST")
+    print("="*60)
+
+    server = RedisStandIn().start()
+    try:
+        assessment = {
+            "patient": {"patientName": "Cache Test", "age": 30.0, "symptoms": "fever, cough"},
+            "options": [{"id": "antiviral_1", "drugs": ["oseltamivir"], "rationale": "Viral symptoms. " * 40}],
+            "response": {"triage": "primary_care", "options": []}
+        }
+
+        print("\nEncoding")
+        encoded = encode_value(assessment)
+        check(decode_value(encoded) == assessment, "Assessment round-trips")
+        check(len(encoded) < len(str(assessment)) / 2, f"Compressed to {len(encoded)} bytes")
+        pdf = b"%PDF-1.4 " + bytes(range(256)) * 8
+        check(decode_value(encode_value(pdf)) == pdf and len(encode_value(pdf)) == len(pdf) + 1,
+              "PDF bytes stored as-is")
+
+        print("\nTwo nodes sharing assessments")
+        shared_a = RedisCache(port=server.port, prefix="test:")
+        shared_b = RedisCache(port=server.port, prefix="test:")
+        node_a = AssessmentStore(ttl_seconds=60, backend=TieredCache(LocalCache(), shared_a, near_ttl=30))
+        near_b = LocalCache()
+        node_b = AssessmentStore(ttl_seconds=60, backend=TieredCache(near_b, shared_b, near_ttl=30))
+        assessment_id = node_a.put(assessment)
+        check(node_b.get(assessment_id) == assessment, "Stored on node A, read on node B")
+        node_b.get(assessment_id)
+        check(near_b.stats()["hits"] == 1 and shared_b.stats()["hits"] == 1, "Second read on B from its near cache")
+        check(node_b.get("no-such-id") is None, "Unknown id misses")
+
+        print("\nPer-entry TTL")
+        shared_a.set("short", {"v": 1}, ttl=0.2)
+        shared_a.set("long", {"v": 2}, ttl=60)
+        time.sleep(0.3)
+        check(shared_b.get("short") is None and shared_b.get("long") == {"v": 2}, "Short entry expired, long one kept")
+        near = TieredCache(LocalCache(), shared_a, near_ttl=0.2)
+        near.set("stale", {"v": 1})
+        shared_b.set("stale", {"v": 2})
+        first = near.get("stale")
+        time.sleep(0.3)
+        check(first == {"v": 1} and near.get("stale") == {"v": 2}, "Near cache rereads the shared value after near_ttl")
+
+        print("\nTwo nodes sharing PDFs")
+        pdf_a = PDFCache(tempfile.mkdtemp(prefix="cache_test_a_"), shared=shared_a)
+        pdf_b = PDFCache(tempfile.mkdtemp(prefix="cache_test_b_"), shared=shared_b)
+        pdf_a.put("k1", pdf)
+        check(pdf_b.get("k1") == pdf and pdf_b.stats["shared_hits"] == 1, "Rendered on node A, served by node B")
+        check(pdf_b.get("k1") == pdf and pdf_b.stats["memory_hits"] == 1, "Then from node B's memory tier")
+
+        print("\nShared cache unreachable")
+        server.stop()
+        server = None
+        started = time.perf_counter()
+        node_c = AssessmentStore(backend=TieredCache(LocalCache(), RedisCache(port=shared_a.address[1], timeout=0.2)))
+        stored = node_c.put(assessment)
+        missing = node_c.get("other-id")
+        kept = node_c.get(stored)
+        elapsed = time.perf_counter() - started
+        check(missing is None and kept == assessment, "Requests continue on the near cache")
+        check(elapsed < 1.0, f"Failure marked down instead of retried per call ({elapsed * 1000:.0f} ms)")
+
+    finally:
+        if server is not None:
+            server.stop()
+
+    print("\n" + "="*60)
+    print("TEST COMPLETED")
+    print("="*60)
+
+if __name__ == "__main__":
+    test_shared_cache()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Test script to verify misspelled / free-text symptoms are normalized before triage
+"""
+
+import requests
+
+test_cases = [
+    {"symptoms": "sore throught", "expected": "sore throat"},
+    {"symptoms": "head ache", "expected": "headache"},
+    {"symptoms": "runy nose", "expected": "runny nose"},
+    {"symptoms": "shortness of breth", "expected": "shortness of breath"},
+    {"symptoms": "vomitting", "expected": "vomiting"},
+    {"symptoms": "severe headach", "expected": "severe headache"},  # keyword next to a misspelling
+    {"symptoms": "headache", "expected": None},  # already canonical, left alone
+]
+
+def test_symptom_normalization():
+    base_url = "http://127.0.0.1:5000"
+
+    print("="*60)
+    print("SYMPTOM NORMALIZATION TEST")
+    print("="*60)
+
+    passed = 0
+    for i, test_case in enumerate(test_cases, 1):
+        print(f"\n{i}. Input: '{test_case['symptoms']}'")
+        test_data = {
+            "patientName": f"Test Patient {i}",
+            "age": 30,
+            "sex": "Female",
+            "weight": 60,
+            "height": 1.6,
+            "symptoms": test_case["symptoms"]
+        }
+        try:
+            response = requests.post(f"{base_url}/assess", json=test_data)
+            if response.status_code != 200:
+                print(f"Error: HTTP {response.status_code}")
+                continue
+
+            severity = response.json().get("severity_classification", {})
+            normalized = severity.get("normalized_symptoms", {})
+            got = normalized.get(test_case["symptoms"])
+            breakdown = severity.get("symptom_breakdown", [])
+            print(f"Normalized to: {got}")
+            print(f"Scored as: {breakdown}")
+
+            if got == test_case["expected"]:
+                print("  ✓ MATCH")
+                passed += 1
+            else:
+                print(f"  ✗ MISMATCH (expected {test_case['expected']})")
+
+        except requests.exceptions.ConnectionError:
+            print("Error: Could not connect to the Flask application")
+            print("Please make sure the app is running on http://127.0.0.1:5000")
+            break
+
+    print("\n" + "="*60)
+    print(f"TEST COMPLETED: {passed}/{len(test_cases)} passed")
+    print("="*60)
+
+if __name__ == "__main__":
+    test_symptom_normalization()
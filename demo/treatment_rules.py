@@ -0,0 +1,94 @@
+# treatment_rules.py -- Declarative treatment rules resolved against the catalog at load
+# A rule fires when any of its (signal, threshold) conditions holds, where a signal
+# is a number computed from the symptoms (a cluster score or a keyword count). The
+# medicines behind each rule depend only on the static catalog, so they are looked
+# up once per age group when the rules load; a request only compares numbers, for
+# a whole batch of patients at once.
+from collections import namedtuple
+
+import numpy as np
+
+from ranking import AGE_GROUPS
+
+# when: ((signal, threshold), ...), any one suffices
+# lookups: ((category, indication or None), ...), the first that finds medicines is used
+# rationale: str.format template over the signals, e.g. "(score: {pain:.0f})"
+TreatmentRule = namedtuple("TreatmentRule", ["id", "type", "title", "rationale", "when", "lookups"])
+
+
+class TreatmentRules:
+    """A rule table with each rule's ranked medicines resolved per age group.
+
+    rules all apply independently; fallback_rules are tried in order only when
+    no rule produced an option, and the first whose condition holds is the only
+    one considered. resolve(category, indication, age_group) returns ranked
+    alternatives (dicts with an "id"), best first. fired() evaluates every
+    condition of a batch with one comparison and one matrix product.
+    """
+
+    def __init__(self, rules, fallback_rules, resolve):
+        self.rules = list(rules)
+        self.fallback_rules = list(fallback_rules)
+        self.resolved = {}      # (rule id, age group) -> ranked alternatives
+        for rule in self.rules + self.fallback_rules:
+            for age_group in AGE_GROUPS:
+                alternatives = []
+                for category, indication in rule.lookups:
+                    alternatives = resolve(category, indication, age_group)
+                    if alternatives:
+                        break
+                self.resolved[(rule.id, age_group)] = tuple(alternatives)
+        self._compiled_for = None
+
+    def _compile(self, names):
+        """Condition columns and thresholds, and a conditions x (rules + fallback rules) incidence matrix"""
+        column = {name: i for i, name in enumerate(names)}
+        conditions = [(column[signal], threshold, r)
+                      for r, rule in enumerate(self.rules + self.fallback_rules)
+                      for signal, threshold in rule.when]
+        incidence = np.zeros((len(conditions), len(self.rules) + len(self.fallback_rules)))
+        incidence[np.arange(len(conditions)), [r for _, _, r in conditions]] = 1.0
+        return (np.array([c for c, _, _ in conditions], dtype=np.intp),
+                np.array([t for _, t, _ in conditions]), incidence)
+
+    def fired(self, names, values):
+        """(patients x rules, patients x fallback rules) bool matrices for a
+        patients x signals matrix whose columns are names"""
+        names = tuple(names)
+        if self._compiled_for != names:
+            self._compiled = self._compile(names)
+            self._compiled_for = names
+        columns, thresholds, incidence = self._compiled
+        hits = (values[:, columns] >= thresholds) @ incidence > 0
+        return hits[:, :len(self.rules)], hits[:, len(self.rules):]
+
+    def option(self, rule, signals, age_group):
+        """Option dict for a fired rule, or None when the catalog had no medicine for it"""
+        alternatives = self.resolved[(rule.id, age_group)]
+        if not alternatives:
+            return None
+        return {
+            "id": rule.id,
+            "type": rule.type,
+            "title": rule.title,
+            "drugs": [alternatives[0]["id"]],
+            "alternatives": [dict(alt) for alt in alternatives],
+            "rationale": rule.rationale.format_map(signals)
+        }
+
+    def options(self, hits, signals, age_group):
+        """Options of the rules fired in hits (one row of fired()[0]), in table order"""
+        opts = []
+        for rule, hit in zip(self.rules, hits):
+            if hit:
+                opt = self.option(rule, signals, age_group)
+                if opt is not None:
+                    opts.append(opt)
+        return opts
+
+    def fallback(self, hits, signals, age_group):
+        """(matched, option) for the first fallback rule fired in hits; option may be None"""
+        for rule, hit in zip(self.fallback_rules, hits):
+            if hit:
+                return True, self.option(rule, signals, age_group)
+        return False, None
@@ -0,0 +1,88 @@
+# warmup.py -- Timed start-up phases behind a readiness flag
+# Import-time work (loading the catalog) and background work (exercising the rule
+# matchers, rendering a throwaway PDF, priming caches) are recorded as named
+# phases with their durations. The process reports ready only once every
+# expected phase has finished; /health stays a pure liveness check.
+import logging
+import threading
+import time
+from contextlib import contextmanager
+
+from structured_logging import get_logger, log_event
+
+log = get_logger("warmup")
+
+
+class WarmUp:
+    """Named warm-up phases: status, duration and error of each, and overall readiness"""
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.lock = threading.Lock()
+        self.phases = {}        # name -> {"status", "duration_ms"[, "error"]}, in start order
+        self.thread = None
+
+    def expect(self, *names):
+        """Register phases that will run later, so readiness waits for them"""
+        with self.lock:
+            for name in names:
+                self.phases.setdefault(name, {"status": "pending", "duration_ms": None})
+
+    @contextmanager
+    def phase(self, name):
+        """Time the enclosed block as phase name; an exception marks it failed and propagates"""
+        with self.lock:
+            self.phases[name] = {"status": "running", "duration_ms": None}
+        started = self.clock()
+        try:
+            yield
+        except BaseException as e:
+            self._finish(name, started, "failed", error=f"{type(e).__name__}: {e}")
+            raise
+        self._finish(name, started, "done")
+
+    def _finish(self, name, started, status, **extra):
+        with self.lock:
+            self.phases[name] = dict(extra, status=status,
+                                     duration_ms=round((self.clock() - started) * 1000, 2))
+
+    def run(self, steps):
+        """Run (name, func) steps in order; a failed step is recorded and the rest still run"""
+        for name, func in steps:
+            try:
+                with self.phase(name):
+                    func()
+            except Exception:
+                log.exception("warmup.failed", extra={"fields": {"phase": name}})
+        status = self.status()
+        log_event(log, logging.INFO, "warmup.finished", ready=status["ready"], total_ms=status["total_ms"],
+                  phases={name: p["duration_ms"] for name, p in status["phases"].items()})
+
+    def start(self, steps):
+        """run(steps) in a daemon thread (the server can answer /health meanwhile)"""
+        self.expect(*(name for name, _ in steps))
+        self.thread = threading.Thread(target=self.run, args=(steps,), name="warmup", daemon=True)
+        self.thread.start()
+        return self.thread
+
+    @property
+    def ready(self):
+        with self.lock:
+            return all(p["status"] == "done" for p in self.phases.values())
+
+    def status(self):
+        with self.lock:
+            phases = {name: dict(p) for name, p in self.phases.items()}
+        ready = all(p["status"] == "done" for p in phases.values())
+        if ready:
+            state = "ready"
+        elif any(p["status"] == "failed" for p in phases.values()):
+            state = "failed"
+        else:
+            state = "warming_up"
+        return {
+            "status": state,
+            "ready": ready,
+            "phases": phases,
+            "total_ms": round(sum(p["duration_ms"] or 0 for p in phases.values()), 2),
+        }
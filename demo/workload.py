@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+# workload.py -- Seeded synthetic patient payloads for benchmarks and load tests
+# Each record is a POST /assess body. Ages, sexes, weights and heights follow
+# configurable distributions; symptoms are drawn from the /symptoms picker keywords
+# and the triage rule vocabulary, with tunable typo, free-text and duplicate rates.
+# Records are generated in fixed-size chunks, each seeded from (seed, chunk), so any
+# range of a workload can be regenerated on its own and output streams as it goes.
+#
+# CLI:  python workload.py -n 1000000 --seed 7 -o patients.jsonl
+#       python workload.py -n 5000000 -o patients.parquet --config workload.json
+#       (-o - writes JSONL to stdout; the JSONL feeds batch_export.py directly)
+import argparse
+import copy
+import itertools
+import json
+import os
+import random
+import sys
+import time
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+FORMATS = ("jsonl", "parquet")
+# Records per independently seeded chunk (and per Parquet row group)
+CHUNK_SIZE = 10000
+
+DEFAULT_CONFIG = {
+    # [min age, max age, share]; ages are uniform within a band
+    "age_bands": [[0, 2, 0.03], [2, 12, 0.12], [12, 18, 0.08], [18, 65, 0.55], [65, 95, 0.22]],
+    "sex": {"Female": 0.51, "Male": 0.48, "Other": 0.01},
+    # Adult [mean, sd] per sex; under-18s scale towards it with age
+    "weight_kg": {"Female": [70, 14], "Male": [84, 15], "Other": [77, 15]},
+    "height_m": {"Female": [1.63, 0.07], "Male": [1.77, 0.075], "Other": [1.70, 0.08]},
+    # Number of symptoms -> share of patients
+    "symptom_counts": {"1": 0.20, "2": 0.30, "3": 0.25, "4": 0.15, "5": 0.07, "6": 0.03},
+    # Keyword popularity falls off as 1 / rank ** symptom_skew (0 = uniform)
+    "symptom_skew": 1.0,
+    "typo_rate": 0.05,          # per symptom: one character dropped, doubled, swapped or replaced
+    "free_text_rate": 0.10,     # per symptom: embedded in a phrase ("bad cough since yesterday")
+    "duplicate_rate": 0.02,     # per symptom: listed twice
+    "repeat_rate": 0.0,         # per patient: an exact copy of an earlier payload in the chunk
+    "missing_field_rate": 0.02  # per optional field (sex, weight, height): left out
+}
+
+FREE_TEXT = [
+    "{}", "bad {}", "mild {}", "{} since yesterday", "{} for 3 days", "really bad {}",
+    "some {} at night", "{} on and off", "started with {}", "{} getting worse",
+]
+FIRST_NAMES = ["Ana", "Ben", "Chloe", "Dev", "Emma", "Femi", "Grace", "Hiro", "Ines", "Jamal",
+               "Kai", "Lena", "Mateo", "Nia", "Omar", "Priya", "Quinn", "Rosa", "Sami", "Tara"]
+LAST_NAMES = ["Adams", "Baker", "Chen", "Diaz", "Evans", "Garcia", "Haddad", "Ito", "Jones", "Khan",
+              "Lopez", "Mensah", "Novak", "Okafor", "Patel", "Rossi", "Silva", "Tan", "Wong", "Young"]
+LETTERS = "abcdefghijklmnopqrstuvwxyz"
+
+
+def load_config(path=None):
+    """DEFAULT_CONFIG with the top-level keys of a JSON file overriding it"""
+    config = copy.deepcopy(DEFAULT_CONFIG)
+    if path:
+        with open(path) as f:
+            overrides = json.load(f)
+        unknown = set(overrides) - set(config)
+        if unknown:
+            raise ValueError(f"unknown workload settings: {sorted(unknown)}")
+        config.update(overrides)
+    return config
+
+
+def symptom_vocabulary():
+    """/symptoms picker keywords first, then the other rule keywords (deduplicated, in order)"""
+    os.environ.setdefault("WARMUP", "0")
+    import app
+    picker = [kw for group in app.AVAILABLE_SYMPTOMS.values() for item in group for kw in item["keywords"]]
+    return list(dict.fromkeys(picker + [kw.strip().lower() for kw in app.SYMPTOM_VOCABULARY]))
+
+
+def typo(word, rng):
+    """word with one random character edit (words under 4 letters are left alone)"""
+    if len(word) < 4:
+        return word
+    i = rng.randrange(1, len(word) - 1)
+    edit = rng.randrange(4)
+    if edit == 0:
+        return word[:i] + word[i + 1:]
+    if edit == 1:
+        return word[:i] + word[i] + word[i:]
+    if edit == 2:
+        return word[:i - 1] + word[i] + word[i - 1] + word[i + 1:]
+    return word[:i] + rng.choice(LETTERS) + word[i + 1:]
+
+
+class WorkloadGenerator:
+    """Reproducible patient payloads: the same (seed, config, vocabulary) always gives
+    the same record at the same index"""
+
+    def __init__(self, seed=0, config=None, vocabulary=None):
+        self.seed = seed
+        self.config = config or load_config()
+        self.vocabulary = vocabulary if vocabulary is not None else symptom_vocabulary()
+        skew = self.config["symptom_skew"]
+        # Popularity order is itself seeded, so a different seed favours different symptoms
+        ranked = random.Random(f"{seed}/vocabulary").sample(self.vocabulary, len(self.vocabulary))
+        self.symptoms = ranked
+        # Cumulative weights, so each draw is a bisect rather than a fresh sum
+        self.symptom_weights = list(itertools.accumulate(1.0 / (rank + 1) ** skew for rank in range(len(ranked))))
+
+        bands = self.config["age_bands"]
+        self.age_bands = [(low, high) for low, high, _ in bands]
+        self.age_weights = list(itertools.accumulate(share for _, _, share in bands))
+        self.sexes = list(self.config["sex"])
+        self.sex_weights = list(itertools.accumulate(self.config["sex"].values()))
+        counts = self.config["symptom_counts"]
+        self.counts = [int(n) for n in counts]
+        self.count_weights = list(itertools.accumulate(counts.values()))
+
+    def _body_size(self, rng, age, sex):
+        """(weight kg, height m); children scale from newborn size towards the adult mean"""
+        weight_mean, weight_sd = self.config["weight_kg"][sex]
+        height_mean, height_sd = self.config["height_m"][sex]
+        if age < 18:
+            grown = age / 18
+            weight_mean = 3.5 + (weight_mean - 3.5) * grown
+            height_mean = 0.5 + (height_mean - 0.5) * grown
+            weight_sd, height_sd = weight_sd * max(grown, 0.1), height_sd * max(grown, 0.1)
+        weight = max(rng.gauss(weight_mean, weight_sd), 2.0)
+        height = max(rng.gauss(height_mean, height_sd), 0.45)
+        return round(weight, 1), round(height, 2)
+
+    def _symptoms(self, rng):
+        config = self.config
+        count = rng.choices(self.counts, cum_weights=self.count_weights)[0]
+        picked = []
+        while len(picked) < min(count, len(self.symptoms)):
+            symptom = rng.choices(self.symptoms, cum_weights=self.symptom_weights)[0]
+            if symptom not in picked:
+                picked.append(symptom)
+        items = []
+        for symptom in picked:
+            if rng.random() < config["typo_rate"]:
+                symptom = typo(symptom, rng)
+            if rng.random() < config["free_text_rate"]:
+                symptom = rng.choice(FREE_TEXT).format(symptom)
+            items.append(symptom)
+            if rng.random() < config["duplicate_rate"]:
+                items.append(symptom)
+        return ", ".join(items)
+
+    def _patient(self, rng):
+        config = self.config
+        low, high = rng.choices(self.age_bands, cum_weights=self.age_weights)[0]
+        age = rng.randint(low, high - 1) if high - low > 1 else low
+        sex = rng.choices(self.sexes, cum_weights=self.sex_weights)[0]
+        weight, height = self._body_size(rng, age, sex)
+        payload = {"patientName": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", "age": age}
+        for field, value in (("sex", sex), ("weight", weight), ("height", height)):
+            if rng.random() >= config["missing_field_rate"]:
+                payload[field] = value
+        payload["symptoms"] = self._symptoms(rng)
+        return payload
+
+    def chunk(self, index):
+        """The CHUNK_SIZE payloads of chunk index"""
+        rng = random.Random(f"{self.seed}/{index}")
+        payloads = []
+        for _ in range(CHUNK_SIZE):
+            if payloads and rng.random() < self.config["repeat_rate"]:
+                payloads.append(dict(rng.choice(payloads)))
+            else:
+                payloads.append(self._patient(rng))
+        return payloads
+
+    def generate(self, count, start=0):
+        """Yield payloads start .. start + count - 1"""
+        end = start + count
+        for index in range(start // CHUNK_SIZE, (end + CHUNK_SIZE - 1) // CHUNK_SIZE):
+            first = index * CHUNK_SIZE
+            yield from self.chunk(index)[max(start - first, 0):end - first]
+
+
+def write_jsonl(payloads, f):
+    written = 0
+    for payload in payloads:
+        f.write(json.dumps(payload, separators=(",", ":")) + "\n")
+        written += 1
+    return written
+
+
+def write_parquet(payloads, path):
+    """Stream payloads into a Parquet file, one row group per CHUNK_SIZE records"""
+    if pq is None:
+        raise RuntimeError("Parquet output requires pyarrow (pip install pyarrow)")
+    schema = pa.schema([
+        ("patientName", pa.string()), ("age", pa.float64()), ("sex", pa.string()),
+        ("weight", pa.float64()), ("height", pa.float64()), ("symptoms", pa.string()),
+    ])
+    written = 0
+    with pq.ParquetWriter(path, schema) as writer:
+        batch = []
+        for payload in payloads:
+            batch.append(payload)
+            if len(batch) == CHUNK_SIZE:
+                writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+                written += len(batch)
+                batch = []
+        if batch:
+            writer.write_table(pa.Table.from_pylist(batch, schema=schema))
+            written += len(batch)
+    return written
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate seeded synthetic POST /assess payloads")
+    parser.add_argument("-n", "--count", type=int, required=True, help="number of patients")
+    parser.add_argument("-o", "--output", required=True, help="output .jsonl or .parquet (- for JSONL on stdout)")
+    parser.add_argument("--format", choices=FORMATS, help="default: from the output extension")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--start", type=int, default=0, help="index of the first patient (to shard a workload)")
+    parser.add_argument("--config", help="JSON file overriding DEFAULT_CONFIG settings")
+    args = parser.parse_args()
+
+    fmt = args.format or ("jsonl" if args.output == "-" else os.path.splitext(args.output)[1].lstrip(".").lower())
+    if fmt not in FORMATS:
+        parser.error("output must end in .jsonl or .parquet, or pass --format")
+    if fmt == "parquet" and pq is None:
+        parser.error("Parquet output requires pyarrow (pip install pyarrow)")
+
+    generator = WorkloadGenerator(args.seed, load_config(args.config))
+    payloads = generator.generate(args.count, args.start)
+    started = time.perf_counter()
+    if fmt == "parquet":
+        written = write_parquet(payloads, args.output)
+    elif args.output == "-":
+        written = write_jsonl(payloads, sys.stdout)
+    else:
+        with open(args.output, "w") as f:
+            written = write_jsonl(payloads, f)
+    print(f"Wrote {written:,} patients to {args.output} in {time.perf_counter() - started:.1f}s",
+          file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()